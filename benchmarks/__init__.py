@@ -0,0 +1 @@
+"""Benchmarks de rendimiento con audio sintético"""
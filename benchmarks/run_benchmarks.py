@@ -0,0 +1,335 @@
+"""
+Benchmarks de las rutas críticas de VoiceWise AI.
+
+Genera audio sintético determinista en un directorio temporal, mide las
+funciones de voicewise (y el divisor de la página de recorte) con distintos
+tamaños de entrada y escribe los resultados en JSON para comparar ejecuciones.
+
+Uso (desde la raíz del repositorio, con requirements.txt instalado):
+
+    python -m benchmarks.run_benchmarks --output bench_results.json
+    python -m benchmarks.run_benchmarks --quick --only srt,keywords
+    python -m benchmarks.run_benchmarks --only backends --whisper-model base
+"""
+import argparse
+import gc
+import glob
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks import synthetic_audio as synth
+
+KEYWORDS = ['emergencia', 'robo', 'drogas']
+
+# Tamaños por benchmark: (completo, rápido)
+SIZES = {
+    'split': ([2, 10, 30], [2]),            # minutos de audio
+    'silence': ([10, 60, 180], [10]),       # minutos de audio
+    'srt': ([100, 1000, 5000], [100]),      # segmentos
+    'keywords': ([1000, 10000, 50000], [1000]),  # palabras
+    'pdf_single': ([100, 1000], [100]),     # segmentos
+    'pdf_batch': ([10, 100, 500], [10]),    # archivos
+    'zip': ([10, 100, 500], [10]),          # archivos
+    'transcribe': ([30, 120], [30]),        # segundos de audio
+    'backends': ([60], [30]),               # segundos de audio
+}
+
+# Benchmarks que necesitan un modelo Whisper
+TRANSCRIPTION_BENCHMARKS = ('transcribe', 'backends')
+
+_pages: Dict[str, object] = {}
+
+
+def load_page(prefix: str):
+    """Importar una página de Streamlit por su prefijo numérico sin ejecutar su bloque __main__"""
+    if prefix in _pages:
+        return _pages[prefix]
+    path = glob.glob(os.path.join(ROOT, 'pages', f'{prefix}_*.py'))[0]
+    spec = importlib.util.spec_from_file_location(f'voicewise_page_{prefix}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _pages[prefix] = module
+    return module
+
+
+def measure(fn: Callable[[], object], repeat: int) -> List[float]:
+    """Ejecutar fn repetidamente y devolver los tiempos en segundos"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def record(results: List[Dict], name: str, unit: str, size, timings: List[float], **extra):
+    entry = {
+        'name': name,
+        'unit': unit,
+        'size': size,
+        'repeat': len(timings),
+        'timings_s': timings,
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+        'mean_s': statistics.mean(timings),
+    }
+    entry.update(extra)
+    results.append(entry)
+    print(f"  {name:<28} {unit}={size:<8} min={entry['min_s']:.4f}s median={entry['median_s']:.4f}s")
+
+
+def bench_split(work_dir: str, sizes, repeat: int, results: List[Dict], output_format: str):
+    page = load_page('3')
+    for minutes in sizes:
+        path = synth.write_wav(os.path.join(work_dir, f'split_{minutes}m.wav'),
+                               synth.make_speech_like(minutes * 60, seed=minutes))
+        created = []
+
+        def run():
+            segments = []
+            for _, segments in page.divide_audio_advanced(path, interval_minutes=2, output_format=output_format):
+                pass
+            if segments:
+                created.append(os.path.dirname(segments[0].filepath))
+
+        timings = measure(run, repeat)
+        for directory in created:
+            shutil.rmtree(directory, ignore_errors=True)
+        record(results, 'divide_audio_advanced', 'audio_min', minutes, timings, output_format=output_format)
+
+
+def bench_silence(work_dir: str, sizes, repeat: int, results: List[Dict]):
+    from voicewise.silence import build_silence_map, cut_points
+    for minutes in sizes:
+        samples = synth.make_speech_like(minutes * 60, seed=minutes)
+        timings = measure(lambda: build_silence_map(samples, synth.SAMPLE_RATE), repeat)
+        record(results, 'silence.build_silence_map', 'audio_min', minutes, timings)
+        # Lo que cuesta mover un control del divisor: solo los cortes sobre el mapa ya calculado
+        smap = build_silence_map(samples, synth.SAMPLE_RATE)
+        timings = measure(lambda: cut_points(smap, 2 * 60 * 1000), repeat)
+        record(results, 'silence.cut_points', 'audio_min', minutes, timings)
+
+
+def bench_srt(work_dir: str, sizes, repeat: int, results: List[Dict]):
+    from voicewise import srt
+    from voicewise.segments import SegmentStore
+    for n in sizes:
+        path = synth.write_srt(os.path.join(work_dir, f'bench_{n}.srt'), n, KEYWORDS)
+        timings = measure(lambda: srt.parse_srt_file(path), repeat)
+        record(results, 'srt.parse_srt_file', 'segments', n, timings)
+
+        # HTML de la última página del visor: debe costar lo mismo para cualquier n
+        segments = srt.parse_srt_file(path)
+        page = segments[-srt.PAGE_SIZES[0]:]
+        timings = measure(lambda: ''.join(srt.format_segment_html(s, KEYWORDS, True) for s in page), repeat)
+        record(results, 'srt.format_segment_html[page]', 'segments', n, timings)
+
+        # Consulta por rango de tiempo sobre el almacén compacto (búsqueda binaria en segundos)
+        store = SegmentStore.from_srt_file(path, KEYWORDS)
+        middle = float(store.ends[-1]) / 2
+        timings = measure(lambda: store.between(middle, middle + 120), repeat)
+        record(results, 'segments.SegmentStore.between', 'segments', n, timings)
+
+
+def bench_keywords(work_dir: str, sizes, repeat: int, results: List[Dict]):
+    from voicewise import keywords, srt
+    highlighters = {
+        'srt.highlight_segment_text': srt.highlight_segment_text,
+        'keywords.highlight_text_simple': keywords.highlight_text_simple,
+        'keywords.highlight_keywords': keywords.highlight_keywords,
+        'keywords.find_keywords_in_text': keywords.find_keywords_in_text,
+    }
+    for n in sizes:
+        text = synth.make_transcript(n, KEYWORDS)
+        for name, fn in highlighters.items():
+            timings = measure(lambda: fn(text, KEYWORDS), repeat)
+            record(results, name, 'words', n, timings)
+
+
+def bench_pdf_single(work_dir: str, sizes, repeat: int, results: List[Dict]):
+    from voicewise import reporting, srt
+    for n in sizes:
+        path = synth.write_srt(os.path.join(work_dir, f'pdf_{n}.srt'), n, KEYWORDS)
+        text = ' '.join(segment.text for segment in srt.parse_srt_file(path))
+        entry = reporting.FileReport(
+            filename='bench.wav',
+            transcription=text,
+            duration=60.0,
+            processing_time=1.0,
+            word_count=len(text.split()),
+            found_keywords=list(KEYWORDS),
+            srt_path=path
+        )
+
+        def run():
+            report = reporting.build_report([entry], KEYWORDS, title='bench', single=True)
+            reporting.render_pdf(report)
+
+        record(results, 'reporting.render_pdf[single]', 'segments', n, measure(run, repeat))
+
+
+def _batch_results(work_dir: str, n_files: int) -> List:
+    from voicewise.keywords import find_keywords_in_text
+    from voicewise.results import TranscriptionResult
+    results = []
+    for i in range(n_files):
+        text = synth.make_transcript(300, KEYWORDS, seed=i)
+        srt_path = synth.write_srt(os.path.join(work_dir, f'batch_{n_files}_{i}.srt'), 40, KEYWORDS, seed=i)
+        results.append(TranscriptionResult(
+            filename=f'audio_seg_{i + 1:03d}.mp3',
+            filepath=f'audio_seg_{i + 1:03d}.mp3',
+            transcription=text,
+            duration=120.0,
+            processing_time=10.0,
+            found_keywords=find_keywords_in_text(text, KEYWORDS),
+            word_count=len(text.split()),
+            srt_path=srt_path
+        ))
+    return results
+
+
+def bench_pdf_batch(work_dir: str, sizes, repeat: int, results: List[Dict]):
+    from voicewise import reporting
+    for n in sizes:
+        batch = _batch_results(work_dir, n)
+        timings = measure(lambda: reporting.build_report(batch, KEYWORDS, title='bench'), repeat)
+        record(results, 'reporting.build_report', 'files', n, timings)
+        report = reporting.build_report(batch, KEYWORDS, title='bench')
+        for name, render in (('pdf', reporting.render_pdf), ('md', reporting.render_markdown),
+                             ('html', reporting.render_html)):
+            timings = measure(lambda: render(report), repeat)
+            record(results, f'reporting.render_{name}', 'files', n, timings)
+
+
+def bench_zip(work_dir: str, sizes, repeat: int, results: List[Dict]):
+    from voicewise.export import create_download_zip
+    for n in sizes:
+        batch = _batch_results(work_dir, n)
+        timings = measure(lambda: create_download_zip(batch, KEYWORDS), repeat)
+        record(results, 'export.create_download_zip', 'files', n, timings)
+
+
+def bench_transcribe(work_dir: str, sizes, repeat: int, results: List[Dict], model_name: str):
+    import whisper
+    model = whisper.load_model(model_name)
+    for seconds in sizes:
+        path = synth.write_wav(os.path.join(work_dir, f'transcribe_{seconds}s.wav'),
+                               synth.make_speech_like(seconds, seed=seconds))
+        timings = measure(lambda: model.transcribe(audio=path, language='es', verbose=None), repeat)
+        record(results, f'whisper.transcribe[{model_name}]', 'audio_s', seconds, timings,
+               real_time_factor=min(timings) / seconds)
+
+
+def bench_backends(work_dir: str, sizes, repeat: int, results: List[Dict], model_name: str, backends: List[str]):
+    """Comparar los motores de inferencia sobre el mismo audio ya decodificado"""
+    import whisper
+    from voicewise.backends import load_backend
+
+    for seconds in sizes:
+        path = synth.write_wav(os.path.join(work_dir, f'backends_{seconds}s.wav'),
+                               synth.make_speech_like(seconds, seed=seconds))
+        audio = whisper.load_audio(path)
+        baseline = None
+        for name in backends:
+            start = time.perf_counter()
+            engine = load_backend(name, model_name)
+            load_s = time.perf_counter() - start
+            # Calentamiento: la primera llamada incluye inicializaciones perezosas
+            engine.transcribe(audio=audio[:whisper.audio.SAMPLE_RATE * 5], language='es', verbose=None)
+            timings = measure(lambda: engine.transcribe(audio=audio, language='es', verbose=None), repeat)
+            if baseline is None and name == 'whisper':
+                baseline = min(timings)
+            extra = {'backend': name, 'load_s': load_s, 'real_time_factor': min(timings) / seconds}
+            if baseline is not None:
+                extra['speedup_vs_whisper'] = baseline / min(timings)
+            record(results, f'backend.transcribe[{name}:{model_name}]', 'audio_s', seconds, timings, **extra)
+            del engine
+            gc.collect()
+
+
+BENCHMARKS = ['split', 'silence', 'srt', 'keywords', 'pdf_single', 'pdf_batch', 'zip', 'transcribe', 'backends']
+
+
+def environment_info() -> Dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks de VoiceWise AI')
+    parser.add_argument('--output', default='bench_results.json', help='Archivo JSON de resultados')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por medición')
+    parser.add_argument('--quick', action='store_true', help='Usar solo el tamaño más pequeño de cada benchmark')
+    parser.add_argument('--only', default='', help=f"Lista separada por comas de: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--skip-transcription', action='store_true', help='No ejecutar Whisper')
+    parser.add_argument('--whisper-model', default='tiny', help='Modelo Whisper para el benchmark de transcripción')
+    parser.add_argument('--backends', default='',
+                        help='Motores a comparar, separados por comas (por defecto todos los disponibles; '
+                             'whisper va primero como referencia)')
+    parser.add_argument('--split-format', default='mp3', help='Formato de salida para divide_audio_advanced')
+    args = parser.parse_args(argv)
+
+    selected = [name.strip() for name in args.only.split(',') if name.strip()] or list(BENCHMARKS)
+    if args.skip_transcription:
+        selected = [name for name in selected if name not in TRANSCRIPTION_BENCHMARKS]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Benchmarks desconocidos: {', '.join(sorted(unknown))}")
+
+    # Las páginas leen los logos con rutas relativas a la raíz
+    os.chdir(ROOT)
+    work_dir = tempfile.mkdtemp(prefix='voicewise_bench_')
+    results: List[Dict] = []
+    try:
+        for name in selected:
+            sizes = SIZES[name][1] if args.quick else SIZES[name][0]
+            print(f"▶ {name}")
+            bench = globals()[f'bench_{name}']
+            if name == 'split':
+                bench(work_dir, sizes, args.repeat, results, args.split_format)
+            elif name == 'transcribe':
+                bench(work_dir, sizes, args.repeat, results, args.whisper_model)
+            elif name == 'backends':
+                from voicewise.backends import available_backends
+                backends = [b.strip() for b in args.backends.split(',') if b.strip()] or list(available_backends())
+                backends.sort(key=lambda b: b != 'whisper')
+                bench(work_dir, sizes, args.repeat, results, args.whisper_model, backends)
+            else:
+                bench(work_dir, sizes, args.repeat, results)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {'environment': environment_info(), 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"✅ Resultados guardados en {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
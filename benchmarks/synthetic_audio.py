@@ -0,0 +1,112 @@
+"""Generación determinista de audio y datos sintéticos para los benchmarks"""
+import os
+from typing import List, Sequence
+
+import numpy as np
+from pydub import AudioSegment
+
+SAMPLE_RATE = 16000
+
+# Vocabulario de relleno para transcripciones sintéticas
+FILLER_WORDS = [
+    'la', 'llamada', 'de', 'hoy', 'reporta', 'una', 'situación', 'en', 'el', 'sector',
+    'norte', 'con', 'varias', 'personas', 'que', 'piden', 'apoyo', 'a', 'la', 'unidad',
+]
+
+
+def make_tone(duration_s: float, freq: float = 440.0, amplitude: float = 0.5,
+              sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Generar un tono senoidal en float32"""
+    t = np.arange(int(duration_s * sample_rate), dtype=np.float32) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def make_noise(duration_s: float, amplitude: float = 0.3, seed: int = 0,
+               sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Generar ruido blanco reproducible"""
+    rng = np.random.default_rng(seed)
+    return (amplitude * rng.uniform(-1.0, 1.0, int(duration_s * sample_rate))).astype(np.float32)
+
+
+def make_silence(duration_s: float, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Generar un tramo de silencio"""
+    return np.zeros(int(duration_s * sample_rate), dtype=np.float32)
+
+
+def make_speech_like(
+    total_s: float,
+    burst_s: float = 8.0,
+    gap_s: float = 1.5,
+    seed: int = 0,
+    sample_rate: int = SAMPLE_RATE
+) -> np.ndarray:
+    """
+    Alternar ráfagas de tono+ruido con silencios de longitud configurable,
+    imitando la estructura de una grabación con pausas
+    """
+    rng = np.random.default_rng(seed)
+    total_samples = int(total_s * sample_rate)
+    chunks = []
+    produced = 0
+    burst = 0
+    while produced < total_samples:
+        freq = float(rng.uniform(180, 420))
+        signal = make_tone(burst_s, freq, 0.4, sample_rate) + make_noise(burst_s, 0.1, seed + burst, sample_rate)
+        chunks.append(signal)
+        chunks.append(make_silence(gap_s, sample_rate))
+        produced += len(signal) + int(gap_s * sample_rate)
+        burst += 1
+    return np.concatenate(chunks)[:total_samples]
+
+
+def to_audio_segment(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> AudioSegment:
+    """Convertir muestras float32 a un AudioSegment mono de 16 bits"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    return AudioSegment(pcm.tobytes(), frame_rate=sample_rate, sample_width=2, channels=1)
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> str:
+    """Escribir las muestras como WAV y devolver la ruta"""
+    to_audio_segment(samples, sample_rate).export(path, format='wav')
+    return path
+
+
+def make_transcript(n_words: int, keywords: Sequence[str], keyword_every: int = 50, seed: int = 0) -> str:
+    """Generar texto de transcripción con palabras clave intercaladas"""
+    rng = np.random.default_rng(seed)
+    words = list(rng.choice(FILLER_WORDS, size=n_words))
+    if keywords:
+        for i in range(0, n_words, keyword_every):
+            words[i] = keywords[(i // keyword_every) % len(keywords)]
+    return ' '.join(words)
+
+
+def format_srt_time(seconds: float) -> str:
+    """Convertir segundos a marca de tiempo SRT"""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def make_srt(n_segments: int, keywords: Sequence[str], segment_s: float = 4.0, seed: int = 0) -> str:
+    """Generar contenido SRT con n segmentos"""
+    blocks: List[str] = []
+    for i in range(n_segments):
+        start = i * segment_s
+        text = make_transcript(12, keywords, keyword_every=7 + (i % 5), seed=seed + i)
+        blocks.append(f"{i + 1}\n{format_srt_time(start)} --> {format_srt_time(start + segment_s)}\n{text}\n")
+    return '\n'.join(blocks)
+
+
+def write_srt(path: str, n_segments: int, keywords: Sequence[str], seed: int = 0) -> str:
+    """Escribir un archivo SRT sintético y devolver la ruta"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(make_srt(n_segments, keywords, seed=seed))
+    return path
+
+
+def ensure_dir(path: str) -> str:
+    os.makedirs(path, exist_ok=True)
+    return path
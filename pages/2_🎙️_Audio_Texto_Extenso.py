@@ -11,67 +11,64 @@ import time
 import re
 import zipfile
 import shutil
-from dataclasses import dataclass
+from dataclasses import replace
 from typing import List, Set, Tuple, Dict
-from reportlab.lib.pagesizes import A4, letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch, mm
-from reportlab.lib.colors import HexColor, black, blue, red
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Image
 from datetime import datetime
-import io
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+from voicewise.api import start_api_server
+from voicewise.backends import DEFAULT_BACKEND, available_backends
+from voicewise.checkpoint import TranscriptionCheckpoints, plan_batch
+from voicewise.compute import compute_slot, get_governor
+from voicewise.diarization import cached_speaker_turns, label_result, missing_speaker_turns, render_diarization_options, speaker_turns
+from voicewise.export import create_data_export, create_download_zip
+from voicewise.incremental import IncrementalIndex, cached_result, plan_incremental, raw_block_fingerprints, stitch
+from voicewise.keywords import find_keywords_in_text, highlight_keywords
+from voicewise.language import LANGUAGE_OPTIONS, format_language, resolve_language
+from voicewise.metrics import JobMetrics, render_metrics_panel, start_metrics_server, track
+from voicewise.pipeline import BatchPipeline, PipelineItem
+from voicewise.preprocess import load_audio, render_preprocess_options
+from voicewise.registry import MODEL_SIZE, get_engine
+from voicewise.reporting import build_report, render_report_downloads
+from voicewise.results import ResultStore, StoredResult, TranscriptionResult
+from voicewise.scheduling import STRATEGIES, EtaEstimator, estimate_duration, plan_schedule
+from voicewise.srt import FILTER_ALL, FILTER_HITS, load_segment_index, render_segment_preview, render_segment_viewer, render_speaker_summary, segments_to_srt
+from voicewise.timeline import KeywordHit, build_hit_index, find_preview, format_clock, render_hit_timeline, write_preview
+from voicewise.triage import TriageRule, transcribe_with_triage
+from voicewise.zip_ingest import AUDIO_EXTENSIONS, ZipAudioArchive, ZipAudioMember, ZipSecurityError
 
 
 st.set_page_config(page_title='Audio Texto Extenso', page_icon=':studio_microphone:', layout="wide")
 
 # Inicializar session state
-if 'processing_results' not in st.session_state:
-    st.session_state.processing_results = []
+if 'result_store' not in st.session_state:
+    st.session_state.result_store = None     # ResultStore del último lote (textos en disco)
 if 'current_temp_dir' not in st.session_state:
     st.session_state.current_temp_dir = None
 if 'transcription_complete' not in st.session_state:
     st.session_state.transcription_complete = False
 if 'keywords' not in st.session_state:
     st.session_state.keywords = []
-if 'processing_keywords' not in st.session_state:
-    st.session_state.processing_keywords = []
-if 'total_processing_time' not in st.session_state:
-    st.session_state.total_processing_time = 0
 if 'show_results' not in st.session_state:
     st.session_state.show_results = False
+if 'job_metrics' not in st.session_state:
+    st.session_state.job_metrics = None
 
-@dataclass
-class TranscriptionResult:
-    filename: str
-    filepath: str
-    transcription: str
-    duration: float
-    processing_time: float
-    found_keywords: List[str]
-    word_count: int
-    srt_path: str = None
-
-@dataclass
-class SRTSegment:
-    index: int
-    start_time: str
-    end_time: str
-    text: str
-    contains_keywords: bool = False
-
-@st.cache_resource
-def load_whisper_model():
-    """Load Whisper model with caching"""
+def load_whisper_model(backend: str = DEFAULT_BACKEND, instance: int = 0):
+    """Load the inference backend with caching (instance = compute slot index: one model copy per concurrent transcription)"""
     try:
-        return whisper.load_model('base')
+        return get_engine(backend, instance)
     except Exception as e:
         st.error(f"Error cargando modelo Whisper: {e}")
         return None
 
-model = load_whisper_model()
+RESULTS_PAGE_SIZE = 20   # archivos por página en la vista de resultados
+LIVE_RESULTS = 20        # archivos recientes visibles durante el procesamiento
+
+model = load_whisper_model(DEFAULT_BACKEND, 0)
+start_metrics_server()
+start_api_server()
 
 def natural_sort_key(filename: str) -> tuple:
     """Genera una clave de ordenamiento natural para archivos con números"""
@@ -85,93 +82,64 @@ def natural_sort_key(filename: str) -> tuple:
             result.append(part)
     return tuple(result)
 
-def sort_audio_files(audio_files: List[str]) -> List[str]:
+def sort_audio_files(audio_files: List[ZipAudioMember]) -> List[ZipAudioMember]:
     """Ordena archivos de audio de manera inteligente"""
-    files_with_names = [(os.path.basename(f), f) for f in audio_files]
-    sorted_files = sorted(files_with_names, key=lambda x: natural_sort_key(x[0]))
-    return [full_path for _, full_path in sorted_files]
+    return sorted(audio_files, key=lambda member: natural_sort_key(member.filename))
 
-def get_audio_files_from_zip(zip_file) -> Tuple[List[str], str]:
-    """Extract and validate audio files from ZIP"""
+def get_audio_files_from_zip(zip_file) -> Tuple[List[ZipAudioMember], ZipAudioArchive]:
+    """List audio members straight from the uploaded ZIP buffer (nothing is extracted yet)"""
     try:
-        temp_dir = tempfile.mkdtemp()
-        zip_path = os.path.join(temp_dir, "uploaded.zip")
-        
-        with open(zip_path, "wb") as f:
-            f.write(zip_file.read())
-        
-        with zipfile.ZipFile(zip_path, 'r') as zf:
-            zf.extractall(temp_dir)
+        archive = ZipAudioArchive(zip_file)
         
-        audio_extensions = ('.wav', '.mp3', '.wave', '.m4a', '.flac', '.aac')
-        audio_files = []
+        for name, reason in archive.rejected:
+            st.warning(f"⚠️ Se omitió {name}: {reason}")
         
-        for root, dirs, files in os.walk(temp_dir):
-            for file in files:
-                if file.lower().endswith(audio_extensions):
-                    full_path = os.path.join(root, file)
-                    audio_files.append(full_path)
-        
-        audio_files = sort_audio_files(audio_files)
-        return audio_files, temp_dir
+        return sort_audio_files(archive.members), archive
         
     except zipfile.BadZipFile:
         st.error("El archivo no es un ZIP válido")
         return [], None
+    except ZipSecurityError as e:
+        st.error(f"ZIP rechazado por seguridad: {e}")
+        return [], None
     except Exception as e:
         st.error(f"Error procesando ZIP: {e}")
         return [], None
 
-def validate_audio_file(filepath: str) -> bool:
-    """Validate if audio file can be processed"""
-    try:
-        if not os.path.exists(filepath) or os.path.getsize(filepath) == 0:
-            return False
-        valid_extensions = ('.wav', '.mp3', '.wave', '.m4a', '.flac', '.aac')
-        return filepath.lower().endswith(valid_extensions)
-    except:
-        return False
+def validate_audio_file(member: ZipAudioMember) -> bool:
+    """Validate if audio member can be processed"""
+    return member.file_size > 0 and member.filename.lower().endswith(AUDIO_EXTENSIONS)
 
-def get_transcribe_safe(audio_path: str, language: str = 'es') -> Dict:
-    """Safe transcription with error handling"""
+def get_transcribe_safe(audio, language: str = 'es', whisper_model=None, file_hash: str = None,
+                        triage: TriageRule = None, keywords: List[str] = None) -> Dict:
+    """Safe transcription with error handling (accepts a path or a decoded array)"""
     try:
-        if model is None:
+        # Sin recurrir al modelo global: solo es seguro el del turno de cómputo ocupado
+        if whisper_model is None:
             return {"error": "Modelo Whisper no disponible"}
         
         start_time = time.time()
-        result = model.transcribe(audio=audio_path, language=language, verbose=False)
+        # En modo automático cada archivo detecta su idioma con la primera ventana de 30 s
+        detection = resolve_language(whisper_model, audio, language, file_hash)
+        if triage is not None and triage.active:
+            # Triaje: la decodificación se corta en cuanto se confirman las palabras clave
+            result = transcribe_with_triage(whisper_model, audio, detection.language, keywords or [], triage)
+        else:
+            result = whisper_model.transcribe(audio=audio, language=detection.language, verbose=False)
         processing_time = time.time() - start_time
         
         return {
             "text": result.get("text", ""),
             "segments": result.get("segments", []),
+            "language": detection.language,
+            "language_probability": detection.probability,
             "processing_time": processing_time,
+            "triage_stopped_at": result.get("triage_stopped_at"),
             "error": None
         }
     except Exception as e:
         return {"error": f"Error transcribiendo: {str(e)}"}
 
-def find_keywords_in_text(text: str, keywords: List[str]) -> List[str]:
-    """Find which keywords are present in text"""
-    found = []
-    text_lower = text.lower()
-    for keyword in keywords:
-        if keyword and keyword.lower().strip() in text_lower:
-            found.append(keyword)
-    return found
-
-def highlight_keywords(text: str, keywords: List[str]) -> str:
-    """Highlight keywords in text"""
-    highlighted = text
-    for keyword in keywords:
-        if keyword and keyword.strip():
-            pattern = re.compile(re.escape(keyword), re.IGNORECASE)
-            highlighted = pattern.sub(
-                lambda m: f'<mark style="background-color: #ffeb3b; color: #d32f2f; font-weight: bold;">{m.group()}</mark>',
-                highlighted
-            )
-    return highlighted
-
 def save_individual_files(result: Dict, filename: str, output_dir: str) -> Dict[str, str]:
     """Save transcription files for individual audio"""
     base_name = os.path.splitext(filename)[0]
@@ -185,15 +153,8 @@ def save_individual_files(result: Dict, filename: str, output_dir: str) -> Dict[
         
         if result.get('segments'):
             srt_path = os.path.join(output_dir, f"{base_name}.srt")
-            srt_content = []
-            for i, segment in enumerate(result['segments'], 1):
-                start = format_timestamp(segment['start'])
-                end = format_timestamp(segment['end'])
-                text = segment['text'].strip()
-                srt_content.extend([str(i), f"{start} --> {end}", text, ""])
-            
             with open(srt_path, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(srt_content))
+                f.write(segments_to_srt(result['segments']))
             saved_files['srt'] = srt_path
         
     except Exception as e:
@@ -201,405 +162,6 @@ def save_individual_files(result: Dict, filename: str, output_dir: str) -> Dict[
     
     return saved_files
 
-def format_timestamp(seconds):
-    """Convert seconds to SRT timestamp format"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds % 1) * 1000)
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
-
-def create_pdf_report(results: List[TranscriptionResult], keywords: List[str], processing_summary: Dict) -> bytes:
-    """Genera un reporte PDF profesional"""
-    buffer = io.BytesIO()
-    
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=20*mm,
-        leftMargin=20*mm,
-        topMargin=25*mm,
-        bottomMargin=20*mm,
-        title="Reporte de Transcripción Masiva"
-    )
-    
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=HexColor('#1e3c72'),
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=15,
-        spaceBefore=20,
-        textColor=HexColor('#2a5298'),
-        fontName='Helvetica-Bold'
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=10,
-        alignment=TA_JUSTIFY,
-        fontName='Helvetica'
-    )
-    
-    meta_style = ParagraphStyle(
-        'MetaStyle',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=HexColor('#666666'),
-        fontName='Helvetica'
-    )
-    
-    story = []
-    
-    # Header institucional con logo
-    try:
-        if os.path.exists('logo_instituto.png'):
-            # Crear imagen del logo
-            logo_img = Image('logo_instituto.png', width=1.5*inch, height=0.75*inch)
-            
-            # Crear párrafo con el texto institucional
-            header_text = Paragraph("""
-                <b>INSTITUTO UNIVERSITARIO RUMIÑAHUI</b><br/>
-                <font size="12">Departamento de Investigación</font><br/>
-                <font size="10" color="#666666">VoiceWise AI</font>
-            """, ParagraphStyle(
-                'HeaderText',
-                parent=normal_style,
-                fontSize=14,
-                alignment=TA_LEFT,
-                fontName='Helvetica-Bold'
-            ))
-            
-            # Tabla con logo a la izquierda y texto a la derecha
-            header_data = [[logo_img, header_text]]
-            
-            header_table = Table(header_data, colWidths=[2*inch, 5.5*inch])
-            header_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('ALIGN', (0, 0), (0, 0), 'CENTER'),  # Logo centrado en su celda
-                ('ALIGN', (1, 0), (1, 0), 'LEFT'),    # Texto alineado a la izquierda
-                ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                ('TOPPADDING', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ]))
-            
-            story.append(header_table)
-        
-        else:
-            # Fallback sin logo
-            header_content = """
-            <para align="center">
-                <b>🏛️ INSTITUTO UNIVERSITARIO RUMIÑAHUI</b><br/>
-                <font size="12">Departamento de Investigación</font><br/>
-                <font size="10" color="#666666">VoiceWise AI</font>
-            </para>
-            """
-            story.append(Paragraph(header_content, normal_style))
-        
-    except Exception as e:
-        # Fallback en caso de error con la imagen
-        header_content = """
-        <para align="center">
-            <b>🏛️ INSTITUTO UNIVERSITARIO RUMIÑAHUI</b><br/>
-            <font size="12">Departamento de Investigación</font><br/>
-            <font size="10" color="#666666">VoiceWise AI</font>
-        </para>
-        """
-        story.append(Paragraph(header_content, normal_style))
-
-    story.append(Spacer(1, 20))
-    
-    story.append(Paragraph("📊 REPORTE DE TRANSCRIPCIÓN MASIVA", title_style))
-    story.append(Spacer(1, 10))
-    
-    # Resumen ejecutivo
-    story.append(Paragraph("📈 INFORMACIÓN DE LOS ARCHIVOS", subtitle_style))
-    
-    total_files = len(results)
-    successful = len([r for r in results if r.transcription])
-    total_duration = sum(r.duration for r in results)
-    total_processing = sum(r.processing_time for r in results)
-    total_words = sum(r.word_count for r in results)
-    files_with_keywords = len([r for r in results if r.found_keywords])
-    
-    summary_data = [
-        ['📁 Total de archivos procesados:', f"{total_files}"],
-        ['✅ Transcripciones exitosas:', f"{successful}"],
-        ['📅 Fecha de procesamiento:', datetime.now().strftime("%d/%m/%Y %H:%M:%S")],
-        ['⏱️ Duración total de audio:', f"{total_duration:.1f} segundos ({total_duration/60:.1f} minutos)"],
-        ['⚡ Tiempo total de procesamiento:', f"{total_processing:.1f} segundos"],
-        ['📝 Total de palabras transcritas:', f"{total_words:,}"],
-        ['🎯 Archivos con palabras clave:', f"{files_with_keywords}"],
-        ['🔍 Palabras clave buscadas:', ", ".join(keywords) if keywords else "Ninguna"]
-    ]
-    
-    summary_table = Table(summary_data, colWidths=[4.5*inch, 3*inch])
-    summary_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#1e3c72')),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('TOPPADDING', (0, 0), (-1, -1), 5),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-    ]))
-    
-    story.append(summary_table)
-    story.append(Spacer(1, 20))
-    
-    # Análisis de palabras clave global
-    if keywords:
-        story.append(Paragraph("🎯 ANÁLISIS GLOBAL DE PALABRAS CLAVE", subtitle_style))
-        
-        keyword_stats = {}
-        for keyword in keywords:
-            keyword_stats[keyword] = len([r for r in results if keyword in r.found_keywords])
-        
-        if any(count > 0 for count in keyword_stats.values()):
-            story.append(Paragraph("📊 <b>Estadísticas de aparición:</b>", normal_style))
-            for keyword, count in keyword_stats.items():
-                percentage = (count / total_files * 100) if total_files > 0 else 0
-                color = "#2a5298" if count > 0 else "#666666"
-                story.append(Paragraph(f"• <font color='{color}'><b>{keyword}:</b> {count} archivos ({percentage:.1f}%)</font>", normal_style))
-        else:
-            story.append(Paragraph("❌ <b>No se encontraron las palabras clave en ningún archivo</b>", normal_style))
-        
-        story.append(Spacer(1, 20))
-    
-    # Detalle por archivo
-    story.append(Paragraph("📄 DETALLE POR ARCHIVO", subtitle_style))
-    
-    for i, result in enumerate(results, 1):
-        file_header = f"📁 {i}. {result.filename}"
-        story.append(Paragraph(file_header, ParagraphStyle(
-            'FileHeader',
-            parent=subtitle_style,
-            fontSize=14,
-            textColor=HexColor('#1e3c72'),
-            spaceBefore=15,
-            spaceAfter=10
-        )))
-        
-        file_data = [
-            ['⏱️ Duración:', f"{result.duration:.1f}s"],
-            ['⚡ Tiempo de procesamiento:', f"{result.processing_time:.1f}s"],
-            ['📝 Palabras transcritas:', f"{result.word_count}"],
-            ['🎯 Palabras clave encontradas:', ", ".join(result.found_keywords) if result.found_keywords else "Ninguna"]
-        ]
-        
-        file_table = Table(file_data, colWidths=[2.5*inch, 4.5*inch])
-        file_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#2a5298')),
-            ('BACKGROUND', (0, 0), (-1, -1), HexColor('#f8f9fa')),
-            ('GRID', (0, 0), (-1, -1), 1, HexColor('#e1e5e9')),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        
-        story.append(file_table)
-        
-        if result.transcription:
-            story.append(Spacer(1, 10))
-            story.append(Paragraph("📝 <b>Transcripción:</b>", normal_style))
-            
-            highlighted_text = result.transcription
-            for keyword in result.found_keywords:
-                highlighted_text = highlighted_text.replace(
-                    keyword, 
-                    f'<font color="#d32f2f"><b>{keyword}</b></font>'
-                )
-            
-            if len(highlighted_text) > 500:
-                highlighted_text = highlighted_text[:500] + "..."
-            
-            story.append(Paragraph(highlighted_text, ParagraphStyle(
-                'TranscriptionText',
-                parent=normal_style,
-                fontSize=10,
-                leftIndent=15,
-                rightIndent=15,
-                borderWidth=1,
-                borderColor=HexColor('#e1e8ed'),
-                borderPadding=10,
-                backColor=HexColor('#ffffff')
-            )))
-        
-        story.append(Spacer(1, 15))
-        
-        if i % 3 == 0 and i < len(results):
-            story.append(Paragraph("─" * 80, ParagraphStyle(
-                'Separator',
-                parent=meta_style,
-                alignment=TA_CENTER,
-                textColor=HexColor('#cccccc')
-            )))
-            story.append(Spacer(1, 10))
-    
-    # Footer
-    # Footer con logo - al final de la página actual
-    story.append(Spacer(1, 30))
-
-    try:
-        if os.path.exists('logo_wise_2.png'):
-            # Crear imagen del logo para el footer
-            logo_footer = Image('logo_wise_2.png', width=0.8*inch, height=0.4*inch)
-            
-            # Crear párrafo con el texto del footer
-            footer_text = Paragraph(f"""
-                <font size="8" color="#666666">
-                    Reporte generado automáticamente por el Sistema VoiceWise AI<br/>
-                    Instituto Universitario Rumiñahui - Departamento de Investigación<br/>
-                    {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}
-                </font>
-            """, ParagraphStyle(
-                'FooterText',
-                parent=meta_style,
-                fontSize=8,
-                alignment=TA_LEFT,
-                textColor=HexColor('#666666')
-            ))
-            
-            # Tabla del footer: logo a la izquierda, texto a la derecha
-            footer_data = [[logo_footer, footer_text]]
-            
-            footer_table = Table(footer_data, colWidths=[1.5*inch, 6*inch])
-            footer_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('ALIGN', (0, 0), (0, 0), 'CENTER'),  # Logo centrado en su celda
-                ('ALIGN', (1, 0), (1, 0), 'LEFT'),    # Texto alineado a la izquierda
-                ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                ('TOPPADDING', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-                ('LINEABOVE', (0, 0), (-1, 0), 1, HexColor('#cccccc')),
-            ]))
-            
-            story.append(footer_table)
-        
-        else:
-            # Debug: mostrar que no encuentra el archivo
-            st.warning("No se encontró el archivo logo_sistema.png en la raíz del proyecto")
-            footer_content = f"""
-            <para align="center">
-                <font size="8" color="#666666">
-                    Reporte generado automáticamente por el Sistema VoiceWise AI<br/>
-                    Instituto Universitario Rumiñahui - Departamento de Investigación<br/>
-                    {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}
-                </font>
-            </para>
-            """
-            story.append(Paragraph(footer_content, meta_style))
-        
-    except Exception as e:
-        # Debug: mostrar el error específico
-        st.error(f"Error cargando logo del sistema: {e}")
-        footer_content = f"""
-        <para align="center">
-            <font size="8" color="#666666">
-                Reporte generado automáticamente por el Sistema VoiceWise AI<br/>
-                Instituto Universitario Rumiñahui - Departamento de Investigación<br/>
-                {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}
-            </font>
-        </para>
-        """
-        story.append(Paragraph(footer_content, meta_style))
-    
-    doc.build(story)
-    
-    buffer.seek(0)
-    pdf_content = buffer.read()
-    buffer.close()
-    
-    return pdf_content
-
-def create_download_zip(results: List[TranscriptionResult], keywords: List[str]) -> bytes:
-    """Create ZIP file with all transcription results"""
-    zip_buffer = io.BytesIO()
-    
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        report = create_summary_report_md(results, keywords)
-        zip_file.writestr("REPORTE_TRANSCRIPCION.md", report.encode('utf-8'))
-        
-        for result in results:
-            if result.transcription:
-                base_name = os.path.splitext(result.filename)[0]
-                
-                zip_file.writestr(f"transcripciones/{base_name}.txt", result.transcription.encode('utf-8'))
-                
-                if result.srt_path and os.path.exists(result.srt_path):
-                    with open(result.srt_path, 'r', encoding='utf-8') as srt_file:
-                        srt_content = srt_file.read()
-                    zip_file.writestr(f"transcripciones_srt/{base_name}.srt", srt_content.encode('utf-8'))
-                
-                highlighted = highlight_keywords(result.transcription, keywords)
-                zip_file.writestr(f"resaltados/{base_name}_resaltado.html", 
-                                f"<html><body><pre>{highlighted}</pre></body></html>".encode('utf-8'))
-    
-    zip_buffer.seek(0)
-    return zip_buffer.read()
-
-def create_summary_report_md(results: List[TranscriptionResult], keywords: List[str]) -> str:
-    """Create summary report of all transcriptions in markdown"""
-    total_files = len(results)
-    successful = len([r for r in results if r.transcription])
-    total_duration = sum(r.duration for r in results)
-    total_processing = sum(r.processing_time for r in results)
-    total_words = sum(r.word_count for r in results)
-    
-    files_with_keywords = len([r for r in results if r.found_keywords])
-    
-    report = f"""# 📊 Reporte de Transcripción Masiva
-
-## 📈 Estadísticas Generales
-- **Total de archivos procesados:** {total_files}
-- **Transcripciones exitosas:** {successful}
-- **Duración total de audio:** {total_duration:.1f} segundos ({total_duration/60:.1f} minutos)
-- **Tiempo total de procesamiento:** {total_processing:.1f} segundos
-- **Total de palabras transcritas:** {total_words:,}
-- **Archivos con palabras clave:** {files_with_keywords}
-
-## 🔍 Palabras Clave Buscadas
-{', '.join(keywords) if keywords else 'Ninguna'}
-
-## 📄 Detalle por Archivo
-"""
-    
-    for result in results:
-        status = "✅" if result.transcription else "❌"
-        keywords_found = ", ".join(result.found_keywords) if result.found_keywords else "Ninguna"
-        
-        report += f"""
-### {status} {result.filename}
-- **Duración:** {result.duration:.1f}s
-- **Tiempo de procesamiento:** {result.processing_time:.1f}s
-- **Palabras:** {result.word_count}
-- **Palabras clave encontradas:** {keywords_found}
-"""
-    
-    return report
-
 def opciones():
     """Keyword selection interface"""
     keywords = st_tags(
@@ -621,74 +183,33 @@ def cleanup_temp_directory():
         except:
             pass
 
-def parse_srt_file(srt_file_path: str) -> List[SRTSegment]:
-    """Parse SRT file into structured segments"""
-    segments = []
-    
-    try:
-        if not os.path.exists(srt_file_path):
-            return segments
-            
-        with open(srt_file_path, 'r', encoding='utf-8') as file:
-            content = file.read().strip()
-    except Exception as e:
-        return segments
-    
-    if not content:
-        return segments
-    
-    blocks = re.split(r'\n\s*\n', content)
-    
-    for block in blocks:
-        lines = block.strip().split('\n')
-        if len(lines) >= 3:
-            try:
-                index = int(lines[0])
-                time_line = lines[1]
-                text = '\n'.join(lines[2:])
-                
-                time_match = re.match(r'(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})', time_line)
-                if time_match:
-                    start_time, end_time = time_match.groups()
-                    segments.append(SRTSegment(index, start_time, end_time, text))
-            except (ValueError, IndexError):
-                continue
-    
-    return segments
-
-def check_segment_for_keywords(segment: SRTSegment, keywords: List[str]) -> bool:
-    """Check if segment contains any keywords"""
-    if not segment or not segment.text or not keywords:
-        return False
-        
-    text_lower = segment.text.lower()
-    return any(keyword.lower().strip() in text_lower for keyword in keywords if keyword and keyword.strip())
-
-def display_enhanced_srt_for_file(srt_file_path: str, keywords: List[str], filename: str):
-    """Display SRT file with enhanced formatting and keyword highlighting"""
+def discard_results():
+    """Borrar del disco los resultados del último lote"""
+    if st.session_state.result_store is not None:
+        st.session_state.result_store.cleanup()
+    st.session_state.result_store = None
+
+def display_enhanced_srt_for_file(srt_file_path: str, keywords: List[str], filename: str, key: str = None,
+                                  live: bool = False):
+    """
+    Display SRT file with enhanced formatting and keyword highlighting.
+    live=True (progreso del lote) muestra una vista previa sin widgets: ese bloque se redibuja tras cada archivo.
+    """
     try:
         if not srt_file_path or not os.path.exists(srt_file_path):
             st.warning(f"Archivo SRT no encontrado para {filename}")
             return
         
-        segments = parse_srt_file(srt_file_path)
+        metrics = st.session_state.job_metrics
+        with track(metrics, 'parse_srt'):
+            segments, hits, misses = load_segment_index(srt_file_path, keywords)
         
         if not segments:
             st.warning(f"No se encontraron segmentos en el archivo SRT de {filename}")
             return
         
-        segments_with_keywords = []
-        
-        for segment in segments:
-            try:
-                if check_segment_for_keywords(segment, keywords):
-                    segment.contains_keywords = True
-                    segments_with_keywords.append(segment)
-            except Exception as e:
-                continue
-        
         total_segments = len(segments)
-        keyword_segments = len(segments_with_keywords)
+        keyword_segments = len(hits)
         
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -698,99 +219,73 @@ def display_enhanced_srt_for_file(srt_file_path: str, keywords: List[str], filen
         with col3:
             st.metric("Porcentaje", f"{(keyword_segments/total_segments*100):.1f}%" if total_segments > 0 else "0%")
         
-        if keyword_segments > 0:
-            segments_to_display = segments_with_keywords
-            st.markdown("#### 🎯 Segmentos con palabras clave")
-        else:
-            segments_to_display = segments[:10]
-            st.markdown("#### 📋 Muestra de segmentos (sin palabras clave)")
-            st.info(f"No se encontraron palabras clave. Mostrando los primeros 10 segmentos de {total_segments} total.")
+        if not keyword_segments:
+            st.info("No se encontraron palabras clave en este archivo.")
+        render_speaker_summary(segments)
         
-        if not segments_to_display:
-            st.info("No hay segmentos para mostrar.")
+        if live:
+            render_segment_preview(segments, hits, keywords, metrics=metrics)
             return
         
-        max_segments = 20
-        if len(segments_to_display) > max_segments:
-            st.warning(f"Mostrando los primeros {max_segments} segmentos relevantes de {len(segments_to_display)} encontrados.")
-            segments_to_display = segments_to_display[:max_segments]
-        
-        for segment in segments_to_display:
-            try:
-                highlighted_text, _ = highlight_keywords_in_text(segment.text, keywords)
-                
-                st.markdown(f"""
-                <div style="padding: 12px; margin: 10px 0; border-left: 4px solid #d32f2f; background-color: #fff3e0; border-radius: 4px;">
-                    <div style="font-size: 12px; color: #666; margin-bottom: 8px; font-weight: bold;">
-                        🎯 Segmento #{segment.index} | ⏱️ {segment.start_time} → {segment.end_time}
-                    </div>
-                    <div style="font-size: 14px; line-height: 1.5;">
-                        {highlighted_text}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-            except Exception as e:
-                st.write(f"**🎯 #{segment.index}** | ⏱️ {segment.start_time} → {segment.end_time}")
-                st.write(segment.text)
-                st.divider()
+        # Un visor por archivo del ZIP: los duplicados comparten SRT, así que la clave viene del llamador
+        render_segment_viewer(
+            segments, hits, misses, keywords,
+            key=key,
+            metrics=metrics,
+            default_filter=FILTER_HITS if keyword_segments else FILTER_ALL
+        )
                 
     except Exception as e:
         st.error(f"Error procesando marcas de tiempo para {filename}")
         st.info("Los archivos se procesaron correctamente. Puedes usar los archivos SRT descargados.")
 
-def highlight_keywords_in_text(text: str, keywords: List[str]) -> Tuple[str, List[str]]:
-    """Highlight keywords in text and return found terms"""
-    if not text or not keywords:
-        return text, []
-        
-    highlighted_text = text
-    found_terms = []
-    
-    for keyword in keywords:
-        if keyword and keyword.strip():
-            try:
-                pattern = re.compile(re.escape(keyword.strip()), re.IGNORECASE)
-                if pattern.search(text):
-                    found_terms.append(keyword.strip())
-                    highlighted_text = pattern.sub(
-                        lambda m: f'<mark style="background-color: #ffeb3b; color: #d32f2f; font-weight: bold;">{m.group()}</mark>',
-                        highlighted_text
-                    )
-            except re.error:
-                continue
-    
-    return highlighted_text, found_terms
-
 def display_results_section():
     """Función para mostrar los resultados de manera consistente"""
-    if not st.session_state.processing_results:
+    store = st.session_state.result_store
+    if store is None or not len(store):
         return
         
-    results = st.session_state.processing_results
-    keywords = st.session_state.get('processing_keywords', [])
-    total_time = st.session_state.get('total_processing_time', 0)
+    keywords = store.keywords
+    summary = store.summary
+    metrics = st.session_state.job_metrics
     
     # Mostrar resultados procesados
     st.markdown("### 📋 Resultados del Procesamiento")
-    for j, res in enumerate(results):
+    total_pages = (len(store) - 1) // RESULTS_PAGE_SIZE + 1
+    page = 1
+    if total_pages > 1:
+        page = st.number_input(f"Página de resultados (de {total_pages}):", min_value=1, max_value=total_pages,
+                               step=1, key="results_page")
+    # Solo se leen del disco los textos de la página visible
+    for j, res in enumerate(store.page(page, RESULTS_PAGE_SIZE)):
         emoji = "🎯" if res.found_keywords else "📄"
         
         with st.expander(f"{emoji} {res.filename}", expanded=bool(res.found_keywords)):
+            st.caption(f"🌐 Idioma: {format_language(res.language, res.language_probability)}")
+            if res.reused_from:
+                st.caption(f"♻️ Sin transcribir de nuevo: {res.reused_from}")
+            if res.triage_stopped_at is not None:
+                st.caption(f"⚡ Triaje: decodificado hasta {format_clock(res.triage_stopped_at)} de "
+                           f"{format_clock(res.duration)} · pendiente de transcripción completa")
             if res.found_keywords:
                 st.success(f"Palabras encontradas: **{', '.join(res.found_keywords)}**")
                 
-                tab1, tab2 = st.tabs(["📝 Texto resaltado", "⏱️ Marcas de tiempo"])
+                tab1, tab2, tab3 = st.tabs(["📝 Texto resaltado", "⏱️ Marcas de tiempo", "🎧 Línea de tiempo"])
                 
                 with tab1:
-                    highlighted_text = highlight_keywords(res.transcription, keywords)
-                    st.markdown(highlighted_text, unsafe_allow_html=True)
+                    with track(metrics, 'renderizado'):
+                        highlighted_text = highlight_keywords(res.transcription, keywords)
+                        st.markdown(highlighted_text, unsafe_allow_html=True)
                 
                 with tab2:
                     if res.srt_path and os.path.exists(res.srt_path):
-                        display_enhanced_srt_for_file(res.srt_path, keywords, res.filename)
+                        display_enhanced_srt_for_file(res.srt_path, keywords, res.filename,
+                                                      key=f"srt_viewer_{res.filepath}")
                     else:
                         st.info("No hay archivo SRT disponible")
+                
+                with tab3:
+                    render_hit_timeline(res.hits, res.duration, res.preview_path, key=f"timeline_{res.filepath}")
             else:
                 st.write("❌ No se encontraron palabras clave")
                 
@@ -802,7 +297,8 @@ def display_results_section():
                 
                 with tab2:
                     if res.srt_path and os.path.exists(res.srt_path):
-                        display_enhanced_srt_for_file(res.srt_path, keywords, res.filename)
+                        display_enhanced_srt_for_file(res.srt_path, keywords, res.filename,
+                                                      key=f"srt_viewer_{res.filepath}")
                     else:
                         st.info("No hay archivo SRT disponible")
     
@@ -810,15 +306,20 @@ def display_results_section():
     st.markdown("---")
     st.markdown("## 📊 Resumen del Procesamiento Masivo")
     
+    # Totales calculados una sola vez al cerrar el lote
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Archivos procesados", len(results))
+        st.metric("Archivos procesados", summary.files)
     with col2:
-        st.metric("Con palabras clave", len([r for r in results if r.found_keywords]))
+        st.metric("Con palabras clave", summary.with_keywords)
     with col3:
-        st.metric("Total palabras", f"{sum(r.word_count for r in results):,}")
+        st.metric("Total palabras", f"{summary.total_words:,}")
     with col4:
-        st.metric("Tiempo total", f"{total_time:.1f}s")
+        st.metric("Tiempo total", f"{store.total_time:.1f}s")
+    
+    if summary.flagged:
+        st.warning(f"⚡ {summary.flagged} archivos se cribaron con parada anticipada y están pendientes de transcripción "
+                   "completa. Procesa de nuevo el ZIP sin modo triaje: el resto se reanuda desde sus puntos de control.")
     
     # Sección de reportes y descargas
     st.markdown("### 📄 Generar Reportes y Descargas")
@@ -826,37 +327,23 @@ def display_results_section():
     col_report1, col_report2 = st.columns([1, 1])
     
     with col_report1:
-        # Generar reporte PDF profesional
+        # Reporte profesional (PDF, Markdown y HTML) a partir de un único modelo
         try:
-            processing_summary = {
-                'total_time': total_time,
-                'total_files': len(results),
-                'successful_files': len([r for r in results if r.transcription])
-            }
-            
-            pdf_content = create_pdf_report(results, keywords, processing_summary)
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            pdf_filename = f"reporte_transcripcion_masiva_{timestamp}.pdf"
-            
-            st.download_button(
-                label="📄 Descargar Reporte PDF Completo",
-                data=pdf_content,
-                file_name=pdf_filename,
-                mime="application/pdf",
-                help="Reporte con análisis completo de todas las transcripciones",
-                use_container_width=True,
-                type="primary"
+            # Cada descarga se genera una vez por lote y se guarda junto a los resultados
+            render_report_downloads(
+                lambda: build_report(store, keywords, title="Reporte de Transcripción Masiva"),
+                "reporte_transcripcion_masiva", key="batch_report", metrics=metrics, artifact=store.artifact
             )
-            
         except Exception as e:
-            st.error(f"Error generando reporte PDF: {e}")
+            st.error(f"Error generando reporte: {e}")
             #st.info("Asegúrate de tener instalado: pip install reportlab")
     
     with col_report2:
         # Descargar ZIP con todos los resultados
         try:
-            zip_data = create_download_zip(results, keywords)
+            with track(metrics, 'zip_descarga'):
+                zip_data = store.artifact("transcripciones_completas.zip",
+                                          lambda: create_download_zip(store.results, keywords))
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             zip_filename = f"transcripciones_completas_{timestamp}.zip"
             
@@ -865,17 +352,37 @@ def display_results_section():
                 data=zip_data,
                 file_name=zip_filename,
                 mime="application/zip",
-                help="ZIP con transcripciones TXT, SRT, HTML resaltados y reporte MD",
+                help="ZIP con transcripciones TXT, SRT, HTML resaltados, reportes MD y HTML y tablas de datos",
                 use_container_width=True
             )
         except Exception as e:
             st.error(f"Error creando ZIP: {e}")
+        
+        try:
+            with track(metrics, 'exportacion_datos'):
+                data_export = store.artifact("datos_transcripcion.zip",
+                                             lambda: create_data_export(store.results, keywords))
+            st.download_button(
+                label="📊 Exportar Datos (JSONL + Parquet)",
+                data=data_export,
+                file_name=f"datos_transcripcion_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                mime="application/zip",
+                help="Tabla de segmentos (inicio, fin, texto, palabras clave) y resumen por archivo para pandas",
+                use_container_width=True
+            )
+        except Exception as e:
+            st.error(f"Error exportando datos: {e}")
+    
+    # El trabajo se cierra tras el primer renderizado completo (incluye PDF y ZIP)
+    if metrics is not None:
+        metrics.finish()
     
     # Información sobre los reportes
     st.info("""
     📋 **Los reportes incluyen:**
-    • 📊 **Reporte en PDF**: Análisis completo, estadísticas, marca institucional
+    • 📊 **Reporte en PDF, Markdown y HTML**: Análisis completo, estadísticas, marca institucional
     • 📦 **ZIP Completo**: Archivos TXT, SRT con marcas de tiempo, HTML resaltados
+    • 📊 **Datos**: Segmentos y resumen por archivo en JSON Lines y Parquet
     • 📈 **Estadísticas globales**: Aparición de palabras clave por archivo
     • 🎯 **Análisis temporal**: Segmentos relevantes identificados
     • 🏛️ **Marca institucional**: Instituto Universitario Rumiñahui
@@ -884,11 +391,10 @@ def display_results_section():
     # Botón para limpiar resultados y empezar de nuevo
     st.markdown("---")
     if st.button("🔄 Procesar nuevos archivos", type="secondary"):
-        st.session_state.processing_results = []
+        discard_results()
         st.session_state.transcription_complete = False
-        st.session_state.processing_keywords = []
-        st.session_state.total_processing_time = 0
         st.session_state.show_results = False
+        st.session_state.job_metrics = None
         cleanup_temp_directory()
         st.rerun()
 
@@ -913,7 +419,7 @@ if __name__ == "__main__":
         
         if st.button("🗑️ Limpiar archivos temporales"):
             cleanup_temp_directory()
-            st.session_state.processing_results = []
+            discard_results()
             st.session_state.show_results = False
             st.success("Archivos limpiados")
     
@@ -925,8 +431,8 @@ if __name__ == "__main__":
     )
     
     # Mostrar resultados persistentes si existen
-    if st.session_state.processing_results and st.session_state.show_results:
-        st.success(f"✅ Resultados disponibles ({len(st.session_state.processing_results)} archivos procesados)")
+    if st.session_state.result_store is not None and st.session_state.show_results:
+        st.success(f"✅ Resultados disponibles ({len(st.session_state.result_store)} archivos procesados)")
         display_results_section()
     
     # Upload ZIP file
@@ -971,8 +477,7 @@ if __name__ == "__main__":
     else:
         # Procesar ZIP file
         with st.spinner("🔍 Analizando archivo ZIP y ordenando archivos..."):
-            audio_files, temp_dir = get_audio_files_from_zip(zip_file)
-            st.session_state.current_temp_dir = temp_dir
+            audio_files, archive = get_audio_files_from_zip(zip_file)
         
         if not audio_files:
             st.error("❌ No se encontraron archivos de audio válidos en el ZIP")
@@ -982,8 +487,8 @@ if __name__ == "__main__":
             # Mostrar lista de archivos encontrados (ahora ordenados)
             with st.expander("📋 Archivos encontrados (en orden de procesamiento)", expanded=False):
                 for i, audio_file in enumerate(audio_files, 1):
-                    filename = os.path.basename(audio_file)
-                    file_size = os.path.getsize(audio_file) / (1024 * 1024)  # MB
+                    filename = audio_file.filename
+                    file_size = audio_file.file_size / (1024 * 1024)  # MB
                     is_valid = validate_audio_file(audio_file)
                     status = "✅" if is_valid else "❌"
                     st.write(f"**{i}.** {status} **{filename}** ({file_size:.2f} MB)")
@@ -1002,117 +507,388 @@ if __name__ == "__main__":
                     st.session_state.keywords = keywords
                     if keywords:
                         st.info(f"🔍 Buscando en todos los archivos: **{', '.join(keywords)}**")
+                    batch_language = st.selectbox(
+                        "🌐 Idioma de los audios:",
+                        list(LANGUAGE_OPTIONS),
+                        index=list(LANGUAGE_OPTIONS).index('es'),
+                        format_func=lambda code: LANGUAGE_OPTIONS[code],
+                        help="En modo automático cada archivo se transcribe en el idioma detectado en sus primeros 30 segundos"
+                    )
                 
                 with col2:
                     st.metric("Archivos válidos", len(valid_files))
                     st.metric("Archivos inválidos", len(audio_files) - len(valid_files))
                 
+                with st.expander("⚙️ Opciones avanzadas", expanded=False):
+                    prefetch_files = st.slider(
+                        "Archivos decodificados por adelantado:",
+                        min_value=1,
+                        max_value=4,
+                        value=2,
+                        help="Mientras se transcribe un archivo, los siguientes se extraen y decodifican en segundo plano"
+                    )
+                    inference_workers = st.slider(
+                        "Transcripciones simultáneas:",
+                        min_value=1,
+                        max_value=4,
+                        value=1,
+                        help="Cada transcripción simultánea usa su propia copia del modelo (~0.5 GB de RAM adicional). "
+                             f"El servidor ejecuta como máximo {get_governor().max_concurrent} transcripciones "
+                             "a la vez entre todas las sesiones; el resto espera turno."
+                    )
+                    backends = available_backends()
+                    inference_backend = st.selectbox(
+                        "Motor de inferencia:",
+                        list(backends),
+                        format_func=lambda key: backends[key],
+                        help="Los motores int8 son varias veces más rápidos en CPU con una precisión muy similar"
+                    )
+                    scheduling_strategy = st.selectbox(
+                        "Orden de despacho:",
+                        list(STRATEGIES),
+                        index=1,
+                        format_func=lambda key: STRATEGIES[key],
+                        help="Los archivos más largos primero evitan que unos pocos audios extensos dejen workers ociosos al final. "
+                             "Los resultados se muestran siempre en orden natural."
+                    )
+                    resume_batch = st.checkbox(
+                        "Reanudar desde puntos de control",
+                        value=True,
+                        help="Los audios ya transcritos con el mismo motor e idioma (en este u otro lote) no se "
+                             "vuelven a transcribir. Los audios repetidos dentro del ZIP se transcriben una sola vez."
+                    )
+                    triage_mode = st.selectbox(
+                        "Modo triaje:",
+                        ['completa', 'por_palabra', 'n_coincidencias'],
+                        format_func=lambda key: {
+                            'completa': 'Transcripción completa',
+                            'por_palabra': 'Detener al encontrar cada palabra clave una vez',
+                            'n_coincidencias': 'Detener tras N coincidencias',
+                        }[key],
+                        help="Para cribar ZIPs grandes: la decodificación de cada audio se detiene en cuanto se "
+                             "confirman los términos. Esos audios quedan marcados y, al procesar de nuevo el ZIP "
+                             "sin triaje, solo ellos se transcriben completos."
+                    )
+                    triage_hits = st.number_input(
+                        "Coincidencias para detener:", min_value=1, max_value=50, value=1,
+                        disabled=triage_mode != 'n_coincidencias'
+                    )
+                    max_speakers = render_diarization_options('diarizacion_lote')
+                    incremental_mode = st.checkbox(
+                        "♻️ Transcripción incremental",
+                        value=False,
+                        help="Para grabaciones que se amplían a diario: si una versión anterior de un audio ya se "
+                             "transcribió, se reutiliza el tramo sin cambios y solo se transcribe el resto."
+                    )
+                preprocess_settings = render_preprocess_options('preproc_lote')
+                triage_rule = TriageRule(
+                    max_hits=int(triage_hits) if triage_mode == 'n_coincidencias' else None,
+                    all_keywords=triage_mode == 'por_palabra'
+                )
+                
                 # Procesamiento masivo
                 if st.button('🚀 Procesar todos los archivos en lote', type="primary"):
                     if not keywords:
                         st.warning("⚠️ Agrega al menos una palabra clave para continuar")
                     else:
                         # Limpiar resultados anteriores
-                        st.session_state.processing_results = []
+                        discard_results()
                         st.session_state.show_results = False
                         
                         results = []
-                        output_dir = tempfile.mkdtemp()
+                        # TXT, SRT y descargas del lote quedan en disco; la sesión solo guarda manejadores
+                        store = ResultStore(keywords)
+                        output_dir = store.directory
+                        
+                        # Cada audio se extrae aquí justo antes de transcribirlo y se borra al decodificarlo
+                        cleanup_temp_directory()
+                        st.session_state.current_temp_dir = tempfile.mkdtemp(prefix="zip_audio_")
+                        
+                        metrics = JobMetrics(page='audio_texto_extenso', name=f"{len(valid_files)} archivos")
+                        st.session_state.job_metrics = metrics
                         
                         # Progress bars
                         overall_progress = st.progress(0)
                         status_text = st.empty()
                         
+                        queue_notice = st.empty()
+                        
                         # Placeholder para mostrar resultados en tiempo real
                         results_placeholder = st.empty()
                         
-                        start_total = time.time()
+                        temp_dir = st.session_state.current_temp_dir
+                        
+                        # El ZIP se cierra aunque falle la huella, la planificación o el pipeline
+                        try:
+                            # Huella de cada audio: identifica duplicados y puntos de control de lotes anteriores
+                            status_text.text("🔑 Calculando la huella de cada audio...")
+                            with metrics.span('huellas'):
+                                hashes = [archive.member_sha256(member) for member in valid_files]
+                            checkpoints = TranscriptionCheckpoints(
+                                inference_backend, MODEL_SIZE, batch_language,
+                                variant=preprocess_settings.key if preprocess_settings else None
+                            )
+                            plan = plan_batch(hashes, checkpoints if resume_batch else None)
+                            member_hashes = {member.name: file_hash for member, file_hash in zip(valid_files, hashes)}
+                            pending_files = [valid_files[i] for i in plan.pending]
+                            if plan.skipped:
+                                st.info(f"♻️ {len(plan.resumed)} archivos ya transcritos y {len(plan.duplicates)} duplicados "
+                                        f"dentro del ZIP: se transcribirán {len(pending_files)} de {len(valid_files)}")
+                        
+                            def diarization_key(file_hash: str) -> str:
+                                # La diarización depende del audio que se analiza: con preprocesado, del procesado
+                                return f"{file_hash}_{preprocess_settings.key}" if preprocess_settings else file_hash
+                        
+                            # Los reanudados sin hablantes en caché pasan por el pipeline: se decodifican para
+                            # diarizarlos y se reutiliza su punto de control en lugar de transcribirlos
+                            rediarize = missing_speaker_turns(
+                                {i: diarization_key(hashes[i]) for i in plan.resumed}, max_speakers
+                            ) if max_speakers else []
+                            resumed_payloads = {valid_files[i].name: plan.resumed[i] for i in rediarize}
+                            pipeline_indices = plan.pending + rediarize
+                            pipeline_files = [valid_files[i] for i in pipeline_indices]
+                        
+                            # Estimar duraciones desde las cabeceras y planificar el despacho
+                            with metrics.span('planificacion'):
+                                # Los reanudados no ocupan a ningún worker de inferencia
+                                estimated_durations = [estimate_duration(archive, member).seconds for member in pending_files]
+                                estimated_durations += [0.0] * len(rediarize)
+                                schedule = plan_schedule(estimated_durations, inference_workers, scheduling_strategy)
+                            eta = EtaEstimator(sum(estimated_durations), inference_workers)
+                            status_text.text(
+                                f"📐 {sum(estimated_durations) / 60:.1f} min de audio estimados · "
+                                f"carga del worker más ocupado: {schedule.makespan / 60:.1f} min de audio"
+                            )
+                        
+                            incremental_index = IncrementalIndex(
+                                inference_backend, MODEL_SIZE, batch_language,
+                                preprocess_settings.key if preprocess_settings else None
+                            ) if incremental_mode else None
                         
-                        for i, audio_file in enumerate(valid_files):
-                            filename = os.path.basename(audio_file)
+                            def decode_stage(member: ZipAudioMember):
+                                """Extraer el miembro del ZIP, decodificarlo y borrar el archivo extraído"""
+                                extracted_path = None
+                                try:
+                                    with metrics.span('extraccion_zip'):
+                                        extracted_path = archive.extract(member, temp_dir)
+                                    # El hash identifica el contenido para la caché de idioma y la vista previa
+                                    file_hash = member_hashes[member.name]
+                                    raw_pcm = []
+                                    audio = load_audio(extracted_path, file_hash, preprocess_settings, metrics,
+                                                       on_decoded=raw_pcm.append if incremental_index is not None else None)
+                                    if max_speakers:
+                                        # En el hilo de decodificación: se solapa con la inferencia de otros archivos
+                                        speaker_turns(audio, whisper.audio.SAMPLE_RATE, diarization_key(file_hash),
+                                                      max_speakers, metrics)
+                                    with metrics.span('vista_previa'):
+                                        preview_path = write_preview(audio, file_hash)
+                                    resumed = resumed_payloads.get(member.name)
+                                    fingerprints, plan = None, None
+                                    if incremental_index is not None and resumed is None:
+                                        with metrics.span('huellas'):
+                                            # Huellas del PCM sin preprocesar: la normalización cambia también el prefijo
+                                            fingerprints = raw_block_fingerprints(
+                                                file_hash, lambda: raw_pcm[0] if raw_pcm else whisper.load_audio(extracted_path)
+                                            )
+                                        plan = plan_incremental(incremental_index.lookup(fingerprints), fingerprints)
+                                    return audio, file_hash, preview_path, fingerprints, plan, resumed
+                                finally:
+                                    if extracted_path and os.path.exists(extracted_path):
+                                        os.remove(extracted_path)
+                        
+                            def infer_stage(decoded, worker: int) -> Dict:
+                                audio, file_hash, preview_path, fingerprints, plan, resumed = decoded
+                                if resumed is not None:
+                                    # Transcrito en un lote anterior: solo se decodificó para diarizarlo
+                                    return dict(resumed, preview_path=preview_path)
+                                if plan is not None and plan.complete:
+                                    # Versión ya transcrita de esta grabación: no hace falta turno de cómputo
+                                    transcription_result = dict(cached_result(plan), processing_time=0.0,
+                                                                triage_stopped_at=None, error=None)
+                                else:
+                                    # Con plan incremental solo se transcribe la cola nueva o editada
+                                    tail = audio[plan.resume_sample(whisper.audio.SAMPLE_RATE):] if plan else audio
+                                    # Cada archivo pide turno al gobernador: los lotes no acaparan el servidor
+                                    with compute_slot(queue_notice, metrics) as slot:
+                                        with metrics.span('inferencia'):
+                                            # La copia del modelo es la del turno, no la del worker: otras sesiones
+                                            # pueden estar transcribiendo a la vez con las demás copias
+                                            transcription_result = get_transcribe_safe(
+                                                tail, language=batch_language,
+                                                whisper_model=load_whisper_model(inference_backend, slot),
+                                                file_hash=file_hash, triage=triage_rule, keywords=keywords
+                                            )
+                                    if plan is not None and not transcription_result.get("error"):
+                                        transcription_result = stitch(plan, transcription_result)
+                                transcription_result["duration"] = len(audio) / whisper.audio.SAMPLE_RATE
+                                transcription_result["preview_path"] = preview_path
+                                if not transcription_result.get("error") and transcription_result.get("triage_stopped_at") is None:
+                                    # Punto de control en cuanto termina: un lote interrumpido se reanuda desde aquí.
+                                    # Los resultados parciales del triaje no cuentan como transcritos.
+                                    checkpoints.save(file_hash, transcription_result)
+                                    if incremental_index is not None:
+                                        incremental_index.save(fingerprints, transcription_result)
+                                return transcription_result
+                        
+                            def write_stage(item: PipelineItem) -> StoredResult:
+                                transcription_result = item.result
+                                if max_speakers:
+                                    # Hablantes de la caché: decode_stage los calcula para todo lo que pasa por el pipeline,
+                                    # incluidos los reanudados que aún no los tenían
+                                    turns = cached_speaker_turns(diarization_key(member_hashes[item.source.name]), max_speakers)
+                                    transcription_result = label_result(transcription_result, turns)
+                                text = transcription_result.get("text", "")
+                                with metrics.span('palabras_clave'):
+                                    found_keywords = find_keywords_in_text(text, keywords)
+                                    hits = build_hit_index(transcription_result.get("segments", []), keywords)
                             
-                            # Actualizar progreso
-                            progress = (i + 1) / len(valid_files)
-                            overall_progress.progress(progress)
-                            status_text.text(f"🎵 Procesando archivo {i+1}/{len(valid_files)}: {filename}")
+                                # Guardar archivos individuales
+                                with metrics.span('escritura_salidas'):
+                                    saved_files = save_individual_files(transcription_result, item.source.filename, output_dir)
                             
-                            # Transcribir archivo
-                            transcription_result = get_transcribe_safe(audio_file)
+                                reused = transcription_result.get("reused_seconds")
+                                reused_from = f"los primeros {format_clock(reused)} (versión anterior de la grabación)" if reused else None
                             
-                            if transcription_result.get("error"):
-                                st.error(f"❌ Error en archivo {i+1} ({filename}): {transcription_result['error']}")
-                                continue
+                                # El texto pasa al almacén del lote; la sesión conserva solo el manejador
+                                return store.add(TranscriptionResult(
+                                    filename=item.source.filename,
+                                    filepath=item.source.name,
+                                    transcription=text,
+                                    duration=transcription_result.get("duration", 0),
+                                    processing_time=transcription_result.get("processing_time", 0),
+                                    found_keywords=found_keywords,
+                                    word_count=len(text.split()) if text else 0,
+                                    srt_path=saved_files.get('srt'),
+                                    language=transcription_result.get("language"),
+                                    language_probability=transcription_result.get("language_probability"),
+                                    hits=hits,
+                                    preview_path=transcription_result.get("preview_path"),
+                                    triage_stopped_at=transcription_result.get("triage_stopped_at"),
+                                    reused_from=reused_from
+                                ))
+                        
+                            start_total = time.time()
+                        
+                            # Los audios con punto de control solo pasan por la etapa de escritura
+                            results_by_index = {}
+                            recent = []
+                            for i, payload in plan.resumed.items():
+                                if i in rediarize:
+                                    continue
+                                payload = dict(payload, preview_path=find_preview(hashes[i]))
+                                results_by_index[i] = write_stage(PipelineItem(i, valid_files[i], result=payload))
+                                results_by_index[i].reused_from = "punto de control de un lote anterior"
+                        
+                            # Mientras se transcribe un archivo se decodifican los siguientes en segundo plano
+                            pipeline = BatchPipeline(
+                                pipeline_files,
+                                decode=decode_stage,
+                                infer=infer_stage,
+                                write=write_stage,
+                                prefetch=prefetch_files,
+                                thread_hook=add_script_run_ctx,
+                                workers=inference_workers,
+                                order=schedule.order,
+                                assignment=schedule.assignment
+                            )
+                        
+                            for completed, item in enumerate(pipeline, 1):
+                                i = pipeline_indices[item.index]
+                                filename = item.source.filename
+                                if item.error and i in plan.resumed:
+                                    # Sin audio decodificado no hay hablantes, pero el punto de control sigue valiendo
+                                    payload = dict(plan.resumed[i], preview_path=find_preview(hashes[i]))
+                                    item.output, item.error = write_stage(PipelineItem(i, item.source, result=payload)), None
                             
-                            # Procesar resultados
-                            text = transcription_result.get("text", "")
-                            found_keywords = find_keywords_in_text(text, keywords)
-                            word_count = len(text.split()) if text else 0
+                                if item.error or i in plan.resumed:
+                                    eta.update(0, 0, estimated_durations[item.index])
+                                else:
+                                    # En triaje solo cuenta la parte decodificada para el factor de tiempo real
+                                    decoded = item.output.triage_stopped_at if item.output.triage_stopped_at is not None else item.output.duration
+                                    eta.update(decoded, item.output.processing_time, estimated_durations[item.index])
                             
-                            # Guardar archivos individuales
-                            saved_files = save_individual_files(transcription_result, filename, output_dir)
+                                # Actualizar progreso
+                                overall_progress.progress(completed / len(pipeline_files))
+                                remaining = eta.remaining_seconds()
+                                eta_text = f" · ⏳ Restante estimado: {remaining / 60:.1f} min (RTF {eta.real_time_factor:.2f})" if remaining is not None else ""
+                                status_text.text(f"🎵 Transcritos {completed}/{len(pipeline_files)} · último: {filename}{eta_text}")
                             
-                            # Crear objeto resultado
-                            result = TranscriptionResult(
-                                filename=filename,
-                                filepath=audio_file,
-                                transcription=text,
-                                duration=len(transcription_result.get("segments", [])) * 1.0,
-                                processing_time=transcription_result.get("processing_time", 0),
-                                found_keywords=found_keywords,
-                                word_count=word_count,
-                                srt_path=saved_files.get('srt')
-                            )
+                                if item.error:
+                                    st.error(f"❌ Error en archivo {i+1} ({filename}): {item.error}")
+                                    continue
                             
-                            results.append(result)
+                                # Los resultados se presentan siempre en orden natural, no de despacho
+                                results_by_index[i] = item.output
+                                if i in plan.resumed:
+                                    item.output.reused_from = "punto de control de un lote anterior"
+                                recent.append(i)
                             
-                            # Mostrar progreso con resultados acumulados
-                            with results_placeholder.container():
-                                st.markdown(f"### 📋 Progreso del Procesamiento ({len(results)}/{len(valid_files)})")
+                                # Mostrar progreso con los últimos resultados (el lote completo se pagina al final)
+                                with results_placeholder.container():
+                                    st.markdown(f"### 📋 Progreso del Procesamiento ({len(results_by_index)}/{len(valid_files)})")
+                                    if len(results_by_index) > LIVE_RESULTS:
+                                        st.caption(f"Mostrando los {LIVE_RESULTS} archivos transcritos más recientes")
                                 
-                                for j, res in enumerate(results):
-                                    emoji = "🎯" if res.found_keywords else "📄"
+                                    for j, res in enumerate(results_by_index[k] for k in sorted(recent[-LIVE_RESULTS:])):
+                                        emoji = "🎯" if res.found_keywords else "📄"
                                     
-                                    with st.expander(f"{emoji} {res.filename}", expanded=bool(res.found_keywords)):
-                                        if res.found_keywords:
-                                            st.success(f"Palabras encontradas: **{', '.join(res.found_keywords)}**")
+                                        with st.expander(f"{emoji} {res.filename}", expanded=bool(res.found_keywords)):
+                                            if res.triage_stopped_at is not None:
+                                                st.caption(f"⚡ Triaje: detenido en {format_clock(res.triage_stopped_at)}")
+                                            if res.found_keywords:
+                                                st.success(f"Palabras encontradas: **{', '.join(res.found_keywords)}**")
                                             
-                                            tab1, tab2 = st.tabs(["📝 Texto resaltado", "⏱️ Marcas de tiempo"])
+                                                tab1, tab2 = st.tabs(["📝 Texto resaltado", "⏱️ Marcas de tiempo"])
                                             
-                                            with tab1:
-                                                highlighted_text = highlight_keywords(res.transcription, keywords)
-                                                st.markdown(highlighted_text, unsafe_allow_html=True)
+                                                with tab1:
+                                                    with metrics.span('renderizado'):
+                                                        highlighted_text = highlight_keywords(res.transcription, keywords)
+                                                        st.markdown(highlighted_text, unsafe_allow_html=True)
                                             
-                                            with tab2:
-                                                if res.srt_path and os.path.exists(res.srt_path):
-                                                    display_enhanced_srt_for_file(res.srt_path, keywords, res.filename)
-                                                else:
-                                                    st.info("No hay archivo SRT disponible")
-                                        else:
-                                            st.write("❌ No se encontraron palabras clave")
+                                                with tab2:
+                                                    if res.srt_path and os.path.exists(res.srt_path):
+                                                        display_enhanced_srt_for_file(res.srt_path, keywords, res.filename, live=True)
+                                                    else:
+                                                        st.info("No hay archivo SRT disponible")
+                                            else:
+                                                st.write("❌ No se encontraron palabras clave")
                                             
-                                            tab1, tab2 = st.tabs(["📝 Texto completo", "⏱️ Marcas de tiempo"])
+                                                tab1, tab2 = st.tabs(["📝 Texto completo", "⏱️ Marcas de tiempo"])
                                             
-                                            with tab1:
-                                                preview_text = res.transcription[:500] + "..." if len(res.transcription) > 500 else res.transcription
-                                                st.write(preview_text)
+                                                with tab1:
+                                                    preview_text = res.transcription[:500] + "..." if len(res.transcription) > 500 else res.transcription
+                                                    st.write(preview_text)
                                             
-                                            with tab2:
-                                                if res.srt_path and os.path.exists(res.srt_path):
-                                                    display_enhanced_srt_for_file(res.srt_path, keywords, res.filename)
-                                                else:
-                                                    st.info("No hay archivo SRT disponible")
+                                                with tab2:
+                                                    if res.srt_path and os.path.exists(res.srt_path):
+                                                        display_enhanced_srt_for_file(res.srt_path, keywords, res.filename, live=True)
+                                                    else:
+                                                        st.info("No hay archivo SRT disponible")
+                        
+                            # Los duplicados reutilizan el resultado de su primera aparición
+                            for i, original in plan.duplicates.items():
+                                if original in results_by_index:
+                                    source = results_by_index[original]
+                                    results_by_index[i] = replace(
+                                        source, filename=valid_files[i].filename, filepath=valid_files[i].name,
+                                        reused_from=f"contenido idéntico a {source.filename}"
+                                    )
+                            results = [results_by_index[k] for k in sorted(results_by_index)]
+                        finally:
+                            archive.close()
                         
                         # Finalizar procesamiento
                         total_time = time.time() - start_total
                         
-                        # Guardar en session_state para persistencia
-                        st.session_state.processing_results = results
-                        st.session_state.processing_keywords = keywords
-                        st.session_state.total_processing_time = total_time
+                        # Guardar en session_state solo el almacén: manejadores y totales ya calculados
+                        store.finish(results, total_time)
+                        st.session_state.result_store = store
                         st.session_state.show_results = True
                         
                         overall_progress.progress(1.0)
                         status_text.text(f"✅ Procesamiento completado en {total_time:.2f} segundos")
                         
                         # Forzar actualización para mostrar la sección de descargas
-                        st.rerun()    
+                        st.rerun()
+    
+    render_metrics_panel(st.session_state.job_metrics)
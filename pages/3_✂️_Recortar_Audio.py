@@ -1,14 +1,20 @@
 import streamlit as st
-from pydub import AudioSegment, silence
+from pydub import AudioSegment
 import os
 import zipfile
 import tempfile
 import shutil
 import time
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 from dataclasses import dataclass
 import io
 
+import numpy as np
+
+from voicewise.cache import file_sha256
+from voicewise.metrics import JobMetrics, render_metrics_panel, start_metrics_server, track
+from voicewise.silence import SilenceMap, build_silence_map, cut_points
+
 st.set_page_config(
     page_title="Recortar Audios Extensos", 
     page_icon="✂️", 
@@ -23,6 +29,12 @@ if 'segments_info' not in st.session_state:
     st.session_state.segments_info = []
 if 'temp_dir' not in st.session_state:
     st.session_state.temp_dir = None
+if 'job_metrics' not in st.session_state:
+    st.session_state.job_metrics = None
+if 'split_analysis' not in st.session_state:
+    st.session_state.split_analysis = None
+
+start_metrics_server()
 
 @dataclass
 class SegmentInfo:
@@ -33,10 +45,11 @@ class SegmentInfo:
     end_time: float
     file_size_mb: float
 
-def get_audio_info(file_path: str) -> Dict:
+def get_audio_info(file_path: str, audio: AudioSegment = None) -> Dict:
     """Obtener información básica del archivo de audio"""
     try:
-        audio = AudioSegment.from_file(file_path)
+        if audio is None:
+            audio = AudioSegment.from_file(file_path)
         duration_seconds = len(audio) / 1000
         file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
         
@@ -52,6 +65,32 @@ def get_audio_info(file_path: str) -> Dict:
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
+def silence_map_from_segment(audio: AudioSegment) -> SilenceMap:
+    """Mapa de silencios sobre una copia mono a 16 kHz: misma envolvente que el audio extenso de la página 1"""
+    mono = audio.set_channels(1).set_frame_rate(16000)
+    samples = np.array(mono.get_array_of_samples(), dtype=np.float32) / (1 << (8 * mono.sample_width - 1))
+    return build_silence_map(samples, mono.frame_rate)
+
+def analyze_audio(file_path: str, file_hash: str) -> Dict:
+    """
+    Información y mapa de silencios de la subida actual, calculados una sola vez:
+    mover los controles de división solo recalcula los cortes sobre el mapa
+    """
+    analysis = st.session_state.split_analysis
+    if analysis is not None and analysis['file_hash'] == file_hash:
+        return analysis
+    try:
+        audio = AudioSegment.from_file(file_path)
+    except Exception as e:
+        return {'file_hash': file_hash, 'info': {'success': False, 'error': str(e)}, 'silence_map': None}
+    analysis = {
+        'file_hash': file_hash,
+        'info': get_audio_info(file_path, audio),
+        'silence_map': silence_map_from_segment(audio)
+    }
+    st.session_state.split_analysis = analysis
+    return analysis
+
 def format_duration(seconds: float) -> str:
     """Formatear duración en formato legible"""
     hours = int(seconds // 3600)
@@ -65,11 +104,6 @@ def format_duration(seconds: float) -> str:
     else:
         return f"{secs}s"
 
-def calculate_estimated_segments(duration_seconds: float, interval_minutes: int) -> int:
-    """Calcular número estimado de segmentos"""
-    interval_seconds = interval_minutes * 60
-    return int(duration_seconds / interval_seconds) + (1 if duration_seconds % interval_seconds > 0 else 0)
-
 def divide_audio_advanced(
     file_path: str, 
     interval_minutes: int = 2,
@@ -78,17 +112,31 @@ def divide_audio_advanced(
     silence_thresh_adjustment: int = 16,
     fade_duration: int = 100,
     output_format: str = "mp3",
-    output_quality: str = "medium"
+    output_quality: str = "medium",
+    metrics: JobMetrics = None,
+    boundaries: Optional[List[int]] = None
 ) -> Tuple[List[SegmentInfo], str]:
     """
-    Función avanzada para dividir audio con múltiples opciones
+    Función avanzada para dividir audio con múltiples opciones.
+    Con `boundaries` (los cortes de la vista previa, en ms) solo se exporta.
     """
     try:
         # Crear directorio temporal único
         temp_dir = tempfile.mkdtemp(prefix="audio_segments_")
         
         # Cargar el archivo de audio
-        audio = AudioSegment.from_file(file_path)
+        with track(metrics, 'carga_audio'):
+            audio = AudioSegment.from_file(file_path)
+        
+        if boundaries is None:
+            with track(metrics, 'deteccion_silencio'):
+                boundaries = cut_points(
+                    silence_map_from_segment(audio),
+                    interval_minutes * 60 * 1000,
+                    silence_detection=silence_detection,
+                    min_silence_len=min_silence_len,
+                    silence_thresh_adjustment=silence_thresh_adjustment
+                )
         
         # Configurar calidad de salida
         bitrate_map = {
@@ -99,44 +147,20 @@ def divide_audio_advanced(
         }
         export_bitrate = bitrate_map.get(output_quality, "128k")
         
-        # Convertir minutos a milisegundos
-        interval_ms = interval_minutes * 60 * 1000
-        
-        # Configurar umbral de silencio
-        silence_thresh = audio.dBFS - silence_thresh_adjustment
-        
         # Variables para segmentación
-        start = 0
         segment_count = 1
         segments_info = []
         
         total_duration = len(audio)
+        # El mapa se mide sobre la copia a 16 kHz: el último corte llega siempre al final real
+        cuts = [min(boundary, total_duration) for boundary in boundaries[1:-1]] + [total_duration]
+        start = 0
         
-        while start < total_duration:
-            end = min(start + interval_ms, total_duration)
+        for end in cuts:
+            if end <= start:
+                continue
             segment = audio[start:end]
             
-            # Detectar silencios si está habilitado
-            if silence_detection and end < total_duration:
-                try:
-                    silent_ranges = silence.detect_silence(
-                        segment, 
-                        min_silence_len=min_silence_len, 
-                        silence_thresh=silence_thresh
-                    )
-                    
-                    # Ajustar el corte al último silencio si existe
-                    if silent_ranges:
-                        # Buscar silencio cerca del final del segmento
-                        for silence_start, silence_end in reversed(silent_ranges):
-                            if silence_start >= (len(segment) - 30 * 1000):  # Últimos 30 segundos
-                                end = start + silence_start
-                                segment = audio[start:end]
-                                break
-                except Exception:
-                    # Si falla la detección de silencio, continuar sin ella
-                    pass
-            
             # Aplicar fade in/out si está configurado
             if fade_duration > 0:
                 segment = segment.fade_in(fade_duration).fade_out(fade_duration)
@@ -146,11 +170,12 @@ def divide_audio_advanced(
             segment_filepath = os.path.join(temp_dir, segment_filename)
             
             # Exportar segmento
-            segment.export(
-                segment_filepath, 
-                format=output_format,
-                bitrate=export_bitrate
-            )
+            with track(metrics, 'exportacion'):
+                segment.export(
+                    segment_filepath, 
+                    format=output_format,
+                    bitrate=export_bitrate
+                )
             
             # Crear información del segmento
             segment_info = SegmentInfo(
@@ -328,8 +353,9 @@ def main():
         with open(temp_file_path, "wb") as f:
             f.write(uploaded_file.getbuffer())
         
-        # Obtener información del archivo
-        audio_info = get_audio_info(temp_file_path)
+        # Información y mapa de silencios: una vez por archivo subido
+        analysis = analyze_audio(temp_file_path, file_sha256(temp_file_path))
+        audio_info = analysis['info']
         
         if not audio_info['success']:
             st.error(f"❌ Error al cargar el archivo: {audio_info['error']}")
@@ -346,16 +372,36 @@ def main():
             st.write(f"**💾 Tamaño:** {audio_info['file_size_mb']:.2f} MB")
             st.write(f"**🎵 Calidad:** {audio_info['sample_rate']} Hz, {audio_info['channels']} canal(es), {audio_info['format']} bits")
         
+        # Cortes reales sobre el mapa ya calculado: instantáneo al mover los controles
+        boundaries = cut_points(
+            analysis['silence_map'],
+            interval * 60 * 1000,
+            silence_detection=silence_detection,
+            min_silence_len=min_silence_len,
+            silence_thresh_adjustment=silence_thresh_adj
+        )
+        durations = np.diff(boundaries) / 1000
+        estimated_segments = max(len(durations), 1)
+        
         with col2:
-            st.markdown("### 📈 Estimación de Resultado")
-            estimated_segments = calculate_estimated_segments(audio_info['duration_seconds'], interval)
+            st.markdown("### 📈 Vista Previa de la División")
             est_size_per_segment = audio_info['file_size_mb'] / estimated_segments
             
-            st.write(f"**🧩 Segmentos estimados:** {estimated_segments}")
-            st.write(f"**📏 Duración por segmento:** ~{interval} minutos")
+            st.write(f"**🧩 Segmentos:** {len(durations)}")
+            if len(durations):
+                st.write(f"**📏 Duración por segmento:** {format_duration(durations.min())} – "
+                         f"{format_duration(durations.max())}")
             st.write(f"**💾 Tamaño por segmento:** ~{est_size_per_segment:.2f} MB")
             st.write(f"**📦 Tamaño ZIP estimado:** ~{audio_info['file_size_mb'] * 0.9:.2f} MB")
         
+        with st.expander("✂️ Puntos de corte", expanded=False):
+            interval_s = interval * 60
+            for i, (start_ms, end_ms) in enumerate(zip(boundaries, boundaries[1:]), 1):
+                # Un corte antes del intervalo completo cae en un silencio
+                in_silence = end_ms < boundaries[-1] and (end_ms - start_ms) / 1000 < interval_s
+                st.write(f"**{i}.** {format_duration(start_ms / 1000)} → {format_duration(end_ms / 1000)} "
+                         f"({format_duration((end_ms - start_ms) / 1000)})" + (" · 🔇 en silencio" if in_silence else ""))
+        
         # Botón de procesamiento
         if st.button("✂️ Dividir Audio", type="primary", use_container_width=True):
             try:
@@ -371,6 +417,8 @@ def main():
                     # Procesar audio
                     start_time = time.time()
                     segments_info = []
+                    metrics = JobMetrics(page='recortar_audio', name=uploaded_file.name)
+                    st.session_state.job_metrics = metrics
                     
                     processor = divide_audio_advanced(
                         temp_file_path,
@@ -380,7 +428,9 @@ def main():
                         silence_thresh_adjustment=silence_thresh_adj,
                         #fade_duration=fade_duration,
                         output_format=output_format,
-                        output_quality=output_quality
+                        output_quality=output_quality,
+                        metrics=metrics,
+                        boundaries=boundaries
                     )
                     
                     # Actualizar progreso
@@ -435,7 +485,8 @@ def main():
         
         with col1:
             try:
-                zip_data = create_zip_advanced(segments_info, include_metadata)
+                with track(st.session_state.job_metrics, 'zip_descarga'):
+                    zip_data = create_zip_advanced(segments_info, include_metadata)
                 
                 st.download_button(
                     label="📥 Descargar Todos los Segmentos (ZIP)",
@@ -451,9 +502,18 @@ def main():
             if st.button("🔄 Nuevo Procesamiento"):
                 st.session_state.processing_complete = False
                 st.session_state.segments_info = []
+                st.session_state.job_metrics = None
                 cleanup_temp_files()
                 st.rerun()
         
+        st.caption("💡 Para transcribir la grabación completa no hace falta descargar y volver a subir los "
+                   "segmentos: el modo *Audio extenso* de la página Audio a Texto aplica los mismos cortes en "
+                   "silencio y transcribe los fragmentos en paralelo.")
+        
+        # El trabajo se cierra tras generar el primer ZIP de descarga
+        if st.session_state.job_metrics is not None:
+            st.session_state.job_metrics.finish()
+        
         # Lista detallada de segmentos
         with st.expander("📋 Detalle de Segmentos", expanded=False):
             for i, segment in enumerate(segments_info, 1):
@@ -495,6 +555,8 @@ def main():
             - **Duración mínima**: Evita cortes en pausas muy breves
             - **Formatos de salida**: Elige según tu necesidad final
             """)
+    
+    render_metrics_panel(st.session_state.job_metrics)
 
 if __name__ == "__main__":
     main()
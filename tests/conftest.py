@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Cada prueba con su propia VOICEWISE_CACHE_DIR: nada se comparte con la caché real"""
+    path = tmp_path / 'voicewise_cache'
+    monkeypatch.setenv('VOICEWISE_CACHE_DIR', str(path))
+    return path
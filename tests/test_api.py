@@ -0,0 +1,96 @@
+import json
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+from tornado.testing import AsyncHTTPTestCase
+
+from voicewise.api import DONE, ApiFile, JobManager, make_app
+from voicewise.checkpoint import TranscriptionCheckpoints
+from voicewise.compute import ComputeGovernor
+
+
+class ApiTest(AsyncHTTPTestCase):
+    def get_app(self):
+        self.manager = JobManager(workers=1)
+        return make_app(self.manager)
+
+    def finished_job(self, files):
+        job = self.manager.new_job('lote.zip', ['robo'], 'es', 'whisper')
+        job.files = files
+        job.state = DONE
+        job.finished_at = 1.0
+        return job
+
+    def test_list_jobs(self):
+        first = self.manager.new_job('uno.mp3', [], 'es', 'whisper')
+        second = self.manager.new_job('dos.zip', [], 'es', 'whisper')
+        assert self.manager.list() == [first, second]
+        body = json.loads(self.fetch('/v1/jobs').body)
+        assert [job['id'] for job in body['jobs']] == [first.id, second.id]
+
+    def test_segments_rejects_invalid_from(self):
+        job = self.finished_job([])
+        job.emit(0, [{'start': 0.0, 'end': 1.0, 'text': ' hola'}, {'start': 1.0, 'end': 2.0, 'text': ' robo'}])
+        for value in ('abc', '1.5', '-1'):
+            response = self.fetch(f'/v1/jobs/{job.id}/segments?from={value}')
+            assert response.code == 400
+            assert 'from' in json.loads(response.body)['error']
+        lines = self.fetch(f'/v1/jobs/{job.id}/segments?from=1').body.decode().splitlines()
+        assert [json.loads(line)['text'] for line in lines] == [' robo']
+
+    def test_result_file_selection(self):
+        ok = ApiFile('uno.mp3', text=' hola', segments=[{'start': 0.0, 'end': 1.0, 'text': ' hola'}])
+        broken = ApiFile('dos.mp3', error='audio ilegible')
+        job = self.finished_job([ok, broken])
+
+        assert self.fetch(f'/v1/jobs/{job.id}/result.txt?file=0').body.decode() == 'hola'
+        response = self.fetch(f'/v1/jobs/{job.id}/result.srt?file=1')
+        assert response.code == 422
+        assert json.loads(response.body)['error'] == 'dos.mp3: audio ilegible'
+        for value in ('2', '-1', 'x'):
+            assert self.fetch(f'/v1/jobs/{job.id}/result.srt?file={value}').code == 404
+        # Sin ?file se omiten los archivos con error
+        files = json.loads(self.fetch(f'/v1/jobs/{job.id}/result.json').body)['files']
+        assert [f['filename'] for f in files] == ['uno.mp3']
+
+
+class SteppedEngine:
+    """Motor de prueba que entrega cada segmento y espera a que el test lo vea publicado"""
+    model_size = 'base'
+
+    def __init__(self, job):
+        self.job = job
+        self.published = []
+
+    def transcribe(self, audio, language, verbose, on_segment=None):
+        segments = [{'start': float(i), 'end': i + 1.0, 'text': f' parte {i}', 'tokens': [i]} for i in range(3)]
+        for segment in segments:
+            on_segment(dict(segment))
+            self.published.append(len(self.job.segments))
+        return {'text': ''.join(s['text'] for s in segments), 'segments': segments}
+
+
+def test_segments_are_published_as_they_are_decoded(monkeypatch, tmp_path):
+    governor = ComputeGovernor(1)
+    monkeypatch.setattr('voicewise.compute.get_governor', lambda: governor)
+    # whisper solo se usa para leer el audio del archivo
+    fake_whisper = SimpleNamespace(load_audio=lambda path: np.zeros(16000 * 3, dtype=np.float32),
+                                   audio=SimpleNamespace(SAMPLE_RATE=16000))
+    monkeypatch.setitem(sys.modules, 'whisper', fake_whisper)
+
+    manager = JobManager(workers=1)
+    job = manager.new_job('uno.wav', ['parte 2'], 'es', 'whisper')
+    with open(job.upload_path, 'wb') as f:
+        f.write(b'audio')
+    engine = SteppedEngine(job)
+    checkpoints = TranscriptionCheckpoints('whisper', 'base', 'es')
+    manager._transcribe_file(job, engine, checkpoints, job.upload_path, job.filename, None)
+
+    # Cada segmento estaba en el flujo del trabajo antes de decodificar el siguiente
+    assert engine.published == [1, 2, 3]
+    entry, = job.files
+    assert entry.error is None
+    assert entry.segments == [{'id': i, 'start': float(i), 'end': i + 1.0, 'text': f' parte {i}'} for i in range(3)]
+    assert entry.found_keywords == ['parte 2']
+    assert [segment['file'] for segment in job.segments] == [0, 0, 0]
@@ -0,0 +1,18 @@
+from voicewise import channels
+
+
+def test_channel_count_is_probed_once_per_audio(monkeypatch, tmp_path):
+    probed = []
+
+    def probe(path):
+        probed.append(path)
+        return 2
+
+    monkeypatch.setattr(channels, 'probe_channels', probe)
+    first, second = str(tmp_path / 'a.wav'), str(tmp_path / 'b.wav')
+    # Cada rerun escribe el audio en un temporal nuevo; el hash es el mismo
+    assert channels.cached_channel_count(first, 'hash1') == 2
+    assert channels.cached_channel_count(second, 'hash1') == 2
+    assert probed == [first]
+    assert channels.cached_channel_count(second, 'hash2') == 2
+    assert probed == [first, second]
@@ -0,0 +1,55 @@
+from voicewise.checkpoint import TranscriptionCheckpoints, plan_batch
+
+RESULT = {
+    'text': 'hola mundo', 'language': 'es', 'language_probability': 0.98, 'duration': 4.0,
+    'processing_time': 1.5, 'error': None, 'found_keywords': ['hola'],
+    'segments': [{'start': 0.0, 'end': 2.0, 'text': ' hola', 'tokens': [1, 2]},
+                 {'id': 7, 'start': 2.0, 'end': 4.0, 'text': ' mundo'}],
+}
+
+
+def test_checkpoint_round_trip_keeps_only_what_outputs_need():
+    checkpoints = TranscriptionCheckpoints('whisper', 'base', 'es')
+    assert checkpoints.get('abc') is None
+    checkpoints.save('abc', RESULT)
+    assert checkpoints.get('abc') == {
+        'text': 'hola mundo', 'language': 'es', 'language_probability': 0.98, 'duration': 4.0,
+        'processing_time': 1.5,
+        'segments': [{'id': 0, 'start': 0.0, 'end': 2.0, 'text': ' hola'},
+                     {'id': 7, 'start': 2.0, 'end': 4.0, 'text': ' mundo'}],
+    }
+
+
+def test_checkpoints_are_separated_by_configuration():
+    TranscriptionCheckpoints('whisper', 'base', 'es').save('abc', RESULT)
+    assert TranscriptionCheckpoints('whisper', 'base', 'es').get('abc') is not None
+    assert TranscriptionCheckpoints('whisper', 'base', 'en').get('abc') is None
+    assert TranscriptionCheckpoints('whisper', 'small', 'es').get('abc') is None
+    assert TranscriptionCheckpoints('faster_whisper', 'base', 'es').get('abc') is None
+    assert TranscriptionCheckpoints('whisper', 'base', 'es', 'hp80').get('abc') is None
+
+
+def test_plan_batch_without_checkpoints():
+    plan = plan_batch(['a', 'b', 'a', 'c', 'b'], None)
+    assert plan.hashes == ['a', 'b', 'a', 'c', 'b']
+    assert plan.pending == [0, 1, 3]
+    assert plan.duplicates == {2: 0, 4: 1}
+    assert plan.resumed == {}
+    assert plan.skipped == 2
+
+
+def test_plan_batch_resumes_checkpointed_audio():
+    checkpoints = TranscriptionCheckpoints('whisper', 'base', 'es')
+    checkpoints.save('b', RESULT)
+    plan = plan_batch(['a', 'b', 'c', 'b', 'a'], checkpoints)
+    assert plan.pending == [0, 2]
+    assert list(plan.resumed) == [1]
+    assert plan.resumed[1]['text'] == 'hola mundo'
+    # Los duplicados apuntan al primer audio igual, esté reanudado o pendiente
+    assert plan.duplicates == {3: 1, 4: 0}
+    assert plan.skipped == 3
+
+
+def test_plan_batch_empty():
+    plan = plan_batch([], TranscriptionCheckpoints('whisper', 'base', 'es'))
+    assert (plan.pending, plan.resumed, plan.duplicates, plan.skipped) == ([], {}, {}, 0)
@@ -0,0 +1,50 @@
+import numpy as np
+
+from voicewise.checkpoint import TranscriptionCheckpoints, plan_batch
+from voicewise.diarization import cached_speaker_turns, label_result, missing_speaker_turns, speaker_turns
+
+SR = 16000
+
+
+def two_speaker_audio(turn_seconds: float = 3.0, turns: int = 8) -> np.ndarray:
+    """Dos 'voces' armónicas con fundamental y timbre distintos que se alternan"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(turn_seconds * SR)) / SR
+    voices = [
+        sum(np.sin(2 * np.pi * 110 * k * t) / k for k in range(1, 12)),
+        sum(np.sin(2 * np.pi * 260 * k * t) / k ** 0.5 for k in range(1, 5)),
+    ]
+    audio = np.concatenate([voices[n % 2] * 0.1 + rng.normal(0, 0.002, len(t)) for n in range(turns)])
+    return audio.astype(np.float32)
+
+
+def test_resumed_checkpoint_gets_speakers_once_diarized():
+    audio = two_speaker_audio()
+    checkpoints = TranscriptionCheckpoints('whisper', 'base', 'es')
+    checkpoints.save('a', {
+        'text': ' uno dos', 'language': 'es', 'duration': len(audio) / SR, 'processing_time': 3.0,
+        'segments': [{'start': 0.5, 'end': 2.5, 'text': ' uno'}, {'start': 3.5, 'end': 5.5, 'text': ' dos'}],
+    })
+    speaker_turns(two_speaker_audio(turns=4), SR, 'b', 2)
+
+    plan = plan_batch(['a', 'b', 'c'], checkpoints)
+    assert list(plan.resumed) == [0]
+    # El reanudado no tiene hablantes en caché: la página lo decodifica en vez de darlo por terminado
+    assert missing_speaker_turns({i: h for i, h in enumerate(plan.hashes)}, 2) == [0, 2]
+    assert missing_speaker_turns({i: plan.hashes[i] for i in plan.resumed}, 2) == [0]
+    assert label_result(plan.resumed[0], cached_speaker_turns('a', 2)) is plan.resumed[0]
+
+    # Lo que hace decode_stage con el audio decodificado
+    turns = speaker_turns(audio, SR, 'a', 2)
+    assert turns.speakers == 2
+    assert missing_speaker_turns({i: plan.hashes[i] for i in plan.resumed}, 2) == []
+
+    labeled = label_result(plan.resumed[0], cached_speaker_turns('a', 2))
+    assert [segment['speaker'] for segment in labeled['segments']] == ['Hablante 1', 'Hablante 2']
+    assert labeled['text'] == '[Hablante 1] uno\n[Hablante 2] dos'
+
+
+def test_missing_speaker_turns_depends_on_max_speakers():
+    speaker_turns(two_speaker_audio(turns=4), SR, 'a', 2)
+    assert missing_speaker_turns({0: 'a'}, 2) == []
+    assert missing_speaker_turns({0: 'a'}, 4) == [0]
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from voicewise.export import _keyword_columns, file_rows, keyword_column, segment_rows
+
+SRT = """1
+00:00:00,000 --> 00:00:02,000
+Reportan un ROBO en la tienda
+
+2
+00:00:02,000 --> 00:00:04,500
+¿Robo? No, fue un hurto
+"""
+
+
+def result(srt_path, found_keywords):
+    return SimpleNamespace(filename='llamada.mp3', srt_path=srt_path, language='es', language_probability=0.9,
+                           transcription='texto', found_keywords=found_keywords, duration=4.5,
+                           processing_time=1.0, word_count=10, hits=[], triage_stopped_at=None)
+
+
+def test_keyword_column():
+    assert keyword_column(' Robo a Mano Armada ') == 'kw_robo_a_mano_armada'
+    assert keyword_column('niño-ñandú') == 'kw_niño_ñandú'
+
+
+def test_keyword_columns_deduplicate_and_suffix_collisions():
+    columns = _keyword_columns(['robo', 'Robo ', 'robo!', '¿robo?', 'hurto', '', '  ', None])
+    assert columns == {'kw_robo': 'robo', 'kw_robo_2': 'robo!', 'kw_robo_3': '¿robo?', 'kw_hurto': 'hurto'}
+    # Un término cuyo nombre ya coincide con un sufijo generado tampoco se pisa
+    assert _keyword_columns(['a b', 'a-b', 'a_b_2']) == {'kw_a_b': 'a b', 'kw_a_b_2': 'a-b', 'kw_a_b_2_2': 'a_b_2'}
+
+
+def test_rows_keep_a_column_per_distinct_term(tmp_path):
+    srt_path = tmp_path / 'llamada.srt'
+    srt_path.write_text(SRT, encoding='utf-8')
+    keywords = ['robo', 'ROBO', '¿robo?', 'hurto']
+    rows = list(segment_rows([result(str(srt_path), ['ROBO', 'hurto'])], keywords))
+    assert [(row['kw_robo'], row['kw_robo_2'], row['kw_hurto'], row['has_keyword']) for row in rows] == [
+        (True, False, False, True),
+        (True, True, True, True),
+    ]
+
+    row, = file_rows([result(str(srt_path), ['ROBO', 'hurto'])], keywords)
+    assert (row['kw_robo'], row['kw_robo_2'], row['kw_hurto']) == (True, False, True)
@@ -0,0 +1,98 @@
+import numpy as np
+
+from voicewise.cache import JsonCache
+from voicewise.incremental import BLOCK_SECONDS, IncrementalIndex, block_fingerprints, plan_incremental, raw_block_fingerprints, stitch
+from voicewise.preprocess import PreprocessSettings, preprocess
+
+SR = 16000
+
+
+def noise(seconds: float, seed: int) -> np.ndarray:
+    return (np.random.default_rng(seed).normal(0, 0.05, int(seconds * SR))).astype(np.float32)
+
+
+def result(*spans):
+    return {'language': 'es', 'segments': [{'start': a, 'end': b, 'text': f' {a}-{b}'} for a, b in spans]}
+
+
+def test_raw_fingerprints_keep_the_prefix_after_appending():
+    recording = noise(70, 1)
+    grown = np.concatenate([recording, noise(40, 2) * 4])   # lo añadido suena más fuerte
+    assert block_fingerprints(grown)[:2] == block_fingerprints(recording)[:2]
+    # Con normalización la ganancia depende de todo el archivo: el prefijo deja de coincidir
+    settings = PreprocessSettings()
+    processed = [block_fingerprints(preprocess(audio, SR, settings))[0] for audio in (recording, grown)]
+    assert processed[0] != processed[1]
+
+
+def test_raw_block_fingerprints_are_cached_by_hash():
+    calls = []
+
+    def decode():
+        calls.append(1)
+        return noise(65, 3)
+
+    first = raw_block_fingerprints('abc', decode)
+    assert first == block_fingerprints(noise(65, 3))
+    assert raw_block_fingerprints('abc', decode) == first
+    assert len(calls) == 1
+
+
+def test_growing_recording_reuses_prefix_and_replaces_old_version():
+    index = IncrementalIndex('whisper', 'base', 'es')
+    day1 = noise(75, 10)
+    day2 = np.concatenate([day1, noise(50, 11)])
+    index.save(block_fingerprints(day1), result((0, 20), (20, 58), (58, 75)))
+
+    fingerprints = block_fingerprints(day2)
+    plan = plan_incremental(index.lookup(fingerprints), fingerprints)
+    # Bloques 0 y 1 idénticos: se conservan los segmentos que terminan antes de 60 s - margen
+    assert [s['end'] for s in plan.reused] == [20, 58]
+    assert plan.resume_at == 58
+    stitched = stitch(plan, result((0, 10), (10, 67)))
+    assert [(s['start'], s['end']) for s in stitched['segments']] == [(0, 20), (20, 58), (58, 68), (68, 125)]
+
+    index.save(fingerprints, stitched)
+    assert len(JsonCache('incremental').get(index._key(fingerprints))) == 1
+    assert plan_incremental(index.lookup(fingerprints), fingerprints).complete
+
+
+def test_recordings_with_a_shared_intro_do_not_collide():
+    index = IncrementalIndex('whisper', 'base', 'es')
+    intro = noise(BLOCK_SECONDS, 20)
+    first = np.concatenate([intro, noise(45, 21)])
+    second = np.concatenate([intro, noise(45, 22)])
+    index.save(block_fingerprints(first), result((0, 29), (29, 75)))
+    index.save(block_fingerprints(second), result((0, 29), (29, 50), (50, 75)))
+
+    for audio, segments in ((first, 2), (second, 3)):
+        fingerprints = block_fingerprints(audio)
+        plan = plan_incremental(index.lookup(fingerprints), fingerprints)
+        assert plan.complete
+        assert len(plan.reused) == segments
+
+    # Una tercera grabación con la misma locución reutiliza solo lo que cae en el bloque común
+    third = block_fingerprints(np.concatenate([intro, noise(10, 23)]))
+    plan = plan_incremental(index.lookup(third), third)
+    assert not plan.complete
+    assert [s['end'] for s in plan.reused] == [29] and plan.resume_at == 29
+
+
+def test_versions_per_first_block_are_bounded():
+    index = IncrementalIndex('whisper', 'base', 'es')
+    intro = noise(BLOCK_SECONDS, 30)
+    for seed in range(20):
+        index.save(block_fingerprints(np.concatenate([intro, noise(40, 100 + seed)])), result((0, 29)))
+    assert len(JsonCache('incremental').get(index._key(block_fingerprints(intro)))) == 16
+
+
+def test_lookup_reads_the_single_version_format():
+    index = IncrementalIndex('whisper', 'base', 'es')
+    fingerprints = block_fingerprints(noise(40, 40))
+    JsonCache('incremental').set(index._key(fingerprints), {
+        'blocks': fingerprints, 'block_seconds': BLOCK_SECONDS, 'language': 'es',
+        'language_probability': None, 'segments': [{'start': 0, 'end': 10, 'text': ' hola'}],
+    })
+    assert plan_incremental(index.lookup(fingerprints), fingerprints).complete
+    index.save(fingerprints, result((0, 12)))
+    assert index.lookup(fingerprints)['segments'][0]['end'] == 12
@@ -0,0 +1,37 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from reportlab.platypus import Paragraph
+
+from voicewise.pdf import build_pdf, institution_header, logo_image, report_footer, report_styles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    # Los logos se buscan con rutas relativas, como al ejecutar la app desde la raíz
+    monkeypatch.chdir(ROOT)
+
+
+def test_logo_image_is_a_new_flowable_per_call():
+    first = logo_image('logo_instituto.png', 100, 50)
+    second = logo_image('logo_instituto.png', 100, 50)
+    assert first is not None and second is not None
+    assert first is not second
+    assert (first.drawWidth, first.drawHeight) == (100, 50)
+    assert logo_image('no_existe.png', 100, 50) is None
+
+
+def test_concurrent_builds_with_logos():
+    def build(n: int) -> bytes:
+        styles = report_styles()
+        flowables = list(institution_header())
+        flowables += [Paragraph(f'Reporte {n}, párrafo {i}', styles.normal) for i in range(200)]
+        flowables += list(report_footer())
+        return build_pdf(flowables, f'Reporte {n}')
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        pdfs = list(pool.map(build, range(8)))
+    assert all(pdf.startswith(b'%PDF') for pdf in pdfs)
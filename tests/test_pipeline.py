@@ -0,0 +1,149 @@
+import threading
+import time
+
+from voicewise.pipeline import BatchPipeline
+
+
+def run(pipeline):
+    return list(pipeline)
+
+
+def test_single_worker_keeps_dispatch_order():
+    pipeline = BatchPipeline(
+        ['a', 'b', 'c', 'd'],
+        decode=str.upper,
+        infer=lambda audio, worker: {'text': audio * 2},
+        write=lambda item: item.result['text'] + '!',
+        order=[2, 0, 3, 1]
+    )
+    items = run(pipeline)
+    assert [item.index for item in items] == [2, 0, 3, 1]
+    assert [item.output for item in items] == ['CC!', 'AA!', 'DD!', 'BB!']
+    assert all(item.error is None and item.audio is None for item in items)
+
+
+def test_multiple_workers_return_every_item_once():
+    pipeline = BatchPipeline(
+        range(20),
+        decode=lambda n: n,
+        infer=lambda audio, worker: time.sleep(0.001 * (audio % 3)) or {'value': audio * 10},
+        write=lambda item: item.result['value'],
+        workers=3
+    )
+    items = run(pipeline)
+    assert sorted(item.index for item in items) == list(range(20))
+    assert all(item.output == item.index * 10 for item in items)
+    assert {item.worker for item in items} <= {0, 1, 2}
+
+
+def test_assignment_routes_items_to_their_worker():
+    assignment = [1, 0, 1, 1, 0]
+    pipeline = BatchPipeline(
+        range(5),
+        decode=lambda n: n,
+        infer=lambda audio, worker: {'worker': worker},
+        write=lambda item: item.result['worker'],
+        workers=2,
+        assignment=assignment
+    )
+    items = run(pipeline)
+    assert {item.index: item.output for item in items} == dict(enumerate(assignment))
+    # Cada worker recibe sus archivos en el orden de despacho
+    for worker in (0, 1):
+        assert [i.index for i in items if i.worker == worker] == [n for n in range(5) if assignment[n] == worker]
+
+
+def test_busy_worker_does_not_block_decoding_for_others():
+    # Worker 0 tiene tres archivos y se queda ocupado con el primero; el archivo del
+    # worker 1 va detrás en el orden y tiene que decodificarse igualmente
+    released = threading.Event()
+    waited = []
+
+    def infer(audio, worker):
+        if worker == 0 and audio == 0:
+            waited.append(released.wait(timeout=5))
+        if worker == 1:
+            released.set()
+        return {}
+
+    pipeline = BatchPipeline(
+        range(4),
+        decode=lambda n: n,
+        infer=infer,
+        write=lambda item: item.index,
+        prefetch=1,
+        workers=2,
+        assignment=[0, 0, 0, 1]
+    )
+    items = run(pipeline)
+    assert waited == [True]
+    assert sorted(item.index for item in items) == [0, 1, 2, 3]
+
+
+def test_errors_are_reported_per_item():
+    def decode(n):
+        if n == 1:
+            raise ValueError('ffmpeg falló')
+        return n
+
+    def infer(audio, worker):
+        if audio == 2:
+            raise RuntimeError('sin memoria')
+        if audio == 3:
+            return {'error': 'audio vacío'}
+        return {'text': str(audio)}
+
+    def write(item):
+        if item.index == 4:
+            raise OSError('disco lleno')
+        return item.result['text']
+
+    inferred = []
+    pipeline = BatchPipeline(range(6), decode=decode, write=write,
+                             infer=lambda audio, worker: inferred.append(audio) or infer(audio, worker))
+    errors = {item.index: item.error for item in run(pipeline)}
+    assert errors == {
+        0: None,
+        1: 'Error decodificando: ffmpeg falló',
+        2: 'Error transcribiendo: sin memoria',
+        3: 'audio vacío',
+        4: 'Error guardando resultados: disco lleno',
+        5: None,
+    }
+    # Un archivo que no se pudo decodificar no llega a la inferencia
+    assert 1 not in inferred
+
+
+def test_stop_ends_the_pipeline():
+    decoded = []
+    threads = []
+
+    def decode(n):
+        decoded.append(n)
+        return n
+
+    pipeline = BatchPipeline(range(1000), decode=decode, infer=lambda audio, worker: {},
+                             write=lambda item: None, prefetch=2, workers=2, thread_hook=threads.append)
+    seen = []
+    for item in pipeline:
+        seen.append(item.index)
+        if len(seen) == 3:
+            pipeline.stop()
+    # La precarga está acotada: al parar no se decodificó el resto del lote
+    assert len(decoded) < 50
+    for thread in threads:
+        thread.join(timeout=2)
+        assert not thread.is_alive()
+
+
+def test_abandoned_iteration_stops_threads():
+    threads = []
+    pipeline = BatchPipeline(range(1000), decode=lambda n: n, infer=lambda audio, worker: {},
+                             write=lambda item: None, thread_hook=threads.append, workers=2, assignment=[0, 1] * 500)
+    iterator = iter(pipeline)
+    next(iterator)
+    iterator.close()
+    assert len(threads) == 4
+    for thread in threads:
+        thread.join(timeout=2)
+        assert not thread.is_alive()
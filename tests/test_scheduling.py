@@ -0,0 +1,135 @@
+import io
+import struct
+import wave
+import zipfile
+
+import pytest
+
+from voicewise.scheduling import EtaEstimator, _flac_duration, _mp3_duration, estimate_duration, plan_schedule
+from voicewise.zip_ingest import ZipAudioArchive
+
+
+def flac_header(sample_rate: int, total_samples: int, channels: int = 2, bits: int = 16) -> bytes:
+    packed = sample_rate << 44 | (channels - 1) << 41 | (bits - 1) << 36 | total_samples
+    streaminfo = struct.pack('>HH', 4096, 4096) + bytes(6) + packed.to_bytes(8, 'big') + bytes(16)
+    return b'fLaC' + bytes([0x80, 0, 0, 34]) + streaminfo
+
+
+def mp3_frame(xing_frames: int = None, mono: bool = False) -> bytes:
+    # MPEG 1 capa III, 128 kbps, 44,1 kHz
+    header = bytes([0xFF, 0xFB, 0x90, 0xC0 if mono else 0x00])
+    side_info = bytes(17 if mono else 32)
+    if xing_frames is None:
+        return header + side_info + bytes(380)
+    return header + side_info + b'Xing' + struct.pack('>II', 0x01, xing_frames) + bytes(370)
+
+
+def wav_bytes(seconds: float, rate: int = 8000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(bytes(int(seconds * rate) * 2))
+    return buffer.getvalue()
+
+
+def test_flac_duration():
+    assert _flac_duration(flac_header(44100, 44100 * 90)) == 90.0
+    assert _flac_duration(flac_header(16000, (1 << 33) + 8000, channels=1)) == ((1 << 33) + 8000) / 16000
+    assert _flac_duration(flac_header(0, 1000)) is None
+    assert _flac_duration(b'RIFF' + bytes(40)) is None
+    assert _flac_duration(b'fLaC') is None
+
+
+def test_mp3_duration_cbr_from_bitrate():
+    frame = mp3_frame()
+    estimate = _mp3_duration(frame, 16000 * 60)
+    assert not estimate.exact
+    assert estimate.seconds == pytest.approx(60.0)
+
+
+def test_mp3_duration_xing_and_id3():
+    id3 = b'ID3' + bytes([3, 0, 0, 0, 0, 1, 0]) + bytes(128)   # tamaño syncsafe 0x80 = 128
+    estimate = _mp3_duration(id3 + mp3_frame(xing_frames=1000), 10 ** 6)
+    assert estimate.exact
+    assert estimate.seconds == pytest.approx(1000 * 1152 / 44100)
+
+    mono = _mp3_duration(mp3_frame(xing_frames=500, mono=True), 10 ** 6)
+    assert mono.exact and mono.seconds == pytest.approx(500 * 1152 / 44100)
+
+
+def test_mp3_duration_skips_garbage_and_invalid_frames():
+    # Sincronía con capa I (no III) y después una trama válida
+    header = b'\x00' * 7 + bytes([0xFF, 0xFF, 0x90, 0x00]) + mp3_frame()
+    estimate = _mp3_duration(header, 16000 * 10 + 11)
+    assert estimate.seconds == pytest.approx(10.0)
+    assert _mp3_duration(bytes(512), 1000) is None
+    # ID3 que dice ocupar más que la cabecera leída
+    assert _mp3_duration(b'ID3' + bytes([3, 0, 0, 0x7F, 0x7F, 0x7F, 0x7F]) + bytes(100), 1000) is None
+
+
+def test_estimate_duration_from_zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        zf.writestr('uno.wav', wav_bytes(2.5))
+        zf.writestr('dos.flac', flac_header(48000, 48000 * 30) + bytes(1000))
+        zf.writestr('tres.mp3', mp3_frame() + bytes(16000 * 4 - 416))
+        zf.writestr('cuatro.m4a', bytes(16000 * 5))
+        zf.writestr('roto.wav', b'RIFF' + bytes(20))
+    buffer.seek(0)
+    archive = ZipAudioArchive(buffer)
+    estimates = {m.filename: estimate_duration(archive, m) for m in archive.members}
+
+    assert estimates['uno.wav'].exact and estimates['uno.wav'].seconds == 2.5
+    assert estimates['dos.flac'].exact and estimates['dos.flac'].seconds == 30.0
+    assert not estimates['tres.mp3'].exact and estimates['tres.mp3'].seconds == pytest.approx(4.0)
+    # Sin cabecera útil: tamaño y bitrate típico
+    assert not estimates['cuatro.m4a'].exact and estimates['cuatro.m4a'].seconds == 5.0
+    assert not estimates['roto.wav'].exact and estimates['roto.wav'].seconds == 24 * 8 / 256000
+
+
+def test_plan_schedule_natural_and_longest_first():
+    durations = [10.0, 50.0, 20.0, 40.0]
+    natural = plan_schedule(durations, workers=2, strategy='natural')
+    assert natural.order == [0, 1, 2, 3]
+    assert natural.assignment is None
+    assert natural.makespan == 70.0    # 0 y 2 → 30; 1 → 50; 3 al worker libre a los 30 → 70
+
+    longest = plan_schedule(durations, workers=2, strategy='longest_first')
+    assert longest.order == [1, 3, 2, 0]
+    assert longest.assignment is None
+    assert longest.makespan == 60.0
+
+
+def test_plan_schedule_bin_packing():
+    durations = [30.0, 10.0, 25.0, 20.0, 15.0]
+    schedule = plan_schedule(durations, workers=2, strategy='bin_packing')
+    # LPT: 30 → w0, 25 → w1, 20 → w1 (45), 15 → w0 (45), 10 → w0 (55)
+    assert schedule.assignment == [0, 0, 1, 1, 0]
+    assert schedule.makespan == 55.0
+    # Orden de despacho por el momento en que empieza cada archivo en su worker
+    assert schedule.order == [0, 2, 3, 4, 1]
+    assert sorted(schedule.order) == list(range(len(durations)))
+
+
+def test_plan_schedule_edge_cases():
+    assert plan_schedule([], workers=4).order == []
+    assert plan_schedule([], workers=4).makespan == 0.0
+    single = plan_schedule([5.0, 1.0, 3.0], workers=0)
+    assert single.order == [0, 2, 1]
+    assert single.makespan == 9.0
+    # Empates: el orden estable conserva el orden natural
+    assert plan_schedule([5.0, 5.0, 5.0]).order == [0, 1, 2]
+
+
+def test_eta_estimator():
+    eta = EtaEstimator(total_audio_seconds=300, workers=2)
+    assert eta.real_time_factor is None
+    assert eta.remaining_seconds() is None
+    eta.update(audio_seconds=100, processing_seconds=50, estimated_seconds=120)
+    assert eta.real_time_factor == 0.5
+    assert eta.remaining_audio == 180
+    assert eta.remaining_seconds() == 45
+    eta.update(audio_seconds=400, processing_seconds=200)
+    assert eta.remaining_seconds() == 0
@@ -0,0 +1,96 @@
+from voicewise.segments import SegmentStore, format_srt_time, timestamp_to_seconds
+
+SRT = """1
+00:00:00,000 --> 00:00:02,500
+Buenos días, le habla el agente
+
+2
+00:00:02,500 --> 00:01:05,120
+Quiero denunciar un robo
+
+3
+00:01:05,120 --> 01:00:00,001
+Gracias, línea uno
+línea dos
+"""
+
+
+def test_timestamp_round_trip():
+    for stamp in ['00:00:00,000', '00:01:02,500', '01:00:00,001', '10:59:59,999']:
+        assert format_srt_time(timestamp_to_seconds(stamp)) == stamp
+
+
+def test_srt_round_trip():
+    store = SegmentStore.from_srt_text(SRT)
+    assert len(store) == 3
+    assert store.indices.tolist() == [1, 2, 3]
+    assert store.starts.tolist() == [0.0, 2.5, 65.12]
+    assert store[2].text == 'Gracias, línea uno\nlínea dos'
+    assert store.to_srt() == SRT
+    assert SegmentStore.from_srt_text(store.to_srt()).to_srt() == SRT
+
+
+def test_srt_skips_malformed_blocks():
+    content = "1\nno es una marca\ntexto\n\nx\n00:00:01,000 --> 00:00:02,000\ntexto\n\n" + SRT
+    assert SegmentStore.from_srt_text(content).to_srt() == SRT
+
+
+def test_bytes_round_trip():
+    store = SegmentStore.from_srt_text(SRT, ['robo'])
+    restored = SegmentStore.from_bytes(store.to_bytes())
+    assert restored.to_srt() == SRT
+    assert restored.keywords == ('robo',)
+    assert restored.hit_positions().tolist() == [1]
+
+
+def test_speaker_prefix_parsing():
+    labeled = SegmentStore.from_segments([
+        {'start': 0, 'end': 2, 'text': ' Hola', 'speaker': 'Agente'},
+        {'start': 2, 'end': 5, 'text': ' Buenas tardes', 'speaker': 'Cliente'},
+        {'start': 5, 'end': 6, 'text': ' [Música] sigue', 'speaker': 'Agente'},
+    ]).to_srt()
+    assert '[Cliente] Buenas tardes' in labeled
+
+    store = SegmentStore.from_srt_text(labeled)
+    assert [segment.speaker for segment in store] == ['Agente', 'Cliente', 'Agente']
+    assert store.text_at(2) == '[Música] sigue'
+    assert store.labels == ('Agente', 'Cliente')
+    assert store.speaker_positions(['Agente']).tolist() == [0, 2]
+    assert store.speaker_seconds() == {'Agente': 3.0, 'Cliente': 3.0}
+    assert store.to_srt() == labeled
+
+
+def test_speaker_prefix_requires_every_segment():
+    # Un '[Música]' suelto de Whisper no convierte la transcripción en una con hablantes
+    store = SegmentStore.from_srt_text("1\n00:00:00,000 --> 00:00:01,000\n[Música] intro\n\n"
+                                       "2\n00:00:01,000 --> 00:00:02,000\nHola\n")
+    assert store.labels == ()
+    assert store[0].speaker is None
+    assert store.text_at(0) == '[Música] intro'
+
+
+def test_between():
+    store = SegmentStore.from_columns(
+        [1, 2, 3, 4], [0.0, 5.0, 6.0, 20.0], [10.0, 6.0, 8.0, 25.0], ['a', 'b', 'c', 'd']
+    )
+    assert store.between(0, 1).tolist() == [0]
+    # El primer segmento es largo: sigue solapando aunque los siguientes terminen antes
+    assert store.between(7, 9).tolist() == [0, 1, 2]
+    assert store.between(8, 20).tolist() == [0, 1, 2]
+    assert store.between(10, 20).tolist() == []
+    assert store.between(10, 20.5).tolist() == [3]
+    assert store.between(30, 40).tolist() == []
+    assert SegmentStore.from_columns([], [], [], []).between(0, 10).tolist() == []
+
+
+def test_hit_positions():
+    texts = ['sin nada', 'un ROBO armado', 'otra cosa', 'drogas y robo'] + ['relleno'] * 6
+    store = SegmentStore.from_columns(range(1, 11), range(10), range(1, 11), texts, ['robo', ' drogas ', ''])
+    assert store.hit_positions().tolist() == [1, 3]
+    assert store.miss_positions().tolist() == [0, 2, 4, 5, 6, 7, 8, 9]
+    assert [store.is_hit(p) for p in range(len(store))] == store.hit_mask.tolist()
+
+    rekeyed = store.with_keywords(['relleno'])
+    assert rekeyed.hit_positions().tolist() == list(range(4, 10))
+    assert rekeyed.buffer is store.buffer
+    assert store.with_keywords([]).hit_positions().tolist() == []
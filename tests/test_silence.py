@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+from pydub import AudioSegment, silence
+
+from voicewise.silence import build_silence_map, cut_points, silent_ranges
+
+RATE = 16000
+
+
+def burst(ms: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (0.5 * rng.uniform(-1.0, 1.0, ms * RATE // 1000)).astype(np.float32)
+
+
+def quiet(ms: int) -> np.ndarray:
+    return np.zeros(ms * RATE // 1000, dtype=np.float32)
+
+
+def to_segment(samples: np.ndarray) -> AudioSegment:
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    return AudioSegment(pcm.tobytes(), frame_rate=RATE, sample_width=2, channels=1)
+
+
+def old_cut_points(audio: AudioSegment, interval_ms: int, min_silence_len: int = 1000,
+                   silence_thresh_adjustment: int = 16):
+    """Regla anterior de la página 3, con pydub.silence.detect_silence sobre cada fragmento"""
+    silence_thresh = audio.dBFS - silence_thresh_adjustment
+    total = len(audio)
+    boundaries = [0]
+    start = 0
+    while start < total:
+        end = min(start + interval_ms, total)
+        segment = audio[start:end]
+        if end < total:
+            ranges = silence.detect_silence(segment, min_silence_len=min_silence_len, silence_thresh=silence_thresh)
+            for silence_start, _ in reversed(ranges):
+                if silence_start >= len(segment) - 30 * 1000:
+                    end = start + silence_start
+                    break
+        boundaries.append(end)
+        start = end
+    return boundaries
+
+
+def assert_same_cuts(samples, interval_ms, **kwargs):
+    new = cut_points(build_silence_map(samples, RATE), interval_ms, **kwargs)
+    old = old_cut_points(to_segment(samples), interval_ms, **kwargs)
+    assert len(new) == len(old)
+    # pydub busca con pasos de 1 ms y el mapa con tramas de 10 ms
+    assert np.abs(np.array(new) - np.array(old)).max() <= 10
+    assert new[-1] == old[-1]
+    return new
+
+
+def test_silence_map_frames_and_loudness():
+    samples = np.concatenate([burst(1000), quiet(1005)])
+    smap = build_silence_map(samples, RATE)
+    assert smap.duration_ms == 2005
+    # La última trama incompleta (5 ms) también cuenta
+    assert len(smap.energy) == 201
+    assert smap.energy[100:].max() == 0
+    assert smap.dbfs == pytest.approx(to_segment(samples).dBFS, abs=0.05)
+
+
+def test_silent_ranges_match_pydub():
+    samples = np.concatenate([burst(3000), quiet(1500), burst(2000, 1), quiet(800), burst(1000, 2), quiet(2000)])
+    audio = to_segment(samples)
+    thresh = audio.dBFS - 16
+    ranges = silent_ranges(build_silence_map(samples, RATE), 1000, thresh)
+    expected = silence.detect_silence(audio, min_silence_len=1000, silence_thresh=thresh)
+    assert len(ranges) == len(expected) == 2
+    for (start, end), (old_start, old_end) in zip(ranges, expected):
+        assert abs(start - old_start) <= 10 and abs(end - old_end) <= 10
+
+
+def test_cut_points_without_silence():
+    samples = burst(100_000)
+    smap = build_silence_map(samples, RATE)
+    assert cut_points(smap, 40_000) == [0, 40_000, 80_000, 100_000]
+    assert assert_same_cuts(samples, 40_000) == [0, 40_000, 80_000, 100_000]
+    assert cut_points(smap, 40_000, silence_detection=False) == [0, 40_000, 80_000, 100_000]
+
+
+def test_cut_points_move_to_last_silence_in_window():
+    samples = np.concatenate([burst(20_000), quiet(2000), burst(10_000, 1), quiet(1500),
+                              burst(40_000, 2), quiet(1200), burst(30_000, 3)])
+    cuts = assert_same_cuts(samples, 45_000)
+    # El primer corte cae en el segundo silencio (a los 32 s), no en el primero; la ventana
+    # ya queda bajo el umbral unos ms antes porque la energía es un promedio
+    assert 31_900 <= cuts[1] <= 32_000
+    # Un silencio fuera de los 30 s finales del fragmento no adelanta el corte
+    assert_same_cuts(samples, 60_000)
+
+
+def test_cut_points_with_silence_at_start():
+    samples = np.concatenate([quiet(5000), burst(50_000), quiet(1500), burst(30_000, 1)])
+    assert_same_cuts(samples, 60_000)
+    # Con fragmentos de 30 s o menos el silencio inicial cae en la ventana de búsqueda:
+    # la regla anterior se quedaba en un bucle infinito; ahora el corte se ignora
+    cuts = cut_points(build_silence_map(samples, RATE), 20_000)
+    assert cuts[:2] == [0, 20_000]
+    assert all(b > a for a, b in zip(cuts, cuts[1:]))
+
+
+def test_final_chunk_shorter_than_minimum_silence():
+    samples = np.concatenate([burst(40_000), quiet(1500), burst(40_000, 1), quiet(300)])
+    cuts = assert_same_cuts(samples, 41_000)
+    assert cuts[-1] == 81_800
+    # El último fragmento no pasa por la detección aunque termine en silencio
+    assert cuts[-1] - cuts[-2] < 41_000
+
+
+def test_short_audio_and_empty_map():
+    samples = np.concatenate([burst(600), quiet(300)])
+    smap = build_silence_map(samples, RATE)
+    assert silent_ranges(smap, 1000, -16) == []
+    assert cut_points(smap, 60_000) == [0, 900]
+    assert cut_points(build_silence_map(np.zeros(0, dtype=np.float32), RATE), 60_000) == [0]
@@ -0,0 +1,74 @@
+import sys
+import threading
+
+import pytest
+
+from voicewise.streaming import _clock_to_seconds, capture_verbose_segments, stream_transcription
+
+
+@pytest.fixture(autouse=True)
+def restore_stdout(monkeypatch):
+    # capture_verbose_segments instala un sys.stdout enrutado por hilo; se deshace al terminar
+    monkeypatch.setattr(sys, 'stdout', sys.stdout)
+
+
+def test_clock_to_seconds():
+    assert _clock_to_seconds('00:01.000') == 1.0
+    assert _clock_to_seconds('02:03.500') == 123.5
+    assert _clock_to_seconds('1:02:03.250') == 3723.25
+
+
+def test_capture_parses_whisper_verbose_lines(capsys):
+    segments = []
+    with capture_verbose_segments(segments.append):
+        # Formato de whisper.transcribe(verbose=True), con escrituras partidas como las de print
+        print("Detecting language using up to the first 30 seconds.")
+        print("[00:00.000 --> 00:04.500]  Buenos días, le habla el agente")
+        sys.stdout.write("[00:04.500 --> 01:02:03.250]")
+        sys.stdout.write(" Quiero denunciar un robo\n[99:59.999 --> 100:00.000]  ")
+        print("sin texto extra")
+        print("[00:10.000 --> 00:12.000]")
+        print("no es un segmento [00:01.000 --> 00:02.000] hola")
+    print("fuera de la captura")
+
+    assert segments == [
+        {'id': 0, 'start': 0.0, 'end': 4.5, 'text': ' Buenos días, le habla el agente'},
+        {'id': 1, 'start': 4.5, 'end': 3723.25, 'text': ' Quiero denunciar un robo'},
+        {'id': 2, 'start': 5999.999, 'end': 6000.0, 'text': ' sin texto extra'},
+        {'id': 3, 'start': 10.0, 'end': 12.0, 'text': ' '},
+    ]
+    # Nada de lo capturado llega a la consola; lo de después, sí
+    assert capsys.readouterr().out == "fuera de la captura\n"
+
+
+def test_capture_only_affects_its_own_thread(capsys):
+    segments = []
+    started, release = threading.Event(), threading.Event()
+
+    def other_thread():
+        started.wait()
+        print("[00:00.000 --> 00:01.000] de otro hilo")
+        release.set()
+
+    thread = threading.Thread(target=other_thread)
+    thread.start()
+    with capture_verbose_segments(segments.append):
+        started.set()
+        release.wait(timeout=5)
+        print("[00:01.000 --> 00:02.000] propio")
+    thread.join()
+
+    assert [segment['text'] for segment in segments] == [' propio']
+    assert "de otro hilo" in capsys.readouterr().out
+
+
+def test_stream_transcription_delivers_segments_in_order():
+    def transcribe(on_segment):
+        for i in range(5):
+            on_segment({'start': float(i), 'end': i + 1.0, 'text': str(i)})
+        return {'text': 'fin'}
+
+    batches = []
+    assert stream_transcription(transcribe, batches.append) == {'text': 'fin'}
+    assert [segment['text'] for batch in batches for segment in batch] == ['0', '1', '2', '3', '4']
+    assert all(batches)
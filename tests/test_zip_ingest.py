@@ -0,0 +1,104 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from voicewise import zip_ingest
+from voicewise.cache import file_sha256
+from voicewise.zip_ingest import ZipAudioArchive, ZipSecurityError, is_safe_member_name
+
+
+def make_zip(entries, compression=zipfile.ZIP_STORED) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression) as zf:
+        for name, data in entries:
+            zf.writestr(zipfile.ZipInfo(name), data, compress_type=compression)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize('name, safe', [
+    ('audio.wav', True),
+    ('carpeta/sub/audio.mp3', True),
+    ('../audio.wav', False),
+    ('carpeta/../../audio.wav', False),
+    ('..\\audio.wav', False),
+    ('/etc/audio.wav', False),
+    ('\\\\servidor\\audio.wav', False),
+    ('C:/audio.wav', False),
+    ('c:audio.wav', False),
+    ('.', False),
+])
+def test_is_safe_member_name(name, safe):
+    assert is_safe_member_name(name) is safe
+
+
+def test_scan_lists_audio_and_rejects_traversal():
+    archive = ZipAudioArchive(make_zip([
+        ('llamadas/uno.wav', b'RIFF1'),
+        ('llamadas/DOS.MP3', b'ID3'),
+        ('../fuera.wav', b'x'),
+        ('/absoluta.flac', b'x'),
+        ('__MACOSX/llamadas/._uno.wav', b'x'),
+        ('llamadas/._tres.wav', b'x'),
+        ('notas.txt', b'texto'),
+        ('llamadas/', b''),
+    ]))
+    assert [(m.name, m.filename) for m in archive.members] == [
+        ('llamadas/uno.wav', 'uno.wav'), ('llamadas/DOS.MP3', 'DOS.MP3')
+    ]
+    assert archive.rejected == [('../fuera.wav', 'ruta no permitida'), ('/absoluta.flac', 'ruta no permitida')]
+
+
+def test_extract_writes_outside_zip_paths(tmp_path):
+    archive = ZipAudioArchive(make_zip([('a/b/uno.wav', b'RIFF' + bytes(100))]))
+    member, = archive.members
+    path = archive.extract(member, str(tmp_path))
+    assert os.path.dirname(path) == str(tmp_path)
+    assert path.endswith('.wav')
+    with open(path, 'rb') as f:
+        assert f.read() == b'RIFF' + bytes(100)
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_member_size_limit(tmp_path):
+    archive = ZipAudioArchive(make_zip([('grande.wav', bytes(2048)), ('chico.wav', bytes(10))]),
+                              max_member_bytes=1024)
+    assert [m.filename for m in archive.members] == ['chico.wav']
+    assert archive.rejected == [('grande.wav', 'tamaño descomprimido excesivo')]
+
+    # El límite también se aplica al leer, por si el tamaño declarado miente
+    archive = ZipAudioArchive(make_zip([('grande.wav', bytes(2048))]))
+    archive.max_member_bytes = 1024
+    with pytest.raises(ZipSecurityError):
+        archive.extract(archive.members[0], str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_total_size_and_member_count_limits():
+    entries = [(f'{n}.wav', bytes(600)) for n in range(3)]
+    with pytest.raises(ZipSecurityError):
+        ZipAudioArchive(make_zip(entries), max_total_bytes=1000)
+    with pytest.raises(ZipSecurityError):
+        ZipAudioArchive(make_zip(entries), max_members=2)
+    assert len(ZipAudioArchive(make_zip(entries), max_members=3, max_total_bytes=1800).members) == 3
+
+
+def test_compression_ratio(monkeypatch):
+    entries = [('silencio.wav', bytes(200_000)), ('ruido.wav', os.urandom(200_000))]
+    # Por debajo del umbral de tamaño el ratio no se comprueba
+    archive = ZipAudioArchive(make_zip(entries, zipfile.ZIP_DEFLATED))
+    assert len(archive.members) == 2
+
+    monkeypatch.setattr(zip_ingest, 'RATIO_CHECK_MIN_BYTES', 1000)
+    archive = ZipAudioArchive(make_zip(entries, zipfile.ZIP_DEFLATED))
+    assert [m.filename for m in archive.members] == ['ruido.wav']
+    assert archive.rejected == [('silencio.wav', 'ratio de compresión sospechoso')]
+
+
+def test_member_sha256_matches_extracted_file(tmp_path):
+    data = os.urandom(3 * 1024 * 1024 + 7)
+    archive = ZipAudioArchive(make_zip([('uno.flac', data)], zipfile.ZIP_DEFLATED))
+    member, = archive.members
+    assert archive.member_sha256(member) == file_sha256(archive.extract(member, str(tmp_path)))
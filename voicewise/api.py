@@ -0,0 +1,512 @@
+"""
+API HTTP local de transcripción.
+
+Servidor asíncrono (tornado, que ya viene con Streamlit) que comparte con la
+interfaz el registro de motores, el gobernador de cómputo y las cachés. Las
+conexiones se atienden en un único bucle de eventos; la inferencia corre en
+un pool acotado de workers (VOICEWISE_API_WORKERS, por defecto 1), cada uno
+con su propia instancia del modelo y pidiendo turno al gobernador como
+cualquier sesión de la interfaz.
+
+    POST /v1/jobs?filename=audio.mp3&keywords=robo,drogas&language=es   (cuerpo: el audio o un ZIP)
+    GET  /v1/jobs/<id>                      estado y progreso
+    GET  /v1/jobs/<id>/segments?from=0      segmentos en JSON Lines a medida que se producen
+    GET  /v1/jobs/<id>/result.txt|srt|json|pdf[?file=N]
+    GET  /v1/health
+
+Se activa con VOICEWISE_API_PORT desde las páginas, o de forma independiente con
+`python -m voicewise.api --port 8600`. VOICEWISE_API_TOKEN exige la cabecera
+`Authorization: Bearer <token>`; VOICEWISE_API_HOST (por defecto 127.0.0.1)
+define la interfaz de escucha.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import streamlit as st
+import tornado.httpserver
+import tornado.iostream
+import tornado.web
+
+from voicewise.backends import DEFAULT_BACKEND, available_backends
+from voicewise.cache import cache_dir, file_sha256
+from voicewise.checkpoint import TranscriptionCheckpoints
+from voicewise.compute import compute_slot, get_governor
+from voicewise.language import LANGUAGE_OPTIONS, resolve_language
+from voicewise.metrics import JobMetrics, track
+from voicewise.registry import MODEL_SIZE, get_engine
+from voicewise.reporting import build_report, render_pdf
+from voicewise.srt import segments_to_srt
+from voicewise.zip_ingest import AUDIO_EXTENSIONS, ZipAudioArchive
+
+API_INSTANCE_BASE = 100         # instancias de modelo propias, separadas de las de la interfaz
+MAX_UPLOAD_BYTES = 4 * 1024 ** 3
+RETENTION_SECONDS = 24 * 3600
+_POLL_SECONDS = 0.5
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'error'
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, '')))
+    except ValueError:
+        return default
+
+
+@dataclass
+class ApiFile:
+    filename: str
+    text: str = ''
+    segments: List[Dict] = field(default_factory=list)
+    language: Optional[str] = None
+    language_probability: Optional[float] = None
+    duration: float = 0.0
+    processing_time: float = 0.0
+    found_keywords: List[str] = field(default_factory=list)
+    srt_path: Optional[str] = None
+    error: Optional[str] = None
+
+    # Atributos que espera voicewise.reporting.build_report
+    @property
+    def transcription(self) -> str:
+        return self.text
+
+    @property
+    def word_count(self) -> int:
+        return len(self.text.split())
+
+    def as_dict(self, with_segments: bool = True) -> Dict:
+        data = {
+            'filename': self.filename,
+            'language': self.language,
+            'language_probability': self.language_probability,
+            'duration': self.duration,
+            'processing_time': self.processing_time,
+            'found_keywords': self.found_keywords,
+            'error': self.error,
+        }
+        if with_segments:
+            data['text'] = self.text
+            data['segments'] = self.segments
+        return data
+
+
+@dataclass
+class ApiJob:
+    id: str
+    filename: str
+    upload_path: str
+    work_dir: str
+    keywords: List[str]
+    language: str
+    backend: str
+    is_zip: bool
+    state: str = QUEUED
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    total_files: Optional[int] = None
+    files: List[ApiFile] = field(default_factory=list)
+    # Flujo de segmentos de todos los archivos, en orden; solo se añade al final
+    segments: List[Dict] = field(default_factory=list)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED)
+
+    def emit(self, file_index: int, segments: List[Dict]):
+        self.segments.extend(dict(segment, file=file_index) for segment in segments)
+
+    def as_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'state': self.state,
+            'error': self.error,
+            'language': self.language,
+            'backend': self.backend,
+            'keywords': self.keywords,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'total_files': self.total_files,
+            'completed_files': len([f for f in self.files if f.srt_path or f.error]),
+            'segments': len(self.segments),
+            'files': [f.as_dict(with_segments=False) for f in self.files],
+        }
+
+
+class JobManager:
+    """Cola de trabajos de la API con un pool acotado de workers de inferencia"""
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or _env_int('VOICEWISE_API_WORKERS', 1)
+        self._instances = itertools.count(API_INSTANCE_BASE)
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='voicewise-api',
+                                            initializer=self._init_worker)
+        self._jobs: Dict[str, ApiJob] = {}
+        self._lock = threading.Lock()
+
+    def _init_worker(self):
+        self._local.instance = next(self._instances)
+
+    def new_job(self, filename: str, keywords: List[str], language: str, backend: str) -> ApiJob:
+        self.prune()
+        job_id = uuid.uuid4().hex[:12]
+        work_dir = os.path.join(cache_dir('api'), job_id)
+        os.makedirs(work_dir, exist_ok=True)
+        suffix = os.path.splitext(filename)[1].lower()
+        job = ApiJob(job_id, filename, os.path.join(work_dir, 'upload' + suffix), work_dir,
+                     keywords, language, backend, is_zip=suffix == '.zip')
+        with self._lock:
+            self._jobs[job_id] = job
+        return job
+
+    def submit(self, job: ApiJob):
+        self._executor.submit(self._run, job)
+
+    def get(self, job_id: str) -> Optional[ApiJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[ApiJob]:
+        """Trabajos conocidos, en orden de creación"""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def discard(self, job: ApiJob):
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        shutil.rmtree(job.work_dir, ignore_errors=True)
+
+    def prune(self):
+        """Olvidar los trabajos terminados hace más de RETENTION_SECONDS"""
+        limit = time.time() - RETENTION_SECONDS
+        with self._lock:
+            expired = [job for job in self._jobs.values() if job.finished_at and job.finished_at < limit]
+        for job in expired:
+            self.discard(job)
+
+    def snapshot(self) -> Dict:
+        states = [job.state for job in self.list()]
+        return {state: states.count(state) for state in (QUEUED, RUNNING, DONE, FAILED)}
+
+    def _run(self, job: ApiJob):
+        job.state = RUNNING
+        metrics = JobMetrics(page='api', name=job.filename)
+        try:
+            engine = get_engine(job.backend, self._local.instance)
+            checkpoints = TranscriptionCheckpoints(job.backend, MODEL_SIZE, job.language)
+            if job.is_zip:
+                with open(job.upload_path, 'rb') as f:
+                    archive = ZipAudioArchive(f)
+                    job.total_files = len(archive.members)
+                    for member in archive.members:
+                        path = None
+                        try:
+                            with track(metrics, 'extraccion_zip'):
+                                path = archive.extract(member, job.work_dir)
+                            self._transcribe_file(job, engine, checkpoints, path, member.filename, metrics)
+                        finally:
+                            if path and os.path.exists(path):
+                                os.remove(path)
+            else:
+                job.total_files = 1
+                self._transcribe_file(job, engine, checkpoints, job.upload_path, job.filename, metrics)
+            job.state = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.state = FAILED
+        finally:
+            job.finished_at = time.time()
+            if os.path.exists(job.upload_path):
+                os.remove(job.upload_path)
+            metrics.finish()
+
+    def _transcribe_file(self, job: ApiJob, engine, checkpoints: TranscriptionCheckpoints, path: str,
+                         filename: str, metrics: JobMetrics):
+        import whisper
+
+        entry = ApiFile(filename)
+        job.files.append(entry)
+        file_index = len(job.files) - 1
+        try:
+            file_hash = file_sha256(path)
+            cached = checkpoints.get(file_hash)
+            if cached is not None:
+                job.emit(file_index, cached['segments'])
+                result = cached
+            else:
+                start = time.time()
+                with track(metrics, 'decodificacion'):
+                    audio = whisper.load_audio(path)
+                detection = resolve_language(engine, audio, job.language, file_hash)
+                # Turno del gobernador, pero con la instancia propia del worker de la API: no la
+                # comparte ningún turno de la interfaz. Cada segmento se publica al decodificarse
+                with compute_slot(None, metrics):
+                    with track(metrics, 'inferencia'):
+                        transcription = engine.transcribe(
+                            audio=audio, language=detection.language, verbose=False,
+                            on_segment=lambda segment: job.emit(file_index, [segment])
+                        )
+                segments = [
+                    {'id': i, 'start': float(segment['start']), 'end': float(segment['end']), 'text': segment['text']}
+                    for i, segment in enumerate(transcription['segments'])
+                ]
+                result = dict(text=transcription['text'], segments=segments)
+                result.update(
+                    language=detection.language,
+                    language_probability=detection.probability,
+                    duration=len(audio) / whisper.audio.SAMPLE_RATE,
+                    processing_time=time.time() - start
+                )
+                checkpoints.save(file_hash, result)
+        except Exception as e:
+            entry.error = str(e)
+            if not job.is_zip:
+                raise
+            return
+
+        entry.text = result.get('text', '')
+        entry.segments = result['segments']
+        entry.language = result.get('language')
+        entry.language_probability = result.get('language_probability')
+        entry.duration = result.get('duration') or 0.0
+        entry.processing_time = result.get('processing_time') or 0.0
+        text_lower = entry.text.lower()
+        entry.found_keywords = [k for k in job.keywords if k.strip() and k.lower().strip() in text_lower]
+        entry.srt_path = os.path.join(job.work_dir, f"{file_index:04d}.srt")
+        with open(entry.srt_path, 'w', encoding='utf-8') as f:
+            f.write(segments_to_srt(entry.segments))
+
+
+# ______________________________ HTTP ______________________________
+
+class _BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, manager: JobManager):
+        self.manager = manager
+
+    def prepare(self):
+        token = os.environ.get('VOICEWISE_API_TOKEN')
+        if token and self.request.headers.get('Authorization') != f'Bearer {token}':
+            raise tornado.web.HTTPError(401)
+
+    def write_error(self, status_code: int, **kwargs):
+        self.set_header('Content-Type', 'application/json')
+        message = self._reason
+        if 'exc_info' in kwargs and isinstance(kwargs['exc_info'][1], tornado.web.HTTPError):
+            message = kwargs['exc_info'][1].log_message or message
+        self.finish({'error': message})
+
+    def job_or_404(self, job_id: str) -> ApiJob:
+        job = self.manager.get(job_id)
+        if job is None:
+            raise tornado.web.HTTPError(404, 'Trabajo no encontrado')
+        return job
+
+
+@tornado.web.stream_request_body
+class JobsHandler(_BaseHandler):
+    """POST: el cuerpo se escribe a disco por bloques a medida que llega"""
+
+    def prepare(self):
+        super().prepare()
+        self._file = None
+        self.job = None
+        if self.request.method != 'POST':
+            return
+        filename = os.path.basename(self.get_query_argument('filename', '').replace('\\', '/'))
+        if not filename.lower().endswith(AUDIO_EXTENSIONS + ('.zip',)):
+            raise tornado.web.HTTPError(400, 'filename debe terminar en una extensión de audio o .zip')
+        language = self.get_query_argument('language', 'es')
+        if language not in LANGUAGE_OPTIONS:
+            raise tornado.web.HTTPError(400, f'Idioma no soportado: {language}')
+        backend = self.get_query_argument('backend', DEFAULT_BACKEND)
+        if backend not in available_backends():
+            raise tornado.web.HTTPError(400, f'Motor no disponible: {backend}')
+        keywords = [k.strip() for k in self.get_query_argument('keywords', '').split(',') if k.strip()]
+
+        self.request.connection.set_max_body_size(MAX_UPLOAD_BYTES)
+        self.job = self.manager.new_job(filename, keywords, language, backend)
+        self._file = open(self.job.upload_path, 'wb')
+
+    def data_received(self, chunk: bytes):
+        if self._file is not None:
+            self._file.write(chunk)
+
+    def post(self):
+        self._file.close()
+        self._file = None
+        self.manager.submit(self.job)
+        self.set_status(202)
+        self.finish(self.job.as_dict())
+
+    def get(self):
+        self.finish({'jobs': [job.as_dict() for job in self.manager.list()]})
+
+    def on_connection_close(self):
+        # Subida interrumpida: el trabajo nunca llegó a la cola
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self.manager.discard(self.job)
+
+
+class JobHandler(_BaseHandler):
+    def get(self, job_id: str):
+        self.finish(self.job_or_404(job_id).as_dict())
+
+
+class SegmentsHandler(_BaseHandler):
+    """Segmentos en JSON Lines; la respuesta sigue abierta hasta que el trabajo termina"""
+
+    async def get(self, job_id: str):
+        job = self.job_or_404(job_id)
+        try:
+            position = int(self.get_query_argument('from', '0'))
+        except ValueError:
+            position = -1
+        if position < 0:
+            raise tornado.web.HTTPError(400, 'from debe ser un entero no negativo')
+        self.set_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.set_header('Cache-Control', 'no-cache')
+        try:
+            while True:
+                finished = job.finished
+                available = len(job.segments)
+                if available > position:
+                    self.write(''.join(json.dumps(segment, ensure_ascii=False) + '\n'
+                                       for segment in job.segments[position:available]))
+                    position = available
+                    await self.flush()
+                if finished and position >= len(job.segments):
+                    break
+                await asyncio.sleep(_POLL_SECONDS)
+        except tornado.iostream.StreamClosedError:
+            return
+        self.finish()
+
+
+class ResultHandler(_BaseHandler):
+    async def get(self, job_id: str, fmt: str):
+        job = self.job_or_404(job_id)
+        if not job.finished:
+            raise tornado.web.HTTPError(409, f'El trabajo está en estado {job.state}')
+        if job.state == FAILED:
+            raise tornado.web.HTTPError(422, job.error)
+
+        files = [f for f in job.files if f.error is None]
+        selected = self.get_query_argument('file', None)
+        if selected is not None:
+            try:
+                index = int(selected)
+                if index < 0:
+                    raise IndexError(index)
+                entry = job.files[index]
+            except (ValueError, IndexError):
+                raise tornado.web.HTTPError(404, 'Archivo no encontrado en el trabajo')
+            if entry.error is not None:
+                raise tornado.web.HTTPError(422, f'{entry.filename}: {entry.error}')
+            files = [entry]
+
+        base = os.path.splitext(job.filename)[0]
+        if fmt == 'json':
+            self.finish({'job': job.as_dict(), 'files': [f.as_dict() for f in files]})
+            return
+        if fmt == 'txt':
+            body = '\n\n'.join(f.text.strip() if len(files) == 1 else f"# {f.filename}\n{f.text.strip()}"
+                               for f in files)
+            self.set_header('Content-Type', 'text/plain; charset=utf-8')
+        elif fmt == 'srt':
+            if len(files) != 1:
+                raise tornado.web.HTTPError(400, 'Para un ZIP indica el archivo con ?file=N')
+            body = segments_to_srt(files[0].segments)
+            self.set_header('Content-Type', 'application/x-subrip; charset=utf-8')
+        else:
+            report = build_report(files, job.keywords, title=f"Reporte de Transcripción - {job.filename}",
+                                  single=len(files) == 1 and not job.is_zip)
+            # La maquetación es CPU: fuera del bucle de eventos
+            body = await asyncio.get_running_loop().run_in_executor(None, render_pdf, report)
+            self.set_header('Content-Type', 'application/pdf')
+        self.set_header('Content-Disposition', f'attachment; filename="{base}.{fmt}"')
+        self.finish(body)
+
+
+class HealthHandler(_BaseHandler):
+    def get(self):
+        self.finish({'status': 'ok', 'jobs': self.manager.snapshot(), 'compute': get_governor().snapshot(),
+                     'api_workers': self.manager.workers})
+
+
+def make_app(manager: JobManager) -> tornado.web.Application:
+    args = dict(manager=manager)
+    return tornado.web.Application([
+        (r'/v1/health', HealthHandler, args),
+        (r'/v1/jobs', JobsHandler, args),
+        (r'/v1/jobs/([0-9a-f]+)', JobHandler, args),
+        (r'/v1/jobs/([0-9a-f]+)/segments', SegmentsHandler, args),
+        (r'/v1/jobs/([0-9a-f]+)/result\.(txt|srt|json|pdf)', ResultHandler, args),
+    ])
+
+
+def serve(port: int, host: str = None, manager: JobManager = None) -> tornado.httpserver.HTTPServer:
+    """Crear el servidor en el bucle de eventos actual"""
+    server = tornado.httpserver.HTTPServer(make_app(manager or JobManager()), max_body_size=MAX_UPLOAD_BYTES)
+    server.listen(port, address=host or os.environ.get('VOICEWISE_API_HOST', '127.0.0.1'))
+    return server
+
+
+@st.cache_resource
+def start_api_server() -> Optional[int]:
+    """Levantar la API una sola vez por proceso si VOICEWISE_API_PORT está definido"""
+    port = os.environ.get('VOICEWISE_API_PORT')
+    if not port:
+        return None
+    started = threading.Event()
+    failed = []
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            serve(int(port))
+        except (OSError, ValueError) as e:
+            failed.append(e)
+            started.set()
+            return
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True, name='voicewise-api').start()
+    started.wait(timeout=5)
+    return None if failed else int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API HTTP de transcripción de VoiceWise AI')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('VOICEWISE_API_PORT') or 8600))
+    parser.add_argument('--host', default=None)
+    parser.add_argument('--workers', type=int, default=None, help='Transcripciones simultáneas de la API')
+    args = parser.parse_args()
+
+    async def run():
+        serve(args.port, args.host, JobManager(args.workers))
+        print(f"API de VoiceWise escuchando en el puerto {args.port}")
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Motores de inferencia intercambiables.
+
+Todos exponen `transcribe(audio=..., language=..., verbose=..., on_segment=...)`
+y `detect_language(audio)`. La transcripción devuelve el mismo diccionario que
+openai-whisper: `text`, `segments` (con `start`, `end` y `text`) y
+`language`. Así las páginas pueden elegir el motor por trabajo sin cambiar
+el resto del flujo.
+
+- whisper: modelo de referencia PyTorch en float32.
+- whisper_int8: el mismo modelo con cuantización dinámica int8 de las capas
+  lineales (solo CPU, sin dependencias extra).
+- faster_whisper: motor CTranslate2 int8 (requiere `pip install faster-whisper`).
+"""
+import importlib.util
+from typing import Callable, Dict, Optional, Tuple
+
+BACKENDS = {
+    'whisper': 'OpenAI Whisper (float32)',
+    'whisper_int8': 'Whisper cuantizado int8 (CPU)',
+    'faster_whisper': 'faster-whisper / CTranslate2 (int8)',
+}
+
+DEFAULT_BACKEND = 'whisper'
+
+
+def available_backends() -> Dict[str, str]:
+    """Motores utilizables con las dependencias instaladas"""
+    backends = dict(BACKENDS)
+    if importlib.util.find_spec('faster_whisper') is None:
+        backends.pop('faster_whisper')
+    return backends
+
+
+def quantize_whisper_model(model):
+    """Cuantizar dinámicamente a int8 las capas lineales de un modelo Whisper en CPU"""
+    import torch
+    import whisper.model
+
+    # whisper.model.Linear solo añade un cast de dtype en forward; en CPU/float32 es
+    # equivalente a nn.Linear, que es el tipo que reconoce quantize_dynamic.
+    for module in model.modules():
+        if isinstance(module, whisper.model.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class WhisperBackend:
+    """openai-whisper, opcionalmente cuantizado a int8"""
+
+    def __init__(self, model_size: str = 'base', quantize: bool = False):
+        import whisper
+
+        self.name = 'whisper_int8' if quantize else 'whisper'
+        self.model_size = model_size
+        self.quantized = quantize
+        if quantize:
+            self.model = quantize_whisper_model(whisper.load_model(model_size, device='cpu'))
+        else:
+            self.model = whisper.load_model(model_size)
+
+    def transcribe(self, audio, language: Optional[str] = 'es', verbose: Optional[bool] = False,
+                   on_segment: Callable[[Dict], None] = None, **options) -> Dict:
+        if self.quantized:
+            options.setdefault('fp16', False)
+        if on_segment is None:
+            return self.model.transcribe(audio=audio, language=language, verbose=verbose, **options)
+        # whisper no tiene callback por segmento: con verbose=True los imprime en cuanto los decodifica
+        from voicewise.streaming import capture_verbose_segments
+
+        with capture_verbose_segments(on_segment):
+            return self.model.transcribe(audio=audio, language=language, verbose=True, **options)
+
+    def detect_language(self, audio) -> Tuple[str, float]:
+        """Idioma más probable según la primera ventana de 30 s"""
+        import whisper
+
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=self.model.dims.n_mels)
+        _, probs = self.model.detect_language(mel.to(self.model.device))
+        language = max(probs, key=probs.get)
+        return language, float(probs[language])
+
+
+class FasterWhisperBackend:
+    """CTranslate2 vía faster-whisper"""
+
+    def __init__(self, model_size: str = 'base', compute_type: str = 'int8'):
+        from faster_whisper import WhisperModel
+
+        self.name = 'faster_whisper'
+        self.model_size = model_size
+        self.model = WhisperModel(model_size, device='cpu', compute_type=compute_type)
+
+    def transcribe(self, audio, language: Optional[str] = 'es', verbose: Optional[bool] = False,
+                   on_segment: Callable[[Dict], None] = None, **options) -> Dict:
+        segments_iter, info = self.model.transcribe(audio, language=language, **options)
+        segments = []
+        for i, segment in enumerate(segments_iter):
+            segments.append({'id': i, 'start': segment.start, 'end': segment.end, 'text': segment.text})
+            if on_segment is not None:
+                on_segment(dict(segments[-1]))
+            if verbose:
+                print(f"[{segment.start:.2f} --> {segment.end:.2f}] {segment.text}")
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': info.language,
+        }
+
+    def detect_language(self, audio) -> Tuple[str, float]:
+        """Idioma más probable según la primera ventana de 30 s"""
+        if not isinstance(audio, str):
+            audio = audio[:30 * 16000]
+        # transcribe detecta el idioma al llamarse; los segmentos son un generador que no se consume
+        _, info = self.model.transcribe(audio, language=None)
+        return info.language, float(info.language_probability)
+
+
+def load_backend(name: str = DEFAULT_BACKEND, model_size: str = 'base'):
+    """Instanciar un motor de inferencia por nombre"""
+    if name == 'whisper':
+        return WhisperBackend(model_size)
+    if name == 'whisper_int8':
+        return WhisperBackend(model_size, quantize=True)
+    if name == 'faster_whisper':
+        return FasterWhisperBackend(model_size)
+    raise ValueError(f"Motor de inferencia desconocido: {name}")
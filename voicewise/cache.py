@@ -0,0 +1,61 @@
+"""
+Caché en disco compartida por las páginas.
+
+Los resultados derivados del contenido de un audio (idioma detectado, audio
+preprocesado, locutores…) se guardan por hash del archivo en
+VOICEWISE_CACHE_DIR (por defecto un directorio en la carpeta temporal del
+sistema), así se reutilizan entre sesiones y reinicios.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Optional
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def cache_dir(namespace: str = '') -> str:
+    """Directorio de caché (creado si no existe) para un espacio de nombres"""
+    root = os.environ.get('VOICEWISE_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'voicewise_cache')
+    path = os.path.join(root, namespace) if namespace else root
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_sha256(path: str) -> str:
+    """Hash SHA-256 del contenido de un archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JsonCache:
+    """Pequeño almacén clave -> JSON, un archivo por clave"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+
+    def _path(self, key: str) -> str:
+        return os.path.join(cache_dir(self.namespace), f'{key}.json')
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, value: Any):
+        path = self._path(key)
+        # Escritura atómica: otra sesión nunca lee un JSON a medias
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,153 @@
+"""
+Transcripción por canal de grabaciones estéreo o multicanal.
+
+En las llamadas grabadas a dos canales (agente / llamante) cada interlocutor
+va en su propio canal, pero el cargador de Whisper los mezcla en mono y la
+transcripción intercala a los dos. Aquí cada canal se decodifica como un
+flujo mono independiente, los canales se transcriben a la vez (un worker y
+un turno de cómputo por canal, con la copia del modelo de ese turno, en el
+mismo pipeline que el audio extenso) y
+los segmentos se unen por marca de tiempo con la etiqueta del canal en
+`speaker`, que llega al SRT, a las coincidencias y a los reportes.
+"""
+import heapq
+import subprocess
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from voicewise.cache import JsonCache
+from voicewise.compute import compute_slot
+from voicewise.metrics import JobMetrics, track
+from voicewise.pipeline import BatchPipeline
+from voicewise.preprocess import SAMPLE_RATE, PreprocessSettings, load_audio
+from voicewise.segments import speaker_text
+
+MAX_CHANNELS = 4
+_SILENT_DBFS = -60.0          # canal sin señal útil (p. ej. un lado de la llamada no grabado)
+_DUPLICATE_DB = -40.0         # diferencia entre canales por debajo de esto: mono duplicado
+
+
+def probe_channels(path: str) -> int:
+    """Número de canales del primer flujo de audio (1 si no se puede leer la cabecera)"""
+    try:
+        import ffmpeg
+        streams = ffmpeg.probe(path).get('streams', [])
+    except Exception:
+        return 1
+    for stream in streams:
+        if stream.get('codec_type') == 'audio':
+            return int(stream.get('channels') or 1)
+    return 1
+
+
+def cached_channel_count(path: str, file_hash: str) -> int:
+    """probe_channels una sola vez por audio: los reruns de la página leen el número guardado por hash"""
+    cache = JsonCache('canales')
+    count = cache.get(file_hash)
+    if count is None:
+        count = probe_channels(path)
+        cache.set(file_hash, count)
+    return count
+
+
+def decode_channels(path: str, channels: int, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decodificar con ffmpeg sin mezclar: un canal por fila, float32 en [-1, 1]"""
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", path,
+        "-f", "s16le", "-ac", str(channels), "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-"
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
+    samples = np.frombuffer(out, np.int16)
+    samples = samples[:len(samples) // channels * channels]
+    return samples.reshape(-1, channels).T.astype(np.float32) / 32768.0
+
+
+def load_channels(path: str, file_hash: str, channels: int, settings: Optional[PreprocessSettings] = None,
+                  metrics: Optional[JobMetrics] = None) -> np.ndarray:
+    """Canales a 16 kHz (uno por fila), preprocesados y cacheados igual que el audio mono"""
+    return load_audio(path, file_hash, settings, metrics,
+                      decode=lambda source: decode_channels(source, channels), variant=f"{channels}ch")
+
+
+def _level_db(samples: np.ndarray) -> float:
+    return 10 * np.log10(max(float(np.mean(np.square(samples, dtype=np.float64))), 1e-20))
+
+
+def active_channels(stack: np.ndarray) -> List[int]:
+    """
+    Canales que merece la pena transcribir: se descartan los silenciosos y los
+    que repiten a uno anterior (estéreo que en realidad es mono duplicado).
+    """
+    selected = []
+    for index, channel in enumerate(stack):
+        if _level_db(channel) < _SILENT_DBFS:
+            continue
+        if any(_level_db(channel - stack[other]) - _level_db(channel) < _DUPLICATE_DB for other in selected):
+            continue
+        selected.append(index)
+    return selected
+
+
+def merge_channel_results(results: Sequence[Dict], labels: Sequence[str]) -> Dict:
+    """Unir los segmentos de cada canal por marca de tiempo, con la etiqueta del canal en `speaker`"""
+    streams = [
+        [dict(segment, speaker=label) for segment in result.get('segments', [])]
+        for result, label in zip(results, labels)
+    ]
+    segments = [
+        dict(segment, id=i)
+        for i, segment in enumerate(heapq.merge(*streams, key=lambda segment: float(segment['start'])))
+    ]
+    return {
+        # Una línea por intervención para que el TXT y el reporte conserven quién habla
+        'text': speaker_text(segments),
+        'segments': segments,
+    }
+
+
+def transcribe_channels(
+    stack: np.ndarray,
+    labels: Sequence[str],
+    engine_for: Callable[[int], object],
+    language: Optional[str],
+    thread_hook: Callable = None,
+    placeholder=None,
+    metrics: Optional[JobMetrics] = None,
+    on_segment: Callable[[Dict], None] = None
+) -> Dict:
+    """
+    Transcribir cada fila de `stack` en paralelo y unir el resultado.
+    engine_for(slot) da el motor del turno de cómputo que ocupa cada canal.
+    on_segment recibe cada segmento (ya con `speaker`) desde el hilo del canal que lo decodifica.
+    """
+    def infer(channel: np.ndarray, worker: int) -> Dict:
+        def tagged(segment: Dict):
+            on_segment(dict(segment, speaker=labels[worker]))
+
+        with compute_slot(placeholder, metrics) as slot:
+            with track(metrics, 'inferencia'):
+                return engine_for(slot).transcribe(audio=channel, language=language, verbose=False,
+                                                  on_segment=tagged if on_segment is not None else None)
+
+    pipeline = BatchPipeline(
+        range(len(stack)),
+        decode=lambda index: stack[index],
+        infer=infer,
+        write=lambda item: item.result,
+        prefetch=len(stack),
+        thread_hook=thread_hook,
+        workers=len(stack),
+        # Un worker por canal: los canales avanzan a la vez, cada uno con el motor de su turno
+        assignment=list(range(len(stack)))
+    )
+    results: Dict[int, Dict] = {}
+    for item in pipeline:
+        if item.error:
+            pipeline.stop()
+            raise RuntimeError(f"Canal {labels[item.index]}: {item.error}")
+        results[item.index] = item.output
+    return merge_channel_results([results[i] for i in range(len(stack))], labels)
@@ -0,0 +1,72 @@
+"""
+Puntos de control y deduplicación de lotes.
+
+Cada transcripción terminada se guarda en la caché en disco por hash del
+contenido, motor, modelo e idioma solicitado. Antes de planificar un lote se
+calcula el hash de cada audio del ZIP: los que ya tienen punto de control no
+se vuelven a transcribir, y los audios repetidos con otro nombre se
+transcriben una sola vez. Así un lote interrumpido, o un ZIP que se solapa
+con otro anterior, solo cuesta el trabajo nuevo.
+
+El punto de control no depende de las palabras clave: las coincidencias y
+los TXT/SRT se regeneran en la etapa de escritura.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from voicewise.cache import JsonCache
+
+_CHECKPOINT_FIELDS = ('text', 'language', 'language_probability', 'duration', 'processing_time')
+
+
+class TranscriptionCheckpoints:
+    """Transcripciones terminadas por hash de audio para una configuración de motor e idioma"""
+
+    def __init__(self, backend: str, model_size: str, language: str, variant: Optional[str] = None):
+        self._cache = JsonCache('transcripciones')
+        # variant distingue transcripciones del mismo archivo con preprocesado distinto
+        self._suffix = f"{backend}_{model_size}_{language}" + (f"_{variant}" if variant else '')
+
+    def _key(self, file_hash: str) -> str:
+        return f"{file_hash}_{self._suffix}"
+
+    def get(self, file_hash: str) -> Optional[Dict]:
+        return self._cache.get(self._key(file_hash))
+
+    def save(self, file_hash: str, result: Dict):
+        """Guardar solo lo necesario para regenerar TXT, SRT y coincidencias"""
+        payload = {name: result.get(name) for name in _CHECKPOINT_FIELDS}
+        payload['segments'] = [
+            {'id': segment.get('id', i), 'start': segment['start'], 'end': segment['end'], 'text': segment['text']}
+            for i, segment in enumerate(result.get('segments', []))
+        ]
+        self._cache.set(self._key(file_hash), payload)
+
+
+@dataclass
+class BatchPlan:
+    hashes: List[str]
+    pending: List[int] = field(default_factory=list)         # índices a transcribir (uno por contenido)
+    resumed: Dict[int, Dict] = field(default_factory=dict)   # índice -> punto de control existente
+    duplicates: Dict[int, int] = field(default_factory=dict)  # índice -> índice del primer audio igual
+
+    @property
+    def skipped(self) -> int:
+        return len(self.resumed) + len(self.duplicates)
+
+
+def plan_batch(hashes: Sequence[str], checkpoints: Optional[TranscriptionCheckpoints]) -> BatchPlan:
+    """Separar los audios en pendientes, reanudados y duplicados"""
+    plan = BatchPlan(list(hashes))
+    first_index = {}
+    for index, file_hash in enumerate(hashes):
+        if file_hash in first_index:
+            plan.duplicates[index] = first_index[file_hash]
+            continue
+        first_index[file_hash] = index
+        cached = checkpoints.get(file_hash) if checkpoints is not None else None
+        if cached is not None:
+            plan.resumed[index] = cached
+        else:
+            plan.pending.append(index)
+    return plan
@@ -0,0 +1,159 @@
+"""
+Gobernador de cómputo compartido por todas las sesiones del proceso.
+
+PyTorch usa por defecto todos los núcleos en cada llamada; con varias
+sesiones transcribiendo a la vez los hilos compiten entre sí y el
+rendimiento total cae. El gobernador reparte los núcleos en un número fijo
+de turnos (slots): cada transcripción espera su turno en una cola FIFO y se
+ejecuta con `núcleos / slots` hilos intra-op. Cada turno tiene un índice
+fijo y quien lo ocupa usa la instancia del modelo con ese índice: dos
+transcripciones simultáneas nunca comparten un modelo Whisper.
+
+- VOICEWISE_MAX_CONCURRENT_TRANSCRIPTIONS: transcripciones simultáneas (por defecto núcleos / 4).
+- VOICEWISE_TORCH_THREADS: hilos intra-op por transcripción (por defecto núcleos / slots).
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import streamlit as st
+
+_POLL_SECONDS = 0.5
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.environ.get(name, '').strip()
+    try:
+        return max(1, int(value)) if value else None
+    except ValueError:
+        return None
+
+
+class ComputeGovernor:
+    """Limita las transcripciones concurrentes y los hilos de PyTorch de cada una"""
+
+    def __init__(self, max_concurrent: int = None, threads_per_slot: int = None):
+        cores = os.cpu_count() or 1
+        self.max_concurrent = max_concurrent or _env_int('VOICEWISE_MAX_CONCURRENT_TRANSCRIPTIONS') \
+            or max(1, cores // 4)
+        self.threads_per_slot = threads_per_slot or _env_int('VOICEWISE_TORCH_THREADS') \
+            or max(1, cores // self.max_concurrent)
+        self._cond = threading.Condition()
+        self._waiting = deque()
+        self._free = list(range(self.max_concurrent))     # índices de slot libres (montículo: primero el menor)
+        self._tickets = itertools.count()
+        self.apply_thread_limits()
+        try:
+            import torch
+            torch.set_num_interop_threads(1)
+        except (ImportError, RuntimeError):
+            # Sin torch, o ya se ejecutó trabajo inter-op: solo puede fijarse una vez
+            pass
+
+    def apply_thread_limits(self):
+        """Fijar los hilos intra-op en el hilo actual (OpenMP los guarda por hilo)"""
+        try:
+            import torch
+        except ImportError:
+            return
+        if torch.get_num_threads() != self.threads_per_slot:
+            torch.set_num_threads(self.threads_per_slot)
+
+    def position(self, ticket: int) -> int:
+        """Posición 1-based de un ticket en la cola (0 si ya no espera)"""
+        with self._cond:
+            try:
+                return self._waiting.index(ticket) + 1
+            except ValueError:
+                return 0
+
+    @contextmanager
+    def slot(self, on_wait: Callable[[int], None] = None):
+        """
+        Esperar turno y ejecutar el bloque dentro de un slot de cómputo; devuelve
+        el índice del slot. on_wait recibe la posición en la cola cada vez que cambia.
+        """
+        ticket = next(self._tickets)
+        last_position = None
+        index = None
+        try:
+            with self._cond:
+                self._waiting.append(ticket)
+            while True:
+                with self._cond:
+                    if self._waiting[0] == ticket and self._free:
+                        self._waiting.popleft()
+                        # El índice más bajo libre: las sesiones reutilizan los mismos modelos cargados
+                        index = heapq.heappop(self._free)
+                        break
+                    position = self._waiting.index(ticket) + 1
+                    if position == last_position:
+                        self._cond.wait(_POLL_SECONDS)
+                        continue
+                # El callback puede tocar la UI: fuera del lock
+                last_position = position
+                if on_wait is not None:
+                    on_wait(position)
+            self.apply_thread_limits()
+            yield index
+        finally:
+            with self._cond:
+                if index is not None:
+                    heapq.heappush(self._free, index)
+                elif ticket in self._waiting:
+                    # Sesión interrumpida mientras esperaba (rerun, pestaña cerrada…)
+                    self._waiting.remove(ticket)
+                self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                'active': self.max_concurrent - len(self._free),
+                'waiting': len(self._waiting),
+                'max_concurrent': self.max_concurrent,
+                'threads_per_slot': self.threads_per_slot,
+            }
+
+
+@st.cache_resource
+def get_governor() -> ComputeGovernor:
+    """Gobernador único por proceso, compartido entre sesiones"""
+    return ComputeGovernor()
+
+
+def queue_message(position: int) -> str:
+    """Texto para el usuario mientras espera turno"""
+    if position <= 1:
+        return "⏳ Servidor ocupado: tu transcripción es la siguiente en la cola"
+    return f"⏳ Servidor ocupado: tu transcripción está en la posición {position} de la cola"
+
+
+@contextmanager
+def compute_slot(placeholder=None, metrics=None):
+    """
+    Turno de cómputo para una transcripción; devuelve el índice del slot, que es
+    la instancia del motor a usar (`get_engine(backend, slot)`). Si hay que
+    esperar, muestra la posición en `placeholder` (un st.empty()) y mide la
+    espera como etapa.
+    """
+    governor = get_governor()
+    waited = {'start': None}
+
+    def on_wait(position: int):
+        if waited['start'] is None:
+            waited['start'] = time.perf_counter()
+        if placeholder is not None:
+            placeholder.info(queue_message(position))
+
+    with governor.slot(on_wait) as index:
+        if waited['start'] is not None:
+            if metrics is not None:
+                metrics.add('cola_computo', time.perf_counter() - waited['start'])
+            if placeholder is not None:
+                placeholder.empty()
+        yield index
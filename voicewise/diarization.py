@@ -0,0 +1,267 @@
+"""
+Diarización ligera en CPU: quién habla en cada segmento.
+
+Sin modelos adicionales: se calculan coeficientes cepstrales (MFCC) de todas
+las tramas de 25 ms con NumPy vectorizado, se resumen en ventanas de 1,5 s
+(media y desviación de las tramas con voz, con sumas acumuladas) y las
+ventanas se agrupan con k-means esférico, eligiendo el número de hablantes
+por silueta. El resultado (hablante por ventana) se guarda en la caché por
+hash del audio y después se alinea con los segmentos de Whisper por mayoría,
+así que cambiar de motor o de idioma no repite la diarización.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import streamlit as st
+
+from voicewise.cache import JsonCache
+from voicewise.metrics import JobMetrics, track
+from voicewise.segments import speaker_text
+
+SPEAKER_LABEL = "Hablante {}"
+DEFAULT_MAX_SPEAKERS = 4
+
+_VERSION = 1                  # cambia si cambian las características o el agrupamiento
+_FRAME = 400                  # 25 ms a 16 kHz
+_HOP = 160                    # 10 ms
+_N_FFT = 512
+_N_MELS = 40
+_N_CEPS = 20
+_CHUNK_FRAMES = 6000          # tramas por bloque vectorizado (1 min): memoria acotada en audios largos
+_WINDOW_FRAMES = 150          # 1,5 s por ventana de embedding
+_WINDOW_HOP = 75
+_MIN_VOICED = 0.3             # fracción mínima de tramas con voz para usar una ventana
+_VOICE_THRESH_DB = 30         # tramas a más de 30 dB por debajo de la más fuerte cuentan como silencio
+_MIN_SILHOUETTE = 0.15        # por debajo, se considera un único hablante
+_SPLIT_MARGIN = 0.05          # un hablante más solo si la silueta mejora al menos esto
+_SILHOUETTE_SAMPLE = 1500
+_KMEANS_ITER = 30
+
+
+@dataclass
+class SpeakerTurns:
+    """Hablante de cada ventana de análisis (centros en segundos, etiquetas 0..n-1)"""
+    times: np.ndarray
+    labels: np.ndarray
+    speakers: int
+
+    def to_json(self) -> Dict:
+        return {'times': np.round(self.times, 3).tolist(), 'labels': self.labels.tolist(), 'speakers': self.speakers}
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'SpeakerTurns':
+        return cls(np.asarray(data['times'], dtype=np.float64), np.asarray(data['labels'], dtype=np.int16),
+                   int(data['speakers']))
+
+
+@lru_cache(maxsize=4)
+def _mel_filterbank(sample_rate: int, n_fft: int = _N_FFT, n_mels: int = _N_MELS) -> np.ndarray:
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + np.asarray(hz) / 700)
+
+    mels = np.linspace(hz_to_mel(0), hz_to_mel(sample_rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * 700 * (10 ** (mels / 2595) - 1) / sample_rate).astype(int)
+    bank = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            bank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            bank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return bank
+
+
+@lru_cache(maxsize=1)
+def _dct_matrix(n_mels: int = _N_MELS, n_ceps: int = _N_CEPS) -> np.ndarray:
+    n = np.arange(n_mels)
+    return np.cos(np.pi / n_mels * (n + 0.5)[None, :] * np.arange(n_ceps)[:, None]).astype(np.float32)
+
+
+def frame_features(audio: np.ndarray, sample_rate: int = 16000):
+    """MFCC (sin c0) y energía en dB de cada trama de 10 ms"""
+    audio = np.asarray(audio, dtype=np.float32)
+    if len(audio) < _FRAME:
+        return np.zeros((0, _N_CEPS - 1), dtype=np.float32), np.zeros(0, dtype=np.float32)
+    emphasized = np.empty_like(audio)
+    emphasized[0] = audio[0]
+    emphasized[1:] = audio[1:] - 0.97 * audio[:-1]
+    frames = np.lib.stride_tricks.sliding_window_view(emphasized, _FRAME)[::_HOP]
+    window = np.hamming(_FRAME).astype(np.float32)
+    bank, dct = _mel_filterbank(sample_rate), _dct_matrix()
+
+    features, energy = [], []
+    for start in range(0, len(frames), _CHUNK_FRAMES):
+        chunk = frames[start:start + _CHUNK_FRAMES] * window
+        power = np.abs(np.fft.rfft(chunk, _N_FFT, axis=1)) ** 2
+        log_mel = np.log(power @ bank.T + 1e-10)
+        features.append((log_mel @ dct.T)[:, 1:])
+        energy.append(10 * np.log10(np.mean(chunk ** 2, axis=1) + 1e-12))
+    return np.concatenate(features).astype(np.float32), np.concatenate(energy).astype(np.float32)
+
+
+def window_embeddings(features: np.ndarray, energy: np.ndarray, sample_rate: int = 16000):
+    """Media y desviación de las tramas con voz por ventana; devuelve (embeddings, centros en segundos)"""
+    if len(features) < _WINDOW_FRAMES:
+        return np.zeros((0, features.shape[1] * 2), dtype=np.float32), np.zeros(0)
+    voiced = energy > energy.max() - _VOICE_THRESH_DB
+    # Normalización cepstral de media y varianza sobre las tramas con voz de todo el audio
+    reference = features[voiced] if voiced.any() else features
+    features = (features - reference.mean(axis=0)) / (reference.std(axis=0) + 1e-6)
+
+    weights = voiced.astype(np.float64)[:, None]
+    # Sumas acumuladas: cada ventana sale de dos restas, sin recorrer sus tramas
+    count = np.concatenate([[0], np.cumsum(voiced)])
+    total = np.concatenate([np.zeros((1, features.shape[1])), np.cumsum(features * weights, axis=0)])
+    squares = np.concatenate([np.zeros((1, features.shape[1])), np.cumsum(features ** 2 * weights, axis=0)])
+
+    starts = np.arange(0, len(features) - _WINDOW_FRAMES + 1, _WINDOW_HOP)
+    ends = starts + _WINDOW_FRAMES
+    n = (count[ends] - count[starts]).astype(np.float64)
+    keep = n >= _MIN_VOICED * _WINDOW_FRAMES
+    starts, ends, n = starts[keep], ends[keep], n[keep][:, None]
+    mean = (total[ends] - total[starts]) / n
+    std = np.sqrt(np.maximum((squares[ends] - squares[starts]) / n - mean ** 2, 0))
+    centers = (starts + _WINDOW_FRAMES / 2) * _HOP / sample_rate
+    return np.hstack([mean, std]).astype(np.float32), centers
+
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    return x / (np.linalg.norm(x, axis=1, keepdims=True) + 1e-9)
+
+
+def _kmeans(x: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """k-means esférico (similitud coseno) con inicialización k-means++"""
+    centers = [x[rng.integers(len(x))]]
+    for _ in range(1, k):
+        distance = np.maximum(1 - np.max(x @ np.array(centers).T, axis=1), 0)
+        centers.append(x[rng.choice(len(x), p=distance / distance.sum()) if distance.sum() > 0 else rng.integers(len(x))])
+    centers = np.array(centers)
+    labels = np.zeros(len(x), dtype=np.int64)
+    for iteration in range(_KMEANS_ITER):
+        new_labels = np.argmax(x @ centers.T, axis=1)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for j in range(k):
+            members = x[labels == j]
+            if len(members):
+                centers[j] = members.sum(axis=0)
+        centers = _normalize_rows(centers)
+    return labels
+
+
+def _silhouette(x: np.ndarray, labels: np.ndarray, k: int) -> float:
+    """Silueta media con distancia coseno (matriz completa sobre la muestra)"""
+    distance = 1 - x @ x.T
+    scores = np.zeros(len(x))
+    sizes = np.bincount(labels, minlength=k)
+    # Distancia media de cada punto a cada grupo, en una sola multiplicación
+    per_cluster = distance @ np.eye(k)[labels]
+    own = per_cluster[np.arange(len(x)), labels]
+    a = own / np.maximum(sizes[labels] - 1, 1)
+    per_cluster = per_cluster / np.maximum(sizes, 1)
+    per_cluster[np.arange(len(x)), labels] = np.inf
+    b = per_cluster.min(axis=1)
+    valid = sizes[labels] > 1
+    scores[valid] = ((b - a) / np.maximum(a, b))[valid]
+    return float(scores.mean())
+
+
+def cluster_speakers(embeddings: np.ndarray, max_speakers: int = DEFAULT_MAX_SPEAKERS, seed: int = 0) -> np.ndarray:
+    """Hablante de cada ventana; el número de hablantes se elige por silueta"""
+    if len(embeddings) < 4 or max_speakers < 2:
+        return np.zeros(len(embeddings), dtype=np.int64)
+    x = embeddings - embeddings.mean(axis=0)
+    x = _normalize_rows(x / (x.std(axis=0) + 1e-6))
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(x), min(len(x), _SILHOUETTE_SAMPLE), replace=False)
+
+    best_labels, best_score = np.zeros(len(x), dtype=np.int64), _MIN_SILHOUETTE
+    for k in range(2, min(max_speakers, len(x) - 1) + 1):
+        labels = _kmeans(x, k, rng)
+        score = _silhouette(x[sample], labels[sample], k)
+        # Con voces variables la silueta tiende a premiar partir a un hablante en dos
+        if score > best_score + (_SPLIT_MARGIN if k > 2 else 0):
+            best_labels, best_score = labels, score
+    # Suavizado: una ventana aislada entre dos del mismo hablante se reasigna
+    smoothed = best_labels.copy()
+    isolated = (best_labels[:-2] == best_labels[2:]) & (best_labels[1:-1] != best_labels[:-2])
+    smoothed[1:-1][isolated] = best_labels[:-2][isolated]
+    # Numerar por orden de aparición: "Hablante 1" es quien habla primero
+    _, first = np.unique(smoothed, return_index=True)
+    order = np.argsort(np.argsort(first))
+    return order[np.searchsorted(np.unique(smoothed), smoothed)]
+
+
+def _cache_key(file_hash: str, max_speakers: int) -> str:
+    return f"{file_hash}_v{_VERSION}_{max_speakers}"
+
+
+def cached_speaker_turns(file_hash: str, max_speakers: int = DEFAULT_MAX_SPEAKERS) -> Optional[SpeakerTurns]:
+    """Diarización ya calculada para este audio, sin decodificarlo"""
+    data = JsonCache('diarizacion').get(_cache_key(file_hash, max_speakers))
+    return SpeakerTurns.from_json(data) if data else None
+
+
+def missing_speaker_turns(file_hashes: Dict[int, str], max_speakers: int = DEFAULT_MAX_SPEAKERS) -> List[int]:
+    """Índices cuyos audios no tienen diarización en caché: hay que decodificarlos para etiquetarlos"""
+    return [index for index, file_hash in file_hashes.items() if cached_speaker_turns(file_hash, max_speakers) is None]
+
+
+def speaker_turns(audio: np.ndarray, sample_rate: int = 16000, file_hash: Optional[str] = None,
+                  max_speakers: int = DEFAULT_MAX_SPEAKERS, metrics: Optional[JobMetrics] = None) -> SpeakerTurns:
+    """Diarizar el audio (o leer la caché si se indica su hash)"""
+    if file_hash:
+        cached = cached_speaker_turns(file_hash, max_speakers)
+        if cached is not None:
+            return cached
+    with track(metrics, 'diarizacion'):
+        embeddings, times = window_embeddings(*frame_features(audio, sample_rate), sample_rate)
+        labels = cluster_speakers(embeddings, max_speakers)
+        turns = SpeakerTurns(times, labels.astype(np.int16), int(labels.max()) + 1 if len(labels) else 0)
+    if file_hash:
+        JsonCache('diarizacion').set(_cache_key(file_hash, max_speakers), turns.to_json())
+    return turns
+
+
+def label_segments(segments: Sequence[Dict], turns: SpeakerTurns) -> List[Dict]:
+    """
+    Copia de los segmentos con `speaker`: el hablante mayoritario de las
+    ventanas que cubren cada uno. Con un único hablante no se etiqueta nada.
+    """
+    if turns.speakers < 2:
+        return [dict(segment) for segment in segments]
+    starts = np.array([float(segment['start']) for segment in segments])
+    ends = np.array([float(segment['end']) for segment in segments])
+    first = np.searchsorted(turns.times, starts, side='left')
+    last = np.searchsorted(turns.times, ends, side='right')
+    # Segmentos más cortos que el paso de las ventanas: la ventana más cercana a su centro
+    nearest = np.clip(np.searchsorted(turns.times, (starts + ends) / 2), 0, len(turns.times) - 1)
+    labeled = []
+    for segment, a, b, fallback in zip(segments, first.tolist(), last.tolist(), nearest.tolist()):
+        votes = turns.labels[a:b]
+        speaker = int(np.bincount(votes).argmax()) if len(votes) else int(turns.labels[fallback])
+        labeled.append(dict(segment, speaker=SPEAKER_LABEL.format(speaker + 1)))
+    return labeled
+
+
+def label_result(result: Dict, turns: Optional[SpeakerTurns]) -> Dict:
+    """Resultado tipo Whisper con hablante por segmento y una línea por intervención en `text`"""
+    if turns is None or turns.speakers < 2 or not result.get('segments'):
+        return result
+    segments = label_segments(result['segments'], turns)
+    return dict(result, segments=segments, text=speaker_text(segments))
+
+
+def render_diarization_options(key: str) -> Optional[int]:
+    """Opción de identificar hablantes; devuelve el máximo de hablantes, o None si está desactivada"""
+    active = st.checkbox(
+        "🗣️ Identificar hablantes (diarización)", value=False, key=f"{key}_active",
+        help="Agrupa las voces del audio en CPU, sin modelos adicionales, y etiqueta cada segmento como "
+             "'Hablante N'. El resultado se guarda en caché por audio."
+    )
+    max_speakers = st.slider("Máximo de hablantes:", min_value=2, max_value=8, value=DEFAULT_MAX_SPEAKERS,
+                             disabled=not active, key=f"{key}_max")
+    return max_speakers if active else None
@@ -0,0 +1,182 @@
+"""
+Exportación tabular de los resultados de un lote.
+
+Dos tablas para análisis posterior sin volver a parsear SRT:
+
+- segmentos: una fila por segmento (archivo, inicio y fin en segundos,
+  texto, idioma y una columna booleana `kw_<palabra>` por palabra clave).
+- archivos: una fila por archivo con su resumen.
+
+Se escriben en JSON Lines y, si pyarrow está disponible (viene con
+Streamlit), en Parquet, que pandas carga en una sola lectura columnar.
+`create_download_zip` reúne esas tablas con los reportes y las
+transcripciones en el ZIP de descarga del lote.
+"""
+import io
+import json
+import os
+import re
+import zipfile
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from voicewise.keywords import highlight_keywords
+from voicewise.reporting import build_report, render_html, render_markdown
+from voicewise.segments import SegmentStore
+
+SEGMENTS_TABLE = 'segmentos'
+FILES_TABLE = 'archivos'
+
+
+def keyword_column(keyword: str) -> str:
+    """Nombre de columna estable para una palabra clave"""
+    return 'kw_' + re.sub(r'\W+', '_', keyword.strip().lower()).strip('_')
+
+
+def _keyword_columns(keywords: Sequence[str]) -> Dict[str, str]:
+    """
+    Columna -> término buscado. Las variantes del mismo término ('Robo', 'robo ')
+    comparten columna; términos distintos con el mismo nombre normalizado
+    ('robo', 'robo!') reciben un sufijo numérico en lugar de pisarse.
+    """
+    columns: Dict[str, str] = {}
+    terms = set()
+    for keyword in keywords:
+        term = keyword.lower().strip() if keyword else ''
+        if not term or term in terms:
+            continue
+        terms.add(term)
+        base = column = keyword_column(keyword)
+        suffix = 2
+        while column in columns:
+            column = f"{base}_{suffix}"
+            suffix += 1
+        columns[column] = term
+    return columns
+
+
+def segment_rows(results: Iterable, keywords: Sequence[str]) -> Iterator[Dict]:
+    """Filas de la tabla de segmentos; cada SRT se lee una vez, archivo por archivo"""
+    columns = _keyword_columns(keywords)
+    for file_index, result in enumerate(results):
+        if not result.srt_path:
+            continue
+        # Los tiempos ya están en segundos: no se vuelven a interpretar las marcas SRT
+        store = SegmentStore.from_srt_file(result.srt_path)
+        for position in range(len(store)):
+            text = store.text_at(position)
+            text_lower = text.lower()
+            flags = {column: term in text_lower for column, term in columns.items()}
+            yield {
+                'file': result.filename,
+                'file_index': file_index,
+                'segment': int(store.indices[position]),
+                'start': float(store.starts[position]),
+                'end': float(store.ends[position]),
+                'text': text,
+                'speaker': store.speaker_at(position),
+                'language': result.language,
+                'has_keyword': any(flags.values()),
+                **flags,
+            }
+
+
+def _file_status(result) -> str:
+    if not result.transcription:
+        return 'error'
+    # Cribado en modo triaje: solo se decodificó hasta la parada anticipada
+    return 'partial' if getattr(result, 'triage_stopped_at', None) is not None else 'ok'
+
+
+def file_rows(results: Iterable, keywords: Sequence[str]) -> Iterator[Dict]:
+    """Filas de la tabla de resumen por archivo"""
+    columns = _keyword_columns(keywords)
+    for file_index, result in enumerate(results):
+        found = {keyword.lower().strip() for keyword in result.found_keywords}
+        yield {
+            'file': result.filename,
+            'file_index': file_index,
+            'status': _file_status(result),
+            'duration': float(result.duration),
+            'processing_time': float(result.processing_time),
+            'word_count': int(result.word_count),
+            'language': result.language,
+            'language_probability': result.language_probability,
+            'hit_count': len(result.hits),
+            **{column: term in found for column, term in columns.items()},
+        }
+
+
+def to_jsonl(rows: Iterable[Dict]) -> bytes:
+    """Una fila JSON por línea"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(json.dumps(row, ensure_ascii=False))
+        buffer.write('\n')
+    return buffer.getvalue().encode('utf-8')
+
+
+def to_parquet(rows: List[Dict]) -> Optional[bytes]:
+    """Tabla Parquet comprimida con zstd (None si pyarrow no está instalado)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+    buffer = io.BytesIO()
+    pq.write_table(pa.Table.from_pylist(rows), buffer, compression='zstd')
+    return buffer.getvalue()
+
+
+def write_tables(zip_file: zipfile.ZipFile, results: Sequence, keywords: Sequence[str], prefix: str = 'datos/'):
+    """Escribir ambas tablas en JSON Lines y Parquet dentro de un ZIP abierto"""
+    for name, rows in ((SEGMENTS_TABLE, list(segment_rows(results, keywords))),
+                       (FILES_TABLE, list(file_rows(results, keywords)))):
+        zip_file.writestr(f"{prefix}{name}.jsonl", to_jsonl(rows))
+        parquet = to_parquet(rows)
+        if parquet is not None:
+            # Parquet ya va comprimido: se guarda sin volver a comprimir
+            zip_file.writestr(f"{prefix}{name}.parquet", parquet, compress_type=zipfile.ZIP_STORED)
+
+
+def create_data_export(results: Sequence, keywords: Sequence[str]) -> bytes:
+    """ZIP solo con las tablas de segmentos y archivos"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        write_tables(zip_file, results, keywords, prefix='')
+    return buffer.getvalue()
+
+
+def create_download_zip(results: Sequence, keywords: Sequence[str]) -> bytes:
+    """ZIP del lote: reportes Markdown/HTML, TXT, SRT, textos resaltados y tablas de datos"""
+    zip_buffer = io.BytesIO()
+
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        report = build_report(results, keywords, title="Reporte de Transcripción Masiva")
+        zip_file.writestr("REPORTE_TRANSCRIPCION.md", render_markdown(report).encode('utf-8'))
+        zip_file.writestr("REPORTE_TRANSCRIPCION.html", render_html(report).encode('utf-8'))
+
+        for result in results:
+            if result.transcription:
+                base_name = os.path.splitext(result.filename)[0]
+
+                zip_file.writestr(f"transcripciones/{base_name}.txt", result.transcription.encode('utf-8'))
+
+                if result.srt_path and os.path.exists(result.srt_path):
+                    with open(result.srt_path, 'r', encoding='utf-8') as srt_file:
+                        srt_content = srt_file.read()
+                    zip_file.writestr(f"transcripciones_srt/{base_name}.srt", srt_content.encode('utf-8'))
+
+                highlighted = highlight_keywords(result.transcription, keywords)
+                zip_file.writestr(f"resaltados/{base_name}_resaltado.html",
+                                f"<html><body><pre>{highlighted}</pre></body></html>".encode('utf-8'))
+
+        # Audios cribados en modo triaje que aún necesitan la transcripción completa
+        flagged = [r.filename for r in results if r.triage_stopped_at is not None]
+        if flagged:
+            zip_file.writestr("PENDIENTES_TRANSCRIPCION_COMPLETA.txt", '\n'.join(flagged).encode('utf-8'))
+
+        # Tablas de segmentos y archivos para análisis (JSON Lines y Parquet)
+        write_tables(zip_file, results, keywords)
+
+    zip_buffer.seek(0)
+    return zip_buffer.read()
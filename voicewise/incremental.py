@@ -0,0 +1,168 @@
+"""
+Re-transcripción incremental de grabaciones ampliadas o editadas.
+
+El PCM decodificado, antes de cualquier preprocesado, se divide en bloques
+fijos de 30 s y se calcula una huella de cada uno. Las transcripciones
+anteriores se agrupan por la huella del primer bloque (no por el nombre del
+archivo); varias grabaciones pueden compartirlo (p. ej. una locución de
+bienvenida común), así que se elige la versión con más bloques iniciales en
+común. Los segmentos que terminan dentro de ese prefijo sin cambios se
+reutilizan y solo se transcribe la cola desde el final del último segmento
+conservado. Los segmentos nuevos se desplazan a su tiempo real y se añaden
+a los anteriores.
+"""
+import hashlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from voicewise.cache import JsonCache
+
+BLOCK_SECONDS = 30
+_SAFETY_SECONDS = 1.0         # los segmentos que rozan el final del prefijo se vuelven a transcribir
+_MAX_VERSIONS = 16            # grabaciones distintas guardadas con el mismo primer bloque
+
+
+def block_fingerprints(audio: np.ndarray, sample_rate: int = 16000, block_seconds: int = BLOCK_SECONDS) -> List[str]:
+    """Huella de cada bloque del PCM decodificado (el último puede ser parcial)"""
+    pcm = (np.clip(np.asarray(audio, dtype=np.float32), -1.0, 1.0) * 32767).astype(np.int16)
+    size = block_seconds * sample_rate
+    return [hashlib.sha1(pcm[start:start + size].tobytes()).hexdigest()[:16] for start in range(0, len(pcm), size)]
+
+
+def raw_block_fingerprints(file_hash: str, decode: Callable[[], np.ndarray]) -> List[str]:
+    """
+    Huellas del audio tal como sale del decodificador, guardadas por hash del
+    archivo. El preprocesado no sirve: la normalización depende de todo el
+    archivo y cambia también los bloques del prefijo al añadir audio al final.
+    """
+    cache = JsonCache('huellas')
+    key = f"{file_hash}_{BLOCK_SECONDS}"
+    fingerprints = cache.get(key)
+    if fingerprints is None:
+        fingerprints = block_fingerprints(decode())
+        cache.set(key, fingerprints)
+    return fingerprints
+
+
+def _common_blocks(previous: Sequence[str], fingerprints: Sequence[str]) -> int:
+    matched = 0
+    for old, new in zip(previous, fingerprints):
+        if old != new:
+            break
+        matched += 1
+    return matched
+
+
+@dataclass
+class IncrementalPlan:
+    reused: List[Dict] = field(default_factory=list)   # segmentos anteriores que se conservan
+    resume_at: float = 0.0                             # segundos desde los que hay que transcribir
+    cached: Optional[Dict] = None                      # transcripción anterior completa
+    complete: bool = False                             # mismo audio: no hay nada que transcribir
+
+    def resume_sample(self, sample_rate: int = 16000) -> int:
+        return int(self.resume_at * sample_rate)
+
+
+class IncrementalIndex:
+    """Últimas transcripciones de cada grabación (agrupadas por su primer bloque) para un motor, modelo e idioma"""
+
+    def __init__(self, backend: str, model_size: str, language: str, variant: Optional[str] = None):
+        self._cache = JsonCache('incremental')
+        self._suffix = f"{backend}_{model_size}_{language}" + (f"_{variant}" if variant else '')
+
+    def _key(self, fingerprints: Sequence[str]) -> Optional[str]:
+        return f"{fingerprints[0]}_{self._suffix}" if fingerprints else None
+
+    def _versions(self, key: str) -> List[Dict]:
+        versions = self._cache.get(key) or []
+        # Formato anterior: una sola versión por primer bloque
+        return [versions] if isinstance(versions, dict) else versions
+
+    def lookup(self, fingerprints: Sequence[str]) -> Optional[Dict]:
+        """La versión guardada con más bloques iniciales en común con el audio actual"""
+        key = self._key(fingerprints)
+        versions = self._versions(key) if key else []
+        # En empate gana la más reciente
+        return max(reversed(versions), key=lambda version: _common_blocks(version['blocks'], fingerprints),
+                   default=None)
+
+    def save(self, fingerprints: Sequence[str], result: Dict, block_seconds: int = BLOCK_SECONDS):
+        """
+        Guardar la transcripción completa. Sustituye a las versiones anteriores
+        de la misma grabación (no más largas y con todos sus bloques, salvo el
+        último parcial, como prefijo del audio actual); las demás con el mismo
+        primer bloque se conservan, hasta _MAX_VERSIONS.
+        """
+        key = self._key(fingerprints)
+        if not key:
+            return
+        versions = [
+            version for version in self._versions(key)
+            if len(version['blocks']) > len(fingerprints)
+            or _common_blocks(version['blocks'], fingerprints) < len(version['blocks']) - 1
+        ]
+        versions.append({
+            'blocks': list(fingerprints),
+            'block_seconds': block_seconds,
+            'language': result.get('language'),
+            'language_probability': result.get('language_probability'),
+            'segments': [
+                {'start': float(segment['start']), 'end': float(segment['end']), 'text': segment['text']}
+                for segment in result.get('segments', [])
+            ],
+        })
+        self._cache.set(key, versions[-_MAX_VERSIONS:])
+
+
+def plan_incremental(cached: Optional[Dict], fingerprints: Sequence[str]) -> IncrementalPlan:
+    """Qué parte de la transcripción anterior sigue valiendo para el audio actual"""
+    if not cached or cached.get('block_seconds') != BLOCK_SECONDS:
+        return IncrementalPlan()
+    previous = cached['blocks']
+    if list(previous) == list(fingerprints):
+        segments = list(cached['segments'])
+        return IncrementalPlan(segments, float(segments[-1]['end']) if segments else 0.0, cached, complete=True)
+    # Un último bloque parcial nunca coincide con uno más largo: solo cuentan bloques idénticos
+    matched = _common_blocks(previous, fingerprints)
+    limit = matched * BLOCK_SECONDS - _SAFETY_SECONDS
+    reused = [segment for segment in cached['segments'] if float(segment['end']) <= limit]
+    if not reused:
+        return IncrementalPlan(cached=cached)
+    return IncrementalPlan(reused, float(reused[-1]['end']), cached)
+
+
+def offset_segments(segments: Sequence[Dict], offset: float) -> List[Dict]:
+    """Segmentos de la cola llevados al tiempo de la grabación completa"""
+    return [dict(segment, start=float(segment['start']) + offset, end=float(segment['end']) + offset)
+            for segment in segments]
+
+
+def stitch(plan: IncrementalPlan, tail: Dict) -> Dict:
+    """Unir los segmentos conservados y los de la cola recién transcrita en un resultado tipo Whisper"""
+    segments = [
+        dict(segment, id=i)
+        for i, segment in enumerate(plan.reused + offset_segments(tail.get('segments', []), plan.resume_at))
+    ]
+    result = dict(tail, segments=segments, text=''.join(segment['text'] for segment in segments))
+    if plan.cached is not None and not result.get('language'):
+        result['language'] = plan.cached.get('language')
+        result['language_probability'] = plan.cached.get('language_probability')
+    if result.get('triage_stopped_at') is not None:
+        result['triage_stopped_at'] += plan.resume_at
+    result['reused_seconds'] = plan.resume_at
+    return result
+
+
+def cached_result(plan: IncrementalPlan) -> Dict:
+    """Resultado cuando el audio no cambió desde la última transcripción"""
+    segments = [dict(segment, id=i) for i, segment in enumerate(plan.cached['segments'])]
+    return {
+        'text': ''.join(segment['text'] for segment in segments),
+        'segments': segments,
+        'language': plan.cached.get('language'),
+        'language_probability': plan.cached.get('language_probability'),
+        'reused_seconds': plan.resume_at,
+    }
@@ -0,0 +1,59 @@
+"""
+Búsqueda y resaltado de palabras clave en el texto completo de una transcripción.
+
+Funciones puras compartidas por las páginas y los benchmarks: no dependen de
+Streamlit ni del modelo, así que se pueden medir y probar sin cargar una página.
+El resaltado por segmento del visor SRT está en voicewise.srt.
+"""
+import re
+from typing import List, Set, Tuple
+
+_MARK_STYLE = 'background-color: #ffeb3b; color: #d32f2f; font-weight: bold;'
+
+
+def find_keywords_in_text(text: str, keywords: List[str]) -> List[str]:
+    """Find which keywords are present in text"""
+    found = []
+    text_lower = text.lower()
+    for keyword in keywords:
+        if keyword and keyword.lower().strip() in text_lower:
+            found.append(keyword)
+    return found
+
+
+def highlight_keywords(text: str, keywords: List[str]) -> str:
+    """Highlight keywords in text"""
+    highlighted = text
+    for keyword in keywords:
+        if keyword and keyword.strip():
+            pattern = re.compile(re.escape(keyword), re.IGNORECASE)
+            highlighted = pattern.sub(
+                lambda m: f'<mark style="{_MARK_STYLE}">{m.group()}</mark>',
+                highlighted
+            )
+    return highlighted
+
+
+def highlight_text_simple(text: str, keywords: List[str]) -> Tuple[str, Set[str]]:
+    """Simple highlighting for the main text display"""
+    if not text or not keywords:
+        return text, set()
+
+    highlighted_text = text
+    found_terms = set()
+
+    for keyword in keywords:
+        if keyword and keyword.strip() and keyword.lower() in text.lower():
+            found_terms.add(keyword)
+            # Use case-insensitive replacement
+            try:
+                highlighted_text = re.sub(
+                    re.escape(keyword.strip()),
+                    f'<mark style="{_MARK_STYLE}">{keyword.strip()}</mark>',
+                    highlighted_text,
+                    flags=re.IGNORECASE
+                )
+            except re.error:
+                continue
+
+    return highlighted_text, found_terms
@@ -0,0 +1,70 @@
+"""
+Detección automática de idioma.
+
+En modo automático se ejecuta solo la detección de idioma de Whisper sobre
+la primera ventana de 30 s (una pasada del encoder) y el idioma resultante se
+pasa a la decodificación completa. El resultado se guarda por hash del
+archivo para no repetirlo si el mismo audio vuelve a subirse.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from voicewise.cache import JsonCache
+
+AUTO_LANGUAGE = 'auto'
+
+LANGUAGE_OPTIONS = {
+    AUTO_LANGUAGE: '🌐 Detección automática',
+    'es': 'Español',
+    'en': 'Inglés',
+    'pt': 'Portugués',
+    'fr': 'Francés',
+    'it': 'Italiano',
+    'de': 'Alemán',
+}
+
+_cache = JsonCache('language')
+
+
+@dataclass
+class LanguageDetection:
+    language: str
+    probability: Optional[float] = None   # None si el idioma se fijó manualmente
+    cached: bool = False
+
+
+def language_name(code: Optional[str]) -> str:
+    """Nombre legible de un código de idioma"""
+    if not code:
+        return "N/A"
+    if code in LANGUAGE_OPTIONS and code != AUTO_LANGUAGE:
+        return LANGUAGE_OPTIONS[code]
+    try:
+        from whisper.tokenizer import LANGUAGES
+        return LANGUAGES.get(code, code).capitalize()
+    except ImportError:
+        return code
+
+
+def format_language(code: Optional[str], probability: Optional[float]) -> str:
+    """Idioma para reportes, con la confianza si fue detectado"""
+    if probability is None:
+        return language_name(code)
+    return f"{language_name(code)} (detectado, {probability:.0%})"
+
+
+def resolve_language(engine, audio, language: str, file_hash: str = None) -> LanguageDetection:
+    """Idioma con el que decodificar: el elegido, o el detectado en los primeros 30 s"""
+    if language != AUTO_LANGUAGE:
+        return LanguageDetection(language)
+
+    key = f"{file_hash}_{engine.model_size}" if file_hash else None
+    if key:
+        cached = _cache.get(key)
+        if cached:
+            return LanguageDetection(cached['language'], cached['probability'], cached=True)
+
+    detected, probability = engine.detect_language(audio)
+    if key:
+        _cache.set(key, {'language': detected, 'probability': probability})
+    return LanguageDetection(detected, probability)
@@ -0,0 +1,137 @@
+"""
+Transcripción de grabaciones largas por fragmentos en paralelo.
+
+Une el divisor y la transcripción masiva sin pasar por archivos: los cortes
+en silencio (voicewise.silence) se aplican sobre el PCM ya decodificado, cada
+fragmento es una vista del mismo array y se transcribe en el pipeline por
+lotes con varios workers, y los segmentos vuelven a la línea de tiempo
+original antes de unirse en una única transcripción.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from voicewise.compute import compute_slot
+from voicewise.metrics import JobMetrics, track
+from voicewise.pipeline import BatchPipeline, PipelineItem
+from voicewise.silence import build_silence_map, cut_points
+
+
+@dataclass
+class AudioWindow:
+    index: int
+    start: int          # muestra inicial en el audio original
+    end: int
+    sample_rate: int
+
+    @property
+    def offset(self) -> float:
+        return self.start / self.sample_rate
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start) / self.sample_rate
+
+
+def plan_windows(
+    audio: np.ndarray,
+    sample_rate: int,
+    interval_minutes: float,
+    silence_detection: bool = True,
+    min_silence_len: int = 1000,
+    silence_thresh_adjustment: int = 16
+) -> List[AudioWindow]:
+    """Fragmentos del audio con cortes en silencio, con la misma regla que el divisor"""
+    boundaries = cut_points(
+        build_silence_map(audio, sample_rate),
+        int(interval_minutes * 60 * 1000),
+        silence_detection=silence_detection,
+        min_silence_len=min_silence_len,
+        silence_thresh_adjustment=silence_thresh_adjustment
+    )
+    samples = [min(len(audio), boundary * sample_rate // 1000) for boundary in boundaries]
+    samples[-1] = len(audio)
+    return [
+        AudioWindow(i, start, end, sample_rate)
+        for i, (start, end) in enumerate(zip(samples, samples[1:])) if end > start
+    ]
+
+
+def offset_segments(segments: Sequence[Dict], window: AudioWindow) -> List[Dict]:
+    """Segmentos de un fragmento llevados al tiempo del audio original"""
+    limit = window.offset + window.duration
+    return [
+        {
+            'start': window.offset + float(segment['start']),
+            'end': min(window.offset + float(segment['end']), limit),
+            'text': segment['text'],
+        }
+        for segment in segments
+    ]
+
+
+def merge_window_results(results: Sequence[Dict]) -> Dict:
+    """Unir los resultados de los fragmentos (en orden) en un único resultado tipo Whisper"""
+    segments = []
+    for result in results:
+        for segment in result['segments']:
+            segments.append(dict(segment, id=len(segments)))
+    return {
+        'text': ''.join(segment['text'] for segment in segments),
+        'segments': segments,
+    }
+
+
+def transcribe_windows(
+    audio: np.ndarray,
+    windows: Sequence[AudioWindow],
+    engine_for: Callable[[int], object],
+    workers: int,
+    language: Optional[str],
+    thread_hook: Callable = None,
+    on_window: Callable[[int, int, AudioWindow], None] = None,
+    placeholder=None,
+    metrics: Optional[JobMetrics] = None,
+    on_segments: Callable[[List[Dict]], None] = None
+) -> Dict:
+    """
+    Transcribir los fragmentos en paralelo con `workers` hilos y unir el resultado.
+    engine_for(slot) da el motor para el turno de cómputo que ocupa cada fragmento.
+    on_window(terminados, total, fragmento) se llama desde el hilo que consume el pipeline.
+    on_segments recibe los segmentos ya en tiempo original y en orden, en cuanto todos los
+    fragmentos anteriores han terminado.
+    """
+    def infer(chunk: np.ndarray, worker: int) -> Dict:
+        # Cada fragmento pide su turno al gobernador, igual que cada archivo de un lote
+        with compute_slot(placeholder, metrics) as slot:
+            with track(metrics, 'inferencia'):
+                return engine_for(slot).transcribe(audio=chunk, language=language, verbose=False)
+
+    def write(item: PipelineItem) -> Dict:
+        return {'segments': offset_segments(item.result.get('segments', []), item.source)}
+
+    pipeline = BatchPipeline(
+        windows,
+        # Vista del array original: sin copias ni recodificación
+        decode=lambda window: audio[window.start:window.end],
+        infer=infer,
+        write=write,
+        prefetch=workers,
+        thread_hook=thread_hook,
+        workers=workers
+    )
+    outputs = {}
+    emitted = 0
+    for done, item in enumerate(pipeline, 1):
+        if item.error:
+            pipeline.stop()
+            raise RuntimeError(f"Fragmento {item.index + 1} ({item.source.offset:.0f}s): {item.error}")
+        outputs[item.index] = item.output
+        if on_window is not None:
+            on_window(done, len(windows), item.source)
+        if on_segments is not None:
+            while emitted in outputs:
+                on_segments(outputs[emitted]['segments'])
+                emitted += 1
+    return merge_window_results([outputs[i] for i in range(len(windows))])
@@ -0,0 +1,252 @@
+"""
+Instrumentación ligera por etapas.
+
+Cada trabajo (una transcripción, un lote o una división) acumula spans por
+etapa en un JobMetrics. Los tiempos también se agregan a un registro global
+del proceso que puede exponerse en formato de texto Prometheus
+(VOICEWISE_METRICS_PORT) o escribirse como JSON Lines (VOICEWISE_METRICS_LOG).
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import streamlit as st
+
+# Etiquetas legibles para el panel lateral
+STAGE_LABELS = {
+    'carga_audio': 'Carga del audio',
+    'extraccion_zip': 'Extracción ZIP',
+    'huellas': 'Huella de los audios',
+    'planificacion': 'Planificación del lote',
+    'cola_computo': 'Espera de turno de cómputo',
+    'decodificacion': 'Decodificación',
+    'preprocesado': 'Preprocesado de audio',
+    'diarizacion': 'Diarización (hablantes)',
+    'inferencia': 'Inferencia Whisper',
+    'escritura_salidas': 'Escritura TXT/SRT',
+    'palabras_clave': 'Palabras clave',
+    'vista_previa': 'Vista previa de audio',
+    'parse_srt': 'Lectura SRT',
+    'deteccion_silencio': 'Detección de silencios',
+    'exportacion': 'Exportación de segmentos',
+    'reporte_pdf': 'Reportes PDF/MD/HTML',
+    'zip_descarga': 'ZIP de descarga',
+    'exportacion_datos': 'Exportación JSONL/Parquet',
+    'renderizado': 'Renderizado UI',
+}
+
+
+_local = threading.local()
+
+
+def _span_stack() -> List[List[float]]:
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+@dataclass
+class StageStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+
+@dataclass
+class JobMetrics:
+    """Tiempos agregados por etapa para un trabajo"""
+    page: str
+    name: str = ""
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @contextmanager
+    def span(self, stage: str):
+        """
+        Medir el bloque como una ejecución de la etapa indicada.
+        Los spans anidados descuentan su tiempo del span padre, así cada
+        etapa refleja solo su tiempo propio.
+        """
+        stack = _span_stack()
+        frame = [0.0]  # tiempo consumido por spans hijos
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][0] += elapsed
+            self.add(stage, elapsed - frame[0])
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages.setdefault(stage, StageStats()).add(seconds)
+        REGISTRY.observe(self.page, stage, seconds)
+
+    def finish(self):
+        """Cerrar el trabajo: contabilizarlo y escribirlo en el log JSON si está configurado"""
+        if self.finished_at is not None:
+            return
+        self.finished_at = time.time()
+        REGISTRY.job_finished(self)
+
+    @property
+    def wall_time(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            stages = {
+                name: {'count': stats.count, 'total_s': round(stats.total, 6), 'max_s': round(stats.max, 6)}
+                for name, stats in self.stages.items()
+            }
+        return {
+            'job_id': self.job_id,
+            'page': self.page,
+            'name': self.name,
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'wall_time_s': round(self.wall_time, 6),
+            'stages': stages,
+        }
+
+
+class MetricsRegistry:
+    """Agregados globales del proceso, compartidos entre sesiones"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[Tuple[str, str], StageStats] = {}
+        self._jobs: Dict[str, int] = {}
+
+    def observe(self, page: str, stage: str, seconds: float):
+        with self._lock:
+            self._stages.setdefault((page, stage), StageStats()).add(seconds)
+
+    def job_finished(self, job: JobMetrics):
+        with self._lock:
+            self._jobs[job.page] = self._jobs.get(job.page, 0) + 1
+        log_path = os.environ.get('VOICEWISE_METRICS_LOG')
+        if log_path:
+            try:
+                with open(log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(job.as_dict(), ensure_ascii=False) + '\n')
+            except OSError:
+                pass
+
+    def prometheus_text(self) -> str:
+        """Exportar los agregados en formato de exposición de texto Prometheus"""
+        with self._lock:
+            stages = sorted(self._stages.items())
+            jobs = sorted(self._jobs.items())
+        lines = [
+            '# HELP voicewise_stage_seconds_total Tiempo acumulado por etapa.',
+            '# TYPE voicewise_stage_seconds_total counter',
+        ]
+        lines += [f'voicewise_stage_seconds_total{{page="{page}",stage="{stage}"}} {stats.total:.6f}'
+                  for (page, stage), stats in stages]
+        lines += [
+            '# HELP voicewise_stage_calls_total Ejecuciones por etapa.',
+            '# TYPE voicewise_stage_calls_total counter',
+        ]
+        lines += [f'voicewise_stage_calls_total{{page="{page}",stage="{stage}"}} {stats.count}'
+                  for (page, stage), stats in stages]
+        lines += [
+            '# HELP voicewise_stage_max_seconds Duración máxima observada por etapa.',
+            '# TYPE voicewise_stage_max_seconds gauge',
+        ]
+        lines += [f'voicewise_stage_max_seconds{{page="{page}",stage="{stage}"}} {stats.max:.6f}'
+                  for (page, stage), stats in stages]
+        lines += [
+            '# HELP voicewise_jobs_total Trabajos completados.',
+            '# TYPE voicewise_jobs_total counter',
+        ]
+        lines += [f'voicewise_jobs_total{{page="{page}"}} {count}' for page, count in jobs]
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+@contextmanager
+def track(metrics: Optional[JobMetrics], stage: str):
+    """Igual que JobMetrics.span, pero tolerante a que no haya un trabajo activo"""
+    if metrics is None:
+        yield
+        return
+    with metrics.span(stage):
+        yield
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip('/') != '/metrics':
+            self.send_error(404)
+            return
+        body = REGISTRY.prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@st.cache_resource
+def start_metrics_server() -> Optional[int]:
+    """Levantar el endpoint /metrics una sola vez por proceso si VOICEWISE_METRICS_PORT está definido"""
+    port = os.environ.get('VOICEWISE_METRICS_PORT')
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer(('0.0.0.0', int(port)), _MetricsHandler)
+    except (OSError, ValueError):
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True, name='voicewise-metrics').start()
+    return server.server_address[1]
+
+
+def render_metrics_panel(metrics: Optional[JobMetrics]):
+    """Mostrar en la barra lateral el desglose de tiempos del último trabajo"""
+    if metrics is None or not metrics.stages:
+        return
+    data = metrics.as_dict()
+    with st.sidebar.expander("⏱️ Métricas de rendimiento", expanded=False):
+        st.caption(f"Trabajo {data['job_id']} · {metrics.name}")
+        stages = sorted(data['stages'].items(), key=lambda item: item[1]['total_s'], reverse=True)
+        measured = sum(stats['total_s'] for _, stats in stages) or 1.0
+        st.table([
+            {
+                'Etapa': STAGE_LABELS.get(name, name),
+                'Tiempo (s)': f"{stats['total_s']:.2f}",
+                'Llamadas': stats['count'],
+                '%': f"{stats['total_s'] / measured * 100:.0f}%",
+            }
+            for name, stats in stages
+        ])
+        st.write(f"**Tiempo total del trabajo:** {data['wall_time_s']:.2f}s")
+        st.download_button(
+            "📥 Métricas (JSON)",
+            data=json.dumps(data, indent=2, ensure_ascii=False),
+            file_name=f"metricas_{data['job_id']}.json",
+            mime="application/json",
+            key=f"metrics_json_{data['job_id']}"
+        )
@@ -0,0 +1,259 @@
+"""
+Motor de PDF incremental.
+
+Los reportes se describen como generadores de flowables. FlowableStream los
+entrega a reportlab por tandas a medida que se maquetan, así nunca existe la
+historia completa en memoria, y el documento se escribe a un archivo
+temporal con compresión de páginas. Los estilos de párrafo y de tabla se
+construyen una sola vez por proceso y se comparten entre reportes; los logos
+se leen una vez y cada reporte crea sus propias imágenes. El contenido de
+cada reporte vive en voicewise.reporting.
+"""
+import io
+import os
+import re
+import tempfile
+from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Iterable, Iterator, Optional, Pattern, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch, mm
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Flowable, Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+_BUFFER_SIZE = 64
+
+
+class FlowableStream(list):
+    """
+    Lista que reportlab consume por la cabeza y que se rellena desde un
+    generador: solo hay en memoria unas decenas de flowables pendientes.
+    """
+
+    def __init__(self, source: Iterable[Flowable], buffer_size: int = _BUFFER_SIZE):
+        super().__init__()
+        self._source = iter(source)
+        self._buffer_size = buffer_size
+        self._exhausted = False
+
+    def _fill(self):
+        while not self._exhausted and list.__len__(self) < self._buffer_size:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._exhausted = True
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+def build_pdf(flowables: Iterable[Flowable], title: str) -> bytes:
+    """Maquetar los flowables a un archivo temporal y devolver el PDF"""
+    fd, path = tempfile.mkstemp(suffix='.pdf', prefix='voicewise_report_')
+    os.close(fd)
+    try:
+        doc = SimpleDocTemplate(
+            path,
+            pagesize=A4,
+            rightMargin=20*mm,
+            leftMargin=20*mm,
+            topMargin=25*mm,
+            bottomMargin=20*mm,
+            title=title,
+            pageCompression=1
+        )
+        doc.build(FlowableStream(flowables))
+        with open(path, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+@lru_cache(maxsize=1)
+def report_styles() -> SimpleNamespace:
+    """Estilos de párrafo compartidos por todos los reportes"""
+    base = getSampleStyleSheet()
+    normal = ParagraphStyle('CustomNormal', parent=base['Normal'], fontSize=11, spaceAfter=10,
+                            alignment=TA_JUSTIFY, fontName='Helvetica')
+    meta = ParagraphStyle('MetaStyle', parent=base['Normal'], fontSize=10, textColor=HexColor('#666666'),
+                          fontName='Helvetica')
+    subtitle = ParagraphStyle('CustomSubtitle', parent=base['Heading2'], fontSize=16, spaceAfter=15,
+                              spaceBefore=20, textColor=HexColor('#2a5298'), fontName='Helvetica-Bold')
+    return SimpleNamespace(
+        title=ParagraphStyle('CustomTitle', parent=base['Heading1'], fontSize=24, spaceAfter=30,
+                             alignment=TA_CENTER, textColor=HexColor('#1e3c72'), fontName='Helvetica-Bold'),
+        subtitle=subtitle,
+        normal=normal,
+        meta=meta,
+        header_text=ParagraphStyle('HeaderText', parent=normal, fontSize=14, alignment=TA_LEFT,
+                                   fontName='Helvetica-Bold'),
+        footer_text=ParagraphStyle('FooterText', parent=meta, fontSize=8, alignment=TA_LEFT,
+                                   textColor=HexColor('#666666')),
+        file_header=ParagraphStyle('FileHeader', parent=subtitle, fontSize=14, textColor=HexColor('#1e3c72'),
+                                   spaceBefore=15, spaceAfter=10),
+        transcription=ParagraphStyle('TranscriptionText', parent=normal, fontSize=10, leftIndent=15,
+                                     rightIndent=15, borderWidth=1, borderColor=HexColor('#e1e8ed'),
+                                     borderPadding=10, backColor=HexColor('#ffffff')),
+        segment=ParagraphStyle('SegmentContent', parent=normal, fontSize=11, leftIndent=15, rightIndent=15,
+                               spaceAfter=15, spaceBefore=5, borderWidth=1, borderColor=HexColor('#e1e8ed'),
+                               borderPadding=10, backColor=HexColor('#ffffff')),
+        separator=ParagraphStyle('Separator', parent=meta, alignment=TA_CENTER, textColor=HexColor('#cccccc')),
+        timing_summary=ParagraphStyle('TimingSummary', parent=normal, alignment=TA_CENTER, fontSize=11,
+                                      textColor=HexColor('#2a5298'), borderWidth=1,
+                                      borderColor=HexColor('#2a5298'), borderPadding=10,
+                                      backColor=HexColor('#f8f9ff')),
+    )
+
+
+def _padding(horizontal: int, vertical: int) -> list:
+    return [
+        ('LEFTPADDING', (0, 0), (-1, -1), horizontal),
+        ('RIGHTPADDING', (0, 0), (-1, -1), horizontal),
+        ('TOPPADDING', (0, 0), (-1, -1), vertical),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), vertical),
+    ]
+
+
+@lru_cache(maxsize=None)
+def table_style(name: str) -> TableStyle:
+    """Estilos de tabla compartidos: se construyen una vez y se reutilizan en cada tabla"""
+    label_value = [
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]
+    styles = {
+        # Pares etiqueta/valor sin bordes (metadatos y estadísticas)
+        'metadata': label_value + [('TEXTCOLOR', (0, 0), (0, -1), HexColor('#1e3c72'))] + _padding(0, 5),
+        # Ficha con fondo y rejilla (detalle por archivo)
+        'file': label_value + [
+            ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#2a5298')),
+            ('BACKGROUND', (0, 0), (-1, -1), HexColor('#f8f9fa')),
+            ('GRID', (0, 0), (-1, -1), 1, HexColor('#e1e5e9')),
+        ] + _padding(8, 6),
+        'boxed': label_value + [
+            ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#1e3c72')),
+            ('BACKGROUND', (0, 0), (-1, -1), HexColor('#f8f9fa')),
+            ('GRID', (0, 0), (-1, -1), 1, HexColor('#e1e5e9')),
+        ] + _padding(10, 8),
+        'warning': label_value + [
+            ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#1e3c72')),
+            ('BACKGROUND', (0, 0), (-1, -1), HexColor('#fff8e1')),
+            ('GRID', (0, 0), (-1, -1), 1, HexColor('#ffcc02')),
+        ] + _padding(10, 8),
+        'segment_header': [
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#1e3c72')),
+            ('TEXTCOLOR', (1, 0), (1, -1), HexColor('#2a5298')),
+            ('BACKGROUND', (0, 0), (-1, -1), HexColor('#f0f4f8')),
+            ('GRID', (0, 0), (-1, -1), 1, HexColor('#d1d9e0')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ] + _padding(8, 6),
+        'logo_row': [
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ALIGN', (0, 0), (0, 0), 'CENTER'),
+            ('ALIGN', (1, 0), (1, 0), 'LEFT'),
+        ] + _padding(10, 10),
+        'logo_row_ruled': [
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ALIGN', (0, 0), (0, 0), 'CENTER'),
+            ('ALIGN', (1, 0), (1, 0), 'LEFT'),
+            ('LINEABOVE', (0, 0), (-1, 0), 1, HexColor('#cccccc')),
+        ] + _padding(10, 10),
+    }
+    return TableStyle(styles[name])
+
+
+@lru_cache(maxsize=64)
+def _keyword_pattern(keywords: Tuple[str, ...]) -> Optional[Pattern]:
+    terms = sorted({escape(k.strip()) for k in keywords if k and k.strip()}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+
+
+def highlight_markup(text: str, keywords: Sequence[str]) -> str:
+    """Escapar el texto para Paragraph y resaltar las palabras clave en rojo"""
+    escaped = escape(text)
+    pattern = _keyword_pattern(tuple(keywords))
+    if pattern is None:
+        return escaped
+    return pattern.sub(lambda m: f'<font color="#d32f2f"><b>{m.group()}</b></font>', escaped)
+
+
+_INSTITUTION = """
+    <b>{prefix}INSTITUTO UNIVERSITARIO RUMIÑAHUI</b><br/>
+    <font size="12">Departamento de Investigación</font><br/>
+    <font size="10" color="#666666">VoiceWise AI</font>
+"""
+
+_FOOTER = """
+    <font size="8" color="#666666">
+        Reporte generado automáticamente por el Sistema VoiceWise AI<br/>
+        Instituto Universitario Rumiñahui - Departamento de Investigación<br/>
+        {timestamp}
+    </font>
+"""
+
+
+@lru_cache(maxsize=None)
+def _logo_bytes(path: str) -> Optional[bytes]:
+    """Contenido del logo leído y validado una sola vez por proceso (None si no está disponible)"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        ImageReader(io.BytesIO(data)).getSize()
+        return data
+    except Exception:
+        return None
+
+
+def logo_image(path: str, width: float, height: float) -> Optional[Image]:
+    """
+    Flowable nuevo para cada reporte: reportlab guarda en él el estado de
+    maquetación, así que dos PDFs generados a la vez no pueden compartirlo.
+    """
+    data = _logo_bytes(path)
+    if data is None:
+        return None
+    return Image(io.BytesIO(data), width=width, height=height)
+
+
+def institution_header() -> Iterator[Flowable]:
+    """Cabecera institucional con logo (o solo texto si el logo no está disponible)"""
+    styles = report_styles()
+    logo = logo_image('logo_instituto.png', 1.5*inch, 0.75*inch)
+    if logo is not None:
+        header_text = Paragraph(_INSTITUTION.format(prefix=''), styles.header_text)
+        yield Table([[logo, header_text]], colWidths=[2*inch, 5.5*inch], style=table_style('logo_row'))
+        return
+    yield Paragraph(f'<para align="center">{_INSTITUTION.format(prefix="🏛️ ")}</para>', styles.normal)
+
+
+def report_footer() -> Iterator[Flowable]:
+    """Pie con logo del sistema y fecha de generación"""
+    styles = report_styles()
+    footer = _FOOTER.format(timestamp=datetime.now().strftime("%d/%m/%Y %H:%M:%S"))
+    yield Spacer(1, 30)
+    logo = logo_image('logo_wise_2.png', 0.8*inch, 0.4*inch)
+    if logo is not None:
+        yield Table([[logo, Paragraph(footer, styles.footer_text)]], colWidths=[1.5*inch, 6*inch],
+                    style=table_style('logo_row_ruled'))
+        return
+    yield Paragraph(f'<para align="center">{footer}</para>', styles.meta)
@@ -0,0 +1,191 @@
+"""
+Pipeline productor/consumidor para lotes de audio.
+
+Tres etapas en hilos separados unidas por colas acotadas:
+
+    decodificación  ->  inferencia  ->  escritura de salidas
+
+Mientras el modelo transcribe un archivo, el hilo decodificador ya está
+extrayendo y decodificando los siguientes, y el hilo de salida escribe
+TXT/SRT del anterior; el modelo no espera por disco ni por ffmpeg.
+El hilo que itera el pipeline solo recibe los elementos terminados.
+
+La etapa de inferencia puede tener varios workers. El orden de despacho
+(`order`) y, opcionalmente, el worker de cada archivo (`assignment`) vienen
+del planificador; sin asignación todos los workers comparten una cola. Con
+asignación, el decodificador salta los archivos de los workers con la cola
+llena y sigue con los del resto.
+"""
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+@dataclass
+class PipelineItem:
+    index: int
+    source: Any
+    audio: Any = None
+    result: Optional[dict] = None
+    output: Any = None
+    error: Optional[str] = None
+    worker: Optional[int] = None
+
+
+class BatchPipeline:
+    """Ejecuta decode -> infer -> write con precarga acotada"""
+
+    def __init__(
+        self,
+        sources: Iterable[Any],
+        decode: Callable[[Any], Any],
+        infer: Callable[[Any, int], dict],
+        write: Callable[[PipelineItem], Any],
+        prefetch: int = 2,
+        thread_hook: Callable[[threading.Thread], Any] = None,
+        workers: int = 1,
+        order: Optional[List[int]] = None,
+        assignment: Optional[List[int]] = None
+    ):
+        self.sources = list(sources)
+        self.decode = decode
+        self.infer = infer
+        self.write = write
+        self.prefetch = max(1, prefetch)
+        self.thread_hook = thread_hook
+        self.workers = max(1, workers)
+        self.order = list(order) if order is not None else list(range(len(self.sources)))
+        self.assignment = assignment
+        self._stop = threading.Event()
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _next_index(self, pending: List[int], out_qs: List[queue.Queue]) -> Optional[int]:
+        """
+        Siguiente archivo a decodificar: el primero pendiente cuyo worker tiene
+        hueco en su cola. Un worker ocupado con un archivo largo no frena la
+        decodificación de los archivos de los demás.
+        """
+        if self.assignment is None:
+            return pending.pop(0)
+        for position, index in enumerate(pending):
+            if not out_qs[self.assignment[index]].full():
+                return pending.pop(position)
+        return None
+
+    def _decode_stage(self, out_qs: List[queue.Queue]):
+        pending = list(self.order)
+        while pending:
+            if self._stop.is_set():
+                return
+            index = self._next_index(pending, out_qs)
+            if index is None:
+                # Todas las colas con archivos pendientes están llenas
+                self._stop.wait(_POLL_SECONDS)
+                continue
+            item = PipelineItem(index, self.sources[index])
+            if self.assignment is not None:
+                item.worker = self.assignment[index]
+            try:
+                item.audio = self.decode(item.source)
+            except Exception as e:
+                item.error = f"Error decodificando: {e}"
+            out_q = out_qs[item.worker] if item.worker is not None else out_qs[0]
+            if not self._put(out_q, item):
+                return
+        # Un marcador de fin por worker, en su cola (o en la compartida)
+        for worker in range(self.workers):
+            if not self._put(out_qs[worker % len(out_qs)], _DONE):
+                return
+
+    def _infer_stage(self, worker: int, in_q: queue.Queue, out_q: queue.Queue):
+        while True:
+            item = self._get(in_q)
+            if item is _DONE:
+                self._put(out_q, _DONE)
+                return
+            if item.error is None:
+                item.worker = worker
+                try:
+                    item.result = self.infer(item.audio, worker)
+                    if item.result.get("error"):
+                        item.error = item.result["error"]
+                except Exception as e:
+                    item.error = f"Error transcribiendo: {e}"
+            # El audio decodificado ya no se necesita: liberar memoria cuanto antes
+            item.audio = None
+            if not self._put(out_q, item):
+                return
+
+    def _write_stage(self, in_q: queue.Queue, out_q: queue.Queue):
+        pending_workers = self.workers
+        while True:
+            item = self._get(in_q)
+            if item is _DONE:
+                pending_workers -= 1
+                if pending_workers == 0:
+                    self._put(out_q, _DONE)
+                    return
+                continue
+            if item.error is None:
+                try:
+                    item.output = self.write(item)
+                except Exception as e:
+                    item.error = f"Error guardando resultados: {e}"
+            if not self._put(out_q, item):
+                return
+
+    def _start(self, target, *args, name: str = None) -> threading.Thread:
+        thread = threading.Thread(target=target, args=args, daemon=True,
+                                  name=f"voicewise-{name or target.__name__}")
+        if self.thread_hook is not None:
+            self.thread_hook(thread)
+        thread.start()
+        return thread
+
+    def __iter__(self) -> Iterator[PipelineItem]:
+        # Con asignación fija cada worker tiene su propia cola de entrada
+        decoded_qs = [queue.Queue(maxsize=self.prefetch)
+                      for _ in range(self.workers if self.assignment is not None else 1)]
+        inferred_q = queue.Queue(maxsize=self.prefetch * self.workers)
+        done_q = queue.Queue(maxsize=self.prefetch * self.workers)
+        threads = [self._start(self._decode_stage, decoded_qs)]
+        threads += [
+            self._start(self._infer_stage, worker, decoded_qs[worker % len(decoded_qs)], inferred_q,
+                        name=f"infer-{worker}")
+            for worker in range(self.workers)
+        ]
+        threads.append(self._start(self._write_stage, inferred_q, done_q))
+        try:
+            while True:
+                item = self._get(done_q)
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            # Si el consumidor se detiene (p. ej. un rerun de Streamlit) los hilos terminan solos
+            self._stop.set()
+            for thread in threads:
+                thread.join(timeout=1)
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,193 @@
+"""
+Preprocesado del audio antes de transcribir o dividir.
+
+El audio se decodifica con ffmpeg a 16 kHz mono (el mismo cargador de
+Whisper, que ya mezcla los canales) y después se aplica, con NumPy
+vectorizado, un filtro paso alto FIR por bloques en el dominio de la
+frecuencia y una normalización de sonoridad medida solo sobre las tramas
+con voz. El resultado se guarda en la caché por hash del archivo y
+parámetros: reintentar la transcripción con otro motor o idioma no vuelve a
+decodificar ni a filtrar.
+"""
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+import streamlit as st
+
+from voicewise.cache import cache_dir
+from voicewise.metrics import JobMetrics, track
+from voicewise.silence import build_silence_map
+
+SAMPLE_RATE = 16000
+_FIR_TAPS = 1025              # ~60 Hz de banda de transición a 16 kHz
+_FFT_SIZE = 1 << 16
+_BLOCKS_PER_BATCH = 32        # bloques transformados a la vez: memoria acotada en audios largos
+_VOICE_THRESH_DB = 16         # tramas a menos de 16 dB de la media cuentan como silencio (regla del divisor)
+_MAX_GAIN_DB = 30.0
+_PEAK = 0.99
+_CLIP_QUANTILE = 0.999        # se tolera que recorte como mucho el 0,1 % de las muestras
+
+
+@dataclass(frozen=True)
+class PreprocessSettings:
+    normalize: bool = True
+    target_dbfs: float = -20.0
+    highpass_hz: Optional[int] = 80
+
+    @property
+    def active(self) -> bool:
+        return self.normalize or bool(self.highpass_hz)
+
+    @property
+    def key(self) -> str:
+        """Identificador estable de los parámetros para la caché y los puntos de control"""
+        parts = []
+        if self.highpass_hz:
+            parts.append(f"hp{int(self.highpass_hz)}")
+        if self.normalize:
+            parts.append(f"ln{self.target_dbfs:g}")
+        return '-'.join(parts) or 'raw'
+
+
+def _highpass_kernel(sample_rate: int, cutoff_hz: float, taps: int = _FIR_TAPS) -> np.ndarray:
+    """FIR paso alto de fase lineal: impulso menos un paso bajo sinc con ventana de Blackman"""
+    n = np.arange(taps) - (taps - 1) / 2
+    lowpass = np.sinc(2 * cutoff_hz / sample_rate * n) * np.blackman(taps)
+    lowpass /= lowpass.sum()
+    kernel = -lowpass
+    kernel[(taps - 1) // 2] += 1.0
+    return kernel
+
+
+def highpass(audio: np.ndarray, sample_rate: int, cutoff_hz: float) -> np.ndarray:
+    """Filtro paso alto por solapamiento-suma con FFT; conserva longitud y alineación"""
+    audio = np.asarray(audio, dtype=np.float32)
+    if not len(audio):
+        return audio
+    kernel = _highpass_kernel(sample_rate, cutoff_hz)
+    taps = len(kernel)
+    block = _FFT_SIZE - taps + 1
+    spectrum = np.fft.rfft(kernel, _FFT_SIZE)
+    n_blocks = -(-len(audio) // block)
+    padded = np.zeros(n_blocks * block, dtype=np.float32)
+    padded[:len(audio)] = audio
+    blocks = padded.reshape(n_blocks, block)
+
+    out = np.zeros((n_blocks + 1) * block, dtype=np.float32)
+    for first in range(0, n_blocks, _BLOCKS_PER_BATCH):
+        batch = blocks[first:first + _BLOCKS_PER_BATCH]
+        filtered = np.fft.irfft(np.fft.rfft(batch, _FFT_SIZE, axis=1) * spectrum, _FFT_SIZE, axis=1)
+        count = len(batch)
+        start = first * block
+        # Cabeza de cada bloque en su sitio y cola (taps - 1 muestras) sobre el bloque siguiente
+        out[start:start + count * block].reshape(count, block)[:] += filtered[:, :block]
+        out[start + block:start + (count + 1) * block].reshape(count, block)[:, :taps - 1] += filtered[:, block:]
+    delay = (taps - 1) // 2
+    return out[delay:delay + len(audio)]
+
+
+def normalize_loudness(audio: np.ndarray, sample_rate: int, target_dbfs: float = -20.0) -> np.ndarray:
+    """Llevar el nivel medio de las tramas con voz a target_dbfs, limitando la ganancia y los recortes"""
+    audio = np.asarray(audio, dtype=np.float32)
+    if not len(audio):
+        return audio
+    smap = build_silence_map(audio, sample_rate)
+    voiced = smap.energy[smap.energy > 10 ** ((smap.dbfs - _VOICE_THRESH_DB) / 10)]
+    if not len(voiced):
+        return audio
+    level_db = 10 * np.log10(max(float(voiced.mean()), 1e-20))
+    gain = 10 ** (min(target_dbfs - level_db, _MAX_GAIN_DB) / 20)
+    loud = float(np.quantile(np.abs(audio), _CLIP_QUANTILE))
+    if loud > 0:
+        gain = min(gain, _PEAK / loud)
+    return np.clip(audio * gain, -_PEAK, _PEAK)
+
+
+def preprocess(audio: np.ndarray, sample_rate: int, settings: PreprocessSettings) -> np.ndarray:
+    """Filtro paso alto y normalización sobre audio ya decodificado (mono o un canal por fila)"""
+    if np.ndim(audio) == 2:
+        return np.stack([preprocess(channel, sample_rate, settings) for channel in audio])
+    if settings.highpass_hz:
+        audio = highpass(audio, sample_rate, settings.highpass_hz)
+    if settings.normalize:
+        audio = normalize_loudness(audio, sample_rate, settings.target_dbfs)
+    return np.asarray(audio, dtype=np.float32)
+
+
+def _cache_path(name: str, settings: PreprocessSettings) -> str:
+    return os.path.join(cache_dir('preprocesado'), f"{name}_{settings.key}.npy")
+
+
+def load_audio(path: str, file_hash: str, settings: Optional[PreprocessSettings] = None,
+               metrics: Optional[JobMetrics] = None, decode: Callable[[str], np.ndarray] = None,
+               variant: str = '', on_decoded: Callable[[np.ndarray], None] = None) -> np.ndarray:
+    """
+    Audio a 16 kHz listo para transcribir: mono con el cargador de Whisper, o lo
+    que devuelva `decode` (p. ej. un canal por fila, con `variant` para la caché).
+    Con preprocesado activo, el resultado se reutiliza de la caché si ya se
+    procesó el mismo contenido con los mismos parámetros. on_decoded recibe el
+    PCM sin preprocesar cuando hay que decodificarlo.
+    """
+    if decode is None:
+        import whisper
+        decode = whisper.load_audio
+
+    if settings is None or not settings.active:
+        with track(metrics, 'decodificacion'):
+            audio = decode(path)
+        if on_decoded is not None:
+            on_decoded(audio)
+        return audio
+
+    cached = _cache_path(f"{file_hash}_{variant}" if variant else file_hash, settings)
+    if os.path.exists(cached):
+        with track(metrics, 'preprocesado'):
+            try:
+                return np.load(cached).astype(np.float32) / 32768.0
+            except (OSError, ValueError):
+                pass
+
+    with track(metrics, 'decodificacion'):
+        audio = decode(path)
+    if on_decoded is not None:
+        on_decoded(audio)
+    with track(metrics, 'preprocesado'):
+        audio = preprocess(audio, SAMPLE_RATE, settings)
+        # PCM de 16 bits: la mitad de espacio que float32 y la misma resolución que entrega ffmpeg
+        fd, tmp_path = tempfile.mkstemp(suffix='.npy', dir=os.path.dirname(cached))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.round(audio * 32767).astype(np.int16))
+            os.replace(tmp_path, cached)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return audio
+
+
+def render_preprocess_options(key: str) -> Optional[PreprocessSettings]:
+    """Opciones de preprocesado; None si está desactivado"""
+    with st.expander("🎚️ Preprocesado de audio", expanded=False):
+        active = st.checkbox(
+            "Preprocesar antes de transcribir", value=False, key=f"{key}_active",
+            help="Útil en grabaciones telefónicas o con volumen bajo. El audio procesado se guarda en caché: "
+                 "repetir la transcripción con otros ajustes no vuelve a decodificarlo."
+        )
+        normalize = st.checkbox("Normalizar el volumen de la voz", value=True, disabled=not active,
+                                key=f"{key}_normalize")
+        target = st.slider("Nivel objetivo (dBFS):", min_value=-30, max_value=-10, value=-20,
+                           disabled=not active or not normalize, key=f"{key}_target")
+        use_highpass = st.checkbox("Filtro paso alto (elimina zumbidos y ruido grave)", value=True,
+                                   disabled=not active, key=f"{key}_highpass")
+        cutoff = st.slider("Frecuencia de corte (Hz):", min_value=40, max_value=300, value=80, step=10,
+                           disabled=not active or not use_highpass, key=f"{key}_cutoff")
+    if not active:
+        return None
+    return PreprocessSettings(
+        normalize=normalize,
+        target_dbfs=float(target),
+        highpass_hz=cutoff if use_highpass else None
+    )
@@ -0,0 +1,24 @@
+"""
+Registro de motores de inferencia compartido por las páginas y la API.
+
+Cada combinación (motor, instancia) se carga una sola vez por proceso. Las
+instancias distintas son copias independientes del modelo para workers que
+transcriben a la vez: un mismo modelo Whisper no admite dos decodificaciones
+simultáneas. En la interfaz la instancia es el índice del turno de cómputo
+ocupado (`compute_slot`), así que cada copia la usa una sola transcripción a
+la vez aunque haya varias sesiones; la API usa sus propias instancias.
+"""
+import streamlit as st
+
+from voicewise.backends import DEFAULT_BACKEND, load_backend
+from voicewise.compute import get_governor
+
+MODEL_SIZE = 'base'
+
+
+@st.cache_resource(show_spinner=False)
+def get_engine(backend: str = DEFAULT_BACKEND, instance: int = 0):
+    """Motor cargado y compartido entre sesiones (pasar siempre ambos argumentos)"""
+    # Fijar los hilos de PyTorch antes de cargar (la cuantización también los usa)
+    get_governor()
+    return load_backend(backend, MODEL_SIZE)
@@ -0,0 +1,578 @@
+"""
+Modelo común de reportes y sus salidas en PDF, Markdown y HTML.
+
+Las páginas describen lo que quieren reportar con `build_report`, que
+recorre los resultados una sola vez y deja precalculados los totales, los
+idiomas y el conteo de archivos por palabra clave. Cada formato se genera a
+partir de ese mismo modelo, así que una mejora en el contenido llega a los
+tres y a las dos páginas a la vez. Los SRT se leen solo al renderizar el
+archivo que los necesita.
+"""
+import html
+import io
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+import streamlit as st
+from reportlab.lib.units import inch
+from reportlab.platypus import Flowable, PageBreak, Paragraph, Spacer, Table
+
+from voicewise.language import format_language
+from voicewise.metrics import JobMetrics, track
+from voicewise.pdf import build_pdf, highlight_markup, institution_header, report_footer, report_styles, table_style
+from voicewise.segments import SegmentStore, SRTSegment
+from voicewise.srt import highlight_segment_text
+from voicewise.timeline import format_clock
+
+EXCERPT_CHARS = 500
+
+
+@dataclass
+class FileReport:
+    filename: str
+    transcription: str
+    duration: float
+    processing_time: float
+    word_count: int
+    found_keywords: List[str]
+    language: Optional[str] = None
+    language_probability: Optional[float] = None
+    srt_path: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.transcription)
+
+    def hit_segments(self, keywords: Sequence[str]) -> Tuple[SegmentStore, List[SRTSegment]]:
+        """Segmentos del SRT y los que contienen palabras clave (se lee en cada llamada)"""
+        store = SegmentStore.from_srt_file(self.srt_path, keywords) if self.srt_path else SegmentStore.from_segments([])
+        return store, [store[position] for position in store.hit_positions().tolist()]
+
+
+@dataclass
+class Report:
+    title: str
+    keywords: List[str]
+    files: List[FileReport]
+    single: bool = False          # reporte detallado de un único archivo
+    model_name: Optional[str] = None
+    generated_at: datetime = field(default_factory=datetime.now)
+    # Agregados calculados en la misma pasada que construye `files`
+    successful: int = 0
+    total_duration: float = 0.0
+    total_processing: float = 0.0
+    total_words: int = 0
+    files_with_keywords: int = 0
+    keyword_counts: Dict[str, int] = field(default_factory=dict)
+    language_counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def languages(self) -> str:
+        """Idiomas del lote con el número de archivos de cada uno"""
+        if not self.language_counts:
+            return "N/A"
+        return ", ".join(f"{format_language(code, None)} ({count})"
+                         for code, count in sorted(self.language_counts.items(), key=lambda item: -item[1]))
+
+    @property
+    def found_keywords(self) -> List[str]:
+        return [keyword for keyword in self.keywords if self.keyword_counts.get(keyword)]
+
+
+def build_report(results: Iterable, keywords: Sequence[str], title: str, single: bool = False,
+                 model_name: Optional[str] = None) -> Report:
+    """
+    Construir el modelo del reporte en una sola pasada.
+    `results` son objetos con los atributos de FileReport (p. ej. TranscriptionResult).
+    """
+    report = Report(title=title, keywords=list(keywords), files=[], single=single, model_name=model_name,
+                    keyword_counts={keyword: 0 for keyword in keywords})
+    for result in results:
+        entry = FileReport(
+            filename=result.filename,
+            transcription=result.transcription or "",
+            duration=result.duration or 0.0,
+            processing_time=result.processing_time or 0.0,
+            word_count=result.word_count or 0,
+            found_keywords=[keyword for keyword in keywords if keyword in result.found_keywords],
+            language=getattr(result, 'language', None),
+            language_probability=getattr(result, 'language_probability', None),
+            srt_path=getattr(result, 'srt_path', None)
+        )
+        report.files.append(entry)
+        report.successful += entry.ok
+        report.total_duration += entry.duration
+        report.total_processing += entry.processing_time
+        report.total_words += entry.word_count
+        report.files_with_keywords += bool(entry.found_keywords)
+        for keyword in entry.found_keywords:
+            report.keyword_counts[keyword] += 1
+        if entry.language:
+            report.language_counts[entry.language] = report.language_counts.get(entry.language, 0) + 1
+    return report
+
+
+def _keywords_label(keywords: Sequence[str]) -> str:
+    return ", ".join(keywords) if keywords else "Ninguna"
+
+
+def _duration_label(seconds: float) -> str:
+    return format_clock(seconds) if seconds else "N/A"
+
+
+def _speaker_counts(segments: Sequence[SRTSegment]) -> str:
+    """'Hablante 1 (3), Hablante 2 (1)' o cadena vacía si los segmentos no tienen hablante"""
+    counts: Dict[str, int] = {}
+    for segment in segments:
+        if segment.speaker:
+            counts[segment.speaker] = counts.get(segment.speaker, 0) + 1
+    return ", ".join(f"{speaker} ({count})" for speaker, count in counts.items())
+
+
+def _speaker_label(segment: SRTSegment) -> str:
+    """' · 🗣️ Hablante' si el segmento tiene etiqueta de hablante o canal (sin escapar)"""
+    return f" · 🗣️ {segment.speaker}" if segment.speaker else ""
+
+
+# ______________________________ PDF ______________________________
+
+def render_pdf(report: Report) -> bytes:
+    """Reporte en PDF, maquetado de forma incremental"""
+    return build_pdf(pdf_flowables(report), title=report.title)
+
+
+def pdf_flowables(report: Report) -> Iterator[Flowable]:
+    """Contenido del PDF como generador: reportlab lo consume a medida que maqueta"""
+    styles = report_styles()
+    yield from institution_header()
+    yield Spacer(1, 20)
+    if report.single:
+        yield Paragraph("📄 REPORTE DE TRANSCRIPCIÓN DE AUDIO", styles.title)
+        yield Spacer(1, 10)
+        yield from _single_file_flowables(report, report.files[0])
+    else:
+        yield Paragraph("📊 REPORTE DE TRANSCRIPCIÓN MASIVA", styles.title)
+        yield Spacer(1, 10)
+        yield from _batch_flowables(report)
+    yield from report_footer()
+
+
+def _label_table(rows: List[List[str]], style: str = 'metadata') -> Table:
+    return Table(rows, colWidths=[4.5*inch, 3*inch], style=table_style(style))
+
+
+def _single_file_flowables(report: Report, entry: FileReport) -> Iterator[Flowable]:
+    styles = report_styles()
+    found = entry.found_keywords
+
+    yield Paragraph("📊 INFORMACIÓN DEL ARCHIVO", styles.subtitle)
+    yield _label_table([
+        ['📁 Nombre del archivo:', entry.filename],
+        ['📅 Fecha de procesamiento:', report.generated_at.strftime("%d/%m/%Y %H:%M:%S")],
+        ['⏱️ Duración del audio:', _duration_label(entry.duration)],
+        ['⚡ Tiempo de procesamiento:', f"{entry.processing_time:.2f} segundos"],
+        ['🤖 Modelo utilizado:', report.model_name or "N/A"],
+        ['🌐 Idioma:', format_language(entry.language, entry.language_probability)],
+        ['🔍 Palabras clave buscadas:', _keywords_label(report.keywords)]
+    ])
+    yield Spacer(1, 20)
+
+    if report.keywords:
+        yield Paragraph("🎯 ANÁLISIS DE PALABRAS CLAVE", styles.subtitle)
+        if found:
+            yield Paragraph(f"✅ <b>Palabras encontradas ({len(found)}):</b>", styles.normal)
+            yield Paragraph("<br/>".join(f"• <font color='#2a5298'><b>{escape(word)}</b></font>" for word in found),
+                            styles.normal)
+        else:
+            yield Paragraph("❌ <b>No se encontraron las palabras clave especificadas</b>", styles.normal)
+
+        not_found = [keyword for keyword in report.keywords if keyword not in found]
+        if not_found:
+            yield Spacer(1, 10)
+            yield Paragraph(f"⚠️ <b>Palabras no encontradas ({len(not_found)}):</b>", styles.normal)
+            yield Paragraph("<br/>".join(f"• <font color='#666666'>{escape(word)}</font>" for word in not_found),
+                            styles.normal)
+        yield Spacer(1, 20)
+
+    segments, relevant = entry.hit_segments(report.keywords)
+    yield Paragraph("📈 ESTADÍSTICAS DEL TEXTO", styles.subtitle)
+    minutes = entry.processing_time / 60
+    stats = [
+        ['📝 Total de palabras:', f"{entry.word_count:,}"],
+        ['🔤 Total de caracteres:', f"{len(entry.transcription):,}"],
+        ['📏 Promedio palabras/minuto:', f"{entry.word_count / max(minutes, 1):.0f}" if minutes > 0 else "N/A"]
+    ]
+    if segments:
+        stats.extend([
+            ['⏱️ Total de segmentos:', f"{len(segments)}"],
+            ['🎯 Segmentos con palabras clave:', f"{len(relevant)}"]
+        ])
+    if segments.labels:
+        # Párrafos: con varios hablantes el texto no cabe en una línea de la columna
+        speaking = ", ".join(f"{speaker} ({format_clock(seconds)})"
+                             for speaker, seconds in segments.speaker_seconds().items())
+        stats.append(['🗣️ Tiempo de habla:', Paragraph(escape(speaking), styles.meta)])
+        if relevant:
+            stats.append(['🎯 Coincidencias por hablante:', Paragraph(escape(_speaker_counts(relevant)), styles.meta)])
+    yield _label_table(stats)
+    yield Spacer(1, 20)
+
+    yield Paragraph("📝 TRANSCRIPCIÓN COMPLETA", styles.subtitle)
+    if entry.transcription:
+        # Un párrafo por línea para que la maquetación pueda partir entre páginas
+        for para in entry.transcription.split('\n'):
+            if para.strip():
+                yield Paragraph(highlight_markup(para.strip(), found), styles.normal)
+                yield Spacer(1, 8)
+    else:
+        yield Paragraph("No se pudo obtener la transcripción.", styles.normal)
+
+    if relevant:
+        yield PageBreak()
+        yield Paragraph("⏱️ SEGMENTOS CON PALABRAS CLAVE", styles.subtitle)
+        yield Paragraph("Los siguientes segmentos contienen las palabras clave especificadas, "
+                        "organizados cronológicamente:", styles.normal)
+        yield Spacer(1, 15)
+        yield _label_table([
+            ['📊 Total de segmentos analizados:', f"{len(segments)}"],
+            ['🎯 Segmentos con palabras clave:', f"{len(relevant)}"],
+            ['📈 Porcentaje de relevancia:', f"{len(relevant) / len(segments) * 100:.1f}%"]
+        ], style='boxed')
+        yield Spacer(1, 20)
+        yield Paragraph("🔍 <b>Análisis Temporal:</b> Los segmentos se muestran en orden cronológico. Las palabras "
+                        "clave están resaltadas en <font color='#d32f2f'><b>rojo</b></font>.", styles.normal)
+        yield Spacer(1, 15)
+
+        for i, segment in enumerate(relevant, 1):
+            yield Table([[f"🎯 Segmento #{segment.index}{_speaker_label(segment)}",
+                          f"⏱️ {segment.start_time} → {segment.end_time}"]],
+                        colWidths=[4*inch, 3.5*inch], style=table_style('segment_header'))
+            yield Paragraph(highlight_markup(segment.text, found), styles.segment)
+            # Separador visual cada 3 segmentos
+            if i % 3 == 0 and i < len(relevant):
+                yield Spacer(1, 5)
+                yield Paragraph("─" * 80, styles.separator)
+                yield Spacer(1, 5)
+
+        yield Spacer(1, 20)
+        yield Paragraph(f"""
+        <para align="center">
+            <b>📍 RESUMEN TEMPORAL</b><br/>
+            <font size="10">Primera aparición: {relevant[0].start_time} | Última aparición: {relevant[-1].end_time}</font><br/>
+            <font size="10">Distribución: {len(relevant)} momentos relevantes identificados</font>
+        </para>
+        """, styles.timing_summary)
+
+    elif segments:
+        yield PageBreak()
+        yield Paragraph("⏱️ ANÁLISIS TEMPORAL", styles.subtitle)
+        yield Paragraph("Se analizaron los segmentos temporales del audio, pero ninguno contiene las palabras clave "
+                        "especificadas.", styles.normal)
+        yield _label_table([
+            ['📊 Total de segmentos analizados:', f"{len(segments)}"],
+            ['🎯 Segmentos con palabras clave:', "0"],
+            ['💡 Recomendación:', "Verificar ortografía de palabras clave o usar sinónimos"]
+        ], style='warning')
+
+
+def _batch_flowables(report: Report) -> Iterator[Flowable]:
+    styles = report_styles()
+    total_files = len(report.files)
+
+    yield Paragraph("📈 INFORMACIÓN DE LOS ARCHIVOS", styles.subtitle)
+    yield _label_table([
+        ['📁 Total de archivos procesados:', f"{total_files}"],
+        ['✅ Transcripciones exitosas:', f"{report.successful}"],
+        ['📅 Fecha de procesamiento:', report.generated_at.strftime("%d/%m/%Y %H:%M:%S")],
+        ['⏱️ Duración total de audio:',
+         f"{report.total_duration:.1f} segundos ({report.total_duration / 60:.1f} minutos)"],
+        ['⚡ Tiempo total de procesamiento:', f"{report.total_processing:.1f} segundos"],
+        ['📝 Total de palabras transcritas:', f"{report.total_words:,}"],
+        ['🎯 Archivos con palabras clave:', f"{report.files_with_keywords}"],
+        ['🌐 Idiomas:', report.languages],
+        ['🔍 Palabras clave buscadas:', _keywords_label(report.keywords)]
+    ])
+    yield Spacer(1, 20)
+
+    if report.keywords:
+        yield Paragraph("🎯 ANÁLISIS GLOBAL DE PALABRAS CLAVE", styles.subtitle)
+        if report.found_keywords:
+            yield Paragraph("📊 <b>Estadísticas de aparición:</b>", styles.normal)
+            for keyword, count in report.keyword_counts.items():
+                percentage = count / total_files * 100 if total_files else 0
+                color = "#2a5298" if count > 0 else "#666666"
+                yield Paragraph(f"• <font color='{color}'><b>{escape(keyword)}:</b> {count} archivos "
+                                f"({percentage:.1f}%)</font>", styles.normal)
+        else:
+            yield Paragraph("❌ <b>No se encontraron las palabras clave en ningún archivo</b>", styles.normal)
+        yield Spacer(1, 20)
+
+    yield Paragraph("📄 DETALLE POR ARCHIVO", styles.subtitle)
+    for i, entry in enumerate(report.files, 1):
+        yield Paragraph(f"📁 {i}. {escape(entry.filename)}", styles.file_header)
+        yield Table([
+            ['⏱️ Duración:', f"{entry.duration:.1f}s"],
+            ['⚡ Tiempo de procesamiento:', f"{entry.processing_time:.1f}s"],
+            ['📝 Palabras transcritas:', f"{entry.word_count}"],
+            ['🌐 Idioma:', format_language(entry.language, entry.language_probability)],
+            ['🎯 Palabras clave encontradas:', _keywords_label(entry.found_keywords)]
+        ], colWidths=[2.5*inch, 4.5*inch], style=table_style('file'))
+
+        if entry.transcription:
+            yield Spacer(1, 10)
+            yield Paragraph("📝 <b>Transcripción:</b>", styles.normal)
+            excerpt = entry.transcription
+            if len(excerpt) > EXCERPT_CHARS:
+                excerpt = excerpt[:EXCERPT_CHARS] + "..."
+            yield Paragraph(highlight_markup(excerpt, entry.found_keywords), styles.transcription)
+
+        # El SRT se lee solo al llegar a este archivo
+        if entry.found_keywords:
+            _, relevant = entry.hit_segments(entry.found_keywords)
+            if relevant:
+                yield Spacer(1, 10)
+                yield Paragraph(f"⏱️ <b>Segmentos con palabras clave ({len(relevant)}):</b>", styles.normal)
+                by_speaker = _speaker_counts(relevant)
+                if by_speaker:
+                    yield Paragraph(f"🗣️ <b>Por hablante:</b> {escape(by_speaker)}", styles.meta)
+                for segment in relevant:
+                    yield Paragraph(
+                        f"<font color='#2a5298'><b>{segment.start_time} → {segment.end_time}"
+                        f"{escape(_speaker_label(segment))}</b></font>&nbsp;&nbsp;"
+                        f"{highlight_markup(segment.text, entry.found_keywords)}",
+                        styles.meta
+                    )
+
+        yield Spacer(1, 15)
+        if i % 3 == 0 and i < total_files:
+            yield Paragraph("─" * 80, styles.separator)
+            yield Spacer(1, 10)
+
+
+# ____________________________ Markdown ____________________________
+
+def render_markdown(report: Report) -> str:
+    """Reporte en Markdown (el que acompaña al ZIP de resultados)"""
+    out = io.StringIO()
+    if report.single:
+        entry = report.files[0]
+        out.write(f"""# 📄 Reporte de Transcripción de Audio
+
+## 📊 Información del Archivo
+- **Nombre del archivo:** {entry.filename}
+- **Fecha de procesamiento:** {report.generated_at.strftime("%d/%m/%Y %H:%M:%S")}
+- **Duración del audio:** {_duration_label(entry.duration)}
+- **Tiempo de procesamiento:** {entry.processing_time:.2f} segundos
+- **Modelo utilizado:** {report.model_name or "N/A"}
+- **Idioma:** {format_language(entry.language, entry.language_probability)}
+- **Palabras:** {entry.word_count:,}
+
+## 🔍 Palabras Clave Buscadas
+{_keywords_label(report.keywords)}
+
+**Encontradas:** {_keywords_label(entry.found_keywords)}
+
+## 📝 Transcripción Completa
+{entry.transcription or "No se pudo obtener la transcripción."}
+""")
+        _markdown_segments(out, entry, report.keywords)
+        return out.getvalue()
+
+    out.write(f"""# 📊 Reporte de Transcripción Masiva
+
+## 📈 Estadísticas Generales
+- **Total de archivos procesados:** {len(report.files)}
+- **Transcripciones exitosas:** {report.successful}
+- **Duración total de audio:** {report.total_duration:.1f} segundos ({report.total_duration / 60:.1f} minutos)
+- **Tiempo total de procesamiento:** {report.total_processing:.1f} segundos
+- **Total de palabras transcritas:** {report.total_words:,}
+- **Archivos con palabras clave:** {report.files_with_keywords}
+- **Idiomas:** {report.languages}
+
+## 🔍 Palabras Clave Buscadas
+{_keywords_label(report.keywords)}
+
+## 📄 Detalle por Archivo
+""")
+    for entry in report.files:
+        out.write(f"""
+### {"✅" if entry.ok else "❌"} {entry.filename}
+- **Duración:** {entry.duration:.1f}s
+- **Tiempo de procesamiento:** {entry.processing_time:.1f}s
+- **Palabras:** {entry.word_count}
+- **Idioma:** {format_language(entry.language, entry.language_probability)}
+- **Palabras clave encontradas:** {_keywords_label(entry.found_keywords)}
+""")
+    return out.getvalue()
+
+
+def _markdown_segments(out: io.StringIO, entry: FileReport, keywords: Sequence[str]):
+    _, relevant = entry.hit_segments(keywords)
+    if not relevant:
+        return
+    out.write(f"\n## ⏱️ Segmentos con Palabras Clave ({len(relevant)})\n")
+    by_speaker = _speaker_counts(relevant)
+    if by_speaker:
+        out.write(f"\n🗣️ **Por hablante:** {by_speaker}\n\n")
+    for segment in relevant:
+        text = ' '.join(segment.text.split())
+        out.write(f"- **{segment.start_time} → {segment.end_time}{_speaker_label(segment)}** {text}\n")
+
+
+# ______________________________ HTML ______________________________
+
+_HTML_STYLE = """
+body { font-family: Helvetica, Arial, sans-serif; color: #222; max-width: 960px; margin: 2em auto; padding: 0 1em; }
+h1 { color: #1e3c72; text-align: center; }
+h2 { color: #2a5298; border-bottom: 1px solid #e1e8ed; padding-bottom: 4px; }
+h3 { color: #1e3c72; }
+table { border-collapse: collapse; margin: 0.5em 0 1em; }
+td { padding: 4px 12px; border: 1px solid #e1e5e9; vertical-align: top; }
+td:first-child { font-weight: bold; color: #1e3c72; background: #f8f9fa; }
+.text { white-space: pre-wrap; line-height: 1.5; border: 1px solid #e1e8ed; padding: 10px; }
+.segment { margin: 6px 0; padding: 6px 10px; border-left: 3px solid #d32f2f; background: #fff3e0; }
+.time { color: #d32f2f; font-weight: bold; font-size: 12px; }
+footer { margin-top: 3em; font-size: 12px; color: #666; text-align: center; }
+"""
+
+
+def _html_table(rows: List[Tuple[str, str]]) -> str:
+    return '<table>' + ''.join(
+        f'<tr><td>{html.escape(label)}</td><td>{html.escape(value)}</td></tr>' for label, value in rows
+    ) + '</table>'
+
+
+def render_html(report: Report) -> str:
+    """Reporte en HTML autocontenido, con las palabras clave resaltadas"""
+    out = io.StringIO()
+    out.write(f'<!DOCTYPE html>\n<html lang="es"><head><meta charset="utf-8">'
+              f'<title>{html.escape(report.title)}</title><style>{_HTML_STYLE}</style></head><body>')
+    out.write(f'<h1>{html.escape(report.title)}</h1>')
+
+    if report.single:
+        entry = report.files[0]
+        out.write('<h2>📊 Información del archivo</h2>')
+        out.write(_html_table([
+            ('Nombre del archivo', entry.filename),
+            ('Fecha de procesamiento', report.generated_at.strftime("%d/%m/%Y %H:%M:%S")),
+            ('Duración del audio', _duration_label(entry.duration)),
+            ('Tiempo de procesamiento', f"{entry.processing_time:.2f} segundos"),
+            ('Modelo utilizado', report.model_name or "N/A"),
+            ('Idioma', format_language(entry.language, entry.language_probability)),
+            ('Palabras', f"{entry.word_count:,}"),
+            ('Palabras clave buscadas', _keywords_label(report.keywords)),
+            ('Palabras clave encontradas', _keywords_label(entry.found_keywords)),
+        ]))
+        out.write('<h2>📝 Transcripción completa</h2>')
+        out.write(f'<div class="text">{highlight_segment_text(entry.transcription, entry.found_keywords)}</div>')
+        _html_segments(out, entry, report.keywords)
+    else:
+        out.write('<h2>📈 Estadísticas generales</h2>')
+        out.write(_html_table([
+            ('Total de archivos procesados', f"{len(report.files)}"),
+            ('Transcripciones exitosas', f"{report.successful}"),
+            ('Fecha de procesamiento', report.generated_at.strftime("%d/%m/%Y %H:%M:%S")),
+            ('Duración total de audio', f"{report.total_duration:.1f} segundos ({report.total_duration / 60:.1f} minutos)"),
+            ('Tiempo total de procesamiento', f"{report.total_processing:.1f} segundos"),
+            ('Total de palabras transcritas', f"{report.total_words:,}"),
+            ('Archivos con palabras clave', f"{report.files_with_keywords}"),
+            ('Idiomas', report.languages),
+            ('Palabras clave buscadas', _keywords_label(report.keywords)),
+        ]))
+        if report.keywords:
+            out.write('<h2>🎯 Aparición de palabras clave</h2>')
+            out.write(_html_table([
+                (keyword, f"{count} archivos") for keyword, count in report.keyword_counts.items()
+            ]))
+        out.write('<h2>📄 Detalle por archivo</h2>')
+        for entry in report.files:
+            out.write(f'<h3>{"✅" if entry.ok else "❌"} {html.escape(entry.filename)}</h3>')
+            out.write(_html_table([
+                ('Duración', f"{entry.duration:.1f}s"),
+                ('Tiempo de procesamiento', f"{entry.processing_time:.1f}s"),
+                ('Palabras', f"{entry.word_count}"),
+                ('Idioma', format_language(entry.language, entry.language_probability)),
+                ('Palabras clave encontradas', _keywords_label(entry.found_keywords)),
+            ]))
+            if entry.transcription:
+                out.write('<details><summary>Transcripción</summary>'
+                          f'<div class="text">{highlight_segment_text(entry.transcription, entry.found_keywords)}'
+                          '</div></details>')
+            if entry.found_keywords:
+                _html_segments(out, entry, entry.found_keywords)
+
+    out.write('<footer>Reporte generado automáticamente por el Sistema VoiceWise AI<br/>'
+              'Instituto Universitario Rumiñahui - Departamento de Investigación<br/>'
+              f'{report.generated_at.strftime("%d/%m/%Y %H:%M:%S")}</footer></body></html>')
+    return out.getvalue()
+
+
+def _html_segments(out: io.StringIO, entry: FileReport, keywords: Sequence[str]):
+    _, relevant = entry.hit_segments(keywords)
+    if not relevant:
+        return
+    out.write(f'<h4>⏱️ Segmentos con palabras clave ({len(relevant)})</h4>')
+    by_speaker = _speaker_counts(relevant)
+    if by_speaker:
+        out.write(f'<p>🗣️ <b>Por hablante:</b> {html.escape(by_speaker)}</p>')
+    for segment in relevant:
+        out.write(f'<div class="segment"><span class="time">{segment.start_time} → {segment.end_time}'
+                  f'{html.escape(_speaker_label(segment))}</span> '
+                  f'{highlight_segment_text(segment.text, keywords)}</div>')
+
+
+# ____________________________ Descargas ____________________________
+
+REPORT_FORMATS = {
+    'pdf': ("📄 PDF", "application/pdf", render_pdf),
+    'md': ("📝 Markdown", "text/markdown", render_markdown),
+    'html': ("🌐 HTML", "text/html", render_html),
+}
+
+
+def render_report_downloads(report, file_prefix: str, key: str, metrics: Optional[JobMetrics] = None,
+                            artifact: Callable[[str, Callable[[], bytes]], bytes] = None):
+    """
+    Botón principal para el PDF y botones secundarios para Markdown y HTML.
+    `report` puede ser el modelo o una función que lo construye; con `artifact(nombre, generar)`
+    cada formato se genera una sola vez y las siguientes ejecuciones solo lo leen.
+    """
+    built = []
+
+    def get_report() -> Report:
+        if not built:
+            built.append(report() if callable(report) else report)
+        return built[0]
+
+    def content(fmt: str, render: Callable[[Report], bytes]) -> bytes:
+        generate = lambda: render(get_report())
+        return artifact(f"{file_prefix}.{fmt}", generate) if artifact is not None else generate()
+
+    generated_at = report.generated_at if isinstance(report, Report) else datetime.now()
+    timestamp = generated_at.strftime("%Y%m%d_%H%M%S")
+    with track(metrics, 'reporte_pdf'):
+        pdf_content = content('pdf', render_pdf)
+    st.download_button(
+        label="📄 Descargar Reporte Completo (PDF)",
+        data=pdf_content,
+        file_name=f"{file_prefix}_{timestamp}.pdf",
+        mime="application/pdf",
+        help="Reporte profesional con transcripción, análisis de palabras clave y estadísticas",
+        use_container_width=True,
+        type="primary",
+        key=f"{key}_pdf"
+    )
+    col_md, col_html = st.columns(2)
+    for column, fmt in ((col_md, 'md'), (col_html, 'html')):
+        label, mime, render = REPORT_FORMATS[fmt]
+        with column:
+            st.download_button(
+                label=label,
+                data=content(fmt, lambda model, render=render: render(model).encode('utf-8')),
+                file_name=f"{file_prefix}_{timestamp}.{fmt}",
+                mime=mime,
+                use_container_width=True,
+                key=f"{key}_{fmt}"
+            )
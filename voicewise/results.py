@@ -0,0 +1,179 @@
+"""
+Resultados de lotes en disco con resúmenes precalculados.
+
+Un lote de cientos de archivos no debe vivir entero en session_state: cada
+transcripción se escribe una vez en el directorio del trabajo y la sesión
+solo guarda un manejador ligero por archivo (metadatos, coincidencias y
+rutas). El texto se lee del disco cuando una vista lo necesita, los totales
+del lote se calculan una sola vez al cerrarlo y los archivos de descarga
+(reportes, ZIP, tablas) se generan una vez y se guardan junto a los
+resultados para que las siguientes ejecuciones del script solo los lean.
+"""
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from voicewise.timeline import KeywordHit
+
+_TEXT_CACHE_SIZE = 32
+
+
+@dataclass
+class TranscriptionResult:
+    """Resultado de un archivo recién transcrito, antes de pasar al almacén"""
+    filename: str
+    filepath: str
+    transcription: str
+    duration: float
+    processing_time: float
+    found_keywords: List[str]
+    word_count: int
+    srt_path: str = None
+    language: str = None
+    language_probability: float = None   # solo si el idioma se detectó automáticamente
+    hits: List[KeywordHit] = field(default_factory=list)
+    preview_path: str = None
+    reused_from: str = None              # punto de control o archivo idéntico del que se copió
+    triage_stopped_at: float = None      # triaje: solo se decodificó hasta aquí (pendiente de transcripción completa)
+
+
+@dataclass
+class StoredResult:
+    """Manejador de un archivo transcrito; el texto queda en disco"""
+    filename: str
+    filepath: str
+    text_path: Optional[str]
+    duration: float
+    processing_time: float
+    found_keywords: List[str]
+    word_count: int
+    srt_path: str = None
+    language: str = None
+    language_probability: float = None
+    hits: List[KeywordHit] = field(default_factory=list)
+    preview_path: str = None
+    reused_from: str = None
+    triage_stopped_at: float = None
+    store: 'ResultStore' = field(default=None, repr=False, compare=False)
+
+    @property
+    def transcription(self) -> str:
+        return self.store.read_text(self.text_path) if self.store is not None else ''
+
+
+@dataclass
+class BatchSummary:
+    files: int = 0
+    successful: int = 0
+    with_keywords: int = 0
+    total_words: int = 0
+    total_duration: float = 0.0
+    total_processing: float = 0.0
+    flagged: int = 0              # cribados en modo triaje, pendientes de transcripción completa
+    keyword_counts: Dict[str, int] = field(default_factory=dict)
+
+
+class ResultStore:
+    """Directorio de un trabajo por lotes: textos, manejadores y descargas generadas"""
+
+    def __init__(self, keywords: Sequence[str], directory: str = None):
+        self.keywords = list(keywords)
+        self.directory = directory or tempfile.mkdtemp(prefix="voicewise_lote_")
+        self.results: List[StoredResult] = []
+        self.summary = BatchSummary()
+        self.total_time = 0.0
+        self._texts: 'OrderedDict[str, str]' = OrderedDict()
+
+    def _text_path(self, name: str) -> str:
+        return os.path.join(self.directory, 'textos', name)
+
+    def add(self, result, text_path: str = None) -> StoredResult:
+        """
+        Guardar un resultado con texto (p. ej. TranscriptionResult) y devolver su manejador.
+        Si el texto ya está escrito en disco (el TXT de salida), basta con indicar su ruta.
+        """
+        if text_path is None and result.transcription:
+            os.makedirs(self._text_path(''), exist_ok=True)
+            fd, text_path = tempfile.mkstemp(suffix='.txt', dir=self._text_path(''))
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(result.transcription)
+        return StoredResult(
+            filename=result.filename,
+            filepath=result.filepath,
+            text_path=text_path,
+            duration=result.duration,
+            processing_time=result.processing_time,
+            found_keywords=list(result.found_keywords),
+            word_count=result.word_count,
+            srt_path=result.srt_path,
+            language=result.language,
+            language_probability=result.language_probability,
+            hits=list(result.hits),
+            preview_path=result.preview_path,
+            reused_from=result.reused_from,
+            triage_stopped_at=getattr(result, 'triage_stopped_at', None),
+            store=self
+        )
+
+    def read_text(self, path: Optional[str]) -> str:
+        """Texto de una transcripción; se conservan en memoria solo los últimos leídos"""
+        if not path:
+            return ''
+        if path in self._texts:
+            self._texts.move_to_end(path)
+            return self._texts[path]
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError:
+            return ''
+        self._texts[path] = text
+        if len(self._texts) > _TEXT_CACHE_SIZE:
+            self._texts.popitem(last=False)
+        return text
+
+    def finish(self, results: Sequence[StoredResult], total_time: float):
+        """Fijar los resultados del lote (en orden de presentación) y calcular los totales una vez"""
+        self.results = list(results)
+        self.total_time = total_time
+        summary = BatchSummary(files=len(self.results), keyword_counts={keyword: 0 for keyword in self.keywords})
+        for result in self.results:
+            summary.successful += bool(result.text_path)
+            summary.with_keywords += bool(result.found_keywords)
+            summary.total_words += result.word_count
+            summary.total_duration += result.duration or 0.0
+            summary.total_processing += result.processing_time or 0.0
+            summary.flagged += result.triage_stopped_at is not None
+            for keyword in result.found_keywords:
+                if keyword in summary.keyword_counts:
+                    summary.keyword_counts[keyword] += 1
+        self.summary = summary
+        self._texts.clear()
+
+    def page(self, number: int, size: int) -> List[StoredResult]:
+        return self.results[(number - 1) * size:number * size]
+
+    def artifact(self, name: str, build: Callable[[], bytes]) -> bytes:
+        """Archivo de descarga generado una sola vez por trabajo"""
+        path = os.path.join(self.directory, 'descargas', name)
+        if not os.path.exists(path):
+            data = build()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+            return data
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def __iter__(self) -> Iterator[StoredResult]:
+        return iter(self.results)
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def cleanup(self):
+        self._texts.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,188 @@
+"""
+Planificación de lotes por duración.
+
+Las duraciones se estiman antes de transcribir leyendo solo las cabeceras de
+cada audio dentro del ZIP (WAV, FLAC y MP3 exactos o casi; el resto por
+tamaño y bitrate típico). Con ellas se despacha primero lo más largo o se
+reparte por bin packing (LPT) entre los workers, y se calcula el ETA a partir
+del factor de tiempo real medido durante el lote.
+"""
+import heapq
+import struct
+import wave
+from dataclasses import dataclass
+from typing import IO, List, Optional
+
+from voicewise.zip_ingest import ZipAudioArchive, ZipAudioMember
+
+STRATEGIES = {
+    'natural': 'Orden natural',
+    'longest_first': 'Más largos primero',
+    'bin_packing': 'Bin packing entre workers',
+}
+
+# Bitrates típicos (bits/s) para estimar la duración cuando no hay cabecera útil
+_FALLBACK_BITRATES = {
+    '.mp3': 128000,
+    '.m4a': 128000,
+    '.aac': 128000,
+    '.flac': 700000,
+    '.wav': 256000,
+    '.wave': 256000,
+}
+
+_MP3_BITRATES = {
+    # (versión MPEG 1, capa III) y (MPEG 2/2.5, capa III) en kbps
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+@dataclass
+class DurationEstimate:
+    seconds: float
+    exact: bool
+
+
+def _wav_duration(stream: IO[bytes]) -> Optional[float]:
+    try:
+        with wave.open(stream, 'rb') as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (wave.Error, EOFError, ZeroDivisionError):
+        return None
+
+
+def _flac_duration(header: bytes) -> Optional[float]:
+    # 'fLaC' + cabecera de bloque (4 bytes) + STREAMINFO
+    if len(header) < 26 or header[:4] != b'fLaC':
+        return None
+    info = header[8:]
+    sample_rate = (info[10] << 12) | (info[11] << 4) | (info[12] >> 4)
+    total_samples = ((info[13] & 0x0F) << 32) | struct.unpack('>I', info[14:18])[0]
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+def _mp3_duration(header: bytes, file_size: int) -> Optional[DurationEstimate]:
+    offset = 0
+    # Saltar la etiqueta ID3v2 si existe (tamaño en enteros "syncsafe")
+    if header[:3] == b'ID3' and len(header) >= 10:
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        offset = 10 + size
+        if offset + 4 > len(header):
+            return None
+    # Buscar la primera trama válida
+    for pos in range(offset, len(header) - 4):
+        if header[pos] != 0xFF or (header[pos + 1] & 0xE0) != 0xE0:
+            continue
+        version_bits = (header[pos + 1] >> 3) & 0x03
+        layer_bits = (header[pos + 1] >> 1) & 0x03
+        bitrate_index = header[pos + 2] >> 4
+        rate_index = (header[pos + 2] >> 2) & 0x03
+        if version_bits == 1 or layer_bits != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+        mpeg1 = version_bits == 3
+        bitrate = _MP3_BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+        samples_per_frame = 1152 if mpeg1 else 576
+        mono = (header[pos + 3] >> 6) == 3
+        side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+        # Cabecera Xing/Info (VBR): número exacto de tramas
+        xing = pos + 4 + side_info
+        if header[xing:xing + 4] in (b'Xing', b'Info') and len(header) >= xing + 12:
+            flags = struct.unpack('>I', header[xing + 4:xing + 8])[0]
+            if flags & 0x01:
+                frames = struct.unpack('>I', header[xing + 8:xing + 12])[0]
+                return DurationEstimate(frames * samples_per_frame / sample_rate, True)
+        return DurationEstimate((file_size - pos) * 8 / bitrate, False)
+    return None
+
+
+def estimate_duration(archive: ZipAudioArchive, member: ZipAudioMember) -> DurationEstimate:
+    """Estimar la duración de un audio del ZIP leyendo solo su cabecera"""
+    ext = '.' + member.filename.rsplit('.', 1)[-1].lower()
+    try:
+        if ext in ('.wav', '.wave'):
+            with archive.open(member) as stream:
+                seconds = _wav_duration(stream)
+            if seconds is not None:
+                return DurationEstimate(seconds, True)
+        elif ext in ('.flac', '.mp3'):
+            with archive.open(member) as stream:
+                header = stream.read(64 * 1024)
+            if ext == '.flac':
+                seconds = _flac_duration(header)
+                if seconds is not None:
+                    return DurationEstimate(seconds, True)
+            else:
+                estimate = _mp3_duration(header, member.file_size)
+                if estimate is not None:
+                    return estimate
+    except Exception:
+        pass
+    return DurationEstimate(member.file_size * 8 / _FALLBACK_BITRATES.get(ext, 128000), False)
+
+
+@dataclass
+class Schedule:
+    order: List[int]                    # índices en orden de despacho
+    assignment: Optional[List[int]]     # worker asignado a cada índice (solo bin packing)
+    makespan: float                     # duración estimada del worker más cargado
+
+
+def plan_schedule(durations: List[float], workers: int = 1, strategy: str = 'longest_first') -> Schedule:
+    """Calcular el orden de despacho (y la asignación a workers) para un lote"""
+    workers = max(1, workers)
+    indices = list(range(len(durations)))
+    if strategy == 'natural':
+        order = indices
+    else:
+        order = sorted(indices, key=lambda i: durations[i], reverse=True)
+
+    # Simulación de la cola: cada archivo va al worker que se libera antes (LPT)
+    heap = [(0.0, w) for w in range(workers)]
+    assignment = [0] * len(durations)
+    start_times = [0.0] * len(durations)
+    for i in order:
+        load, worker = heapq.heappop(heap)
+        assignment[i] = worker
+        start_times[i] = load
+        heapq.heappush(heap, (load + durations[i], worker))
+    makespan = max(load for load, _ in heap) if durations else 0.0
+
+    if strategy == 'bin_packing':
+        # Decodificar en el orden en que cada worker empezará su siguiente archivo
+        order = sorted(order, key=lambda i: start_times[i])
+        return Schedule(order, assignment, makespan)
+    return Schedule(order, None, makespan)
+
+
+class EtaEstimator:
+    """ETA a partir del factor de tiempo real (RTF) medido en el propio lote"""
+
+    def __init__(self, total_audio_seconds: float, workers: int = 1):
+        self.remaining_audio = total_audio_seconds
+        self.workers = max(1, workers)
+        self.done_audio = 0.0
+        self.done_processing = 0.0
+
+    def update(self, audio_seconds: float, processing_seconds: float, estimated_seconds: float = None):
+        """Registrar un archivo terminado; estimated_seconds es lo que se había planificado para él"""
+        self.done_audio += audio_seconds
+        self.done_processing += processing_seconds
+        planned = audio_seconds if estimated_seconds is None else estimated_seconds
+        self.remaining_audio = max(self.remaining_audio - planned, 0.0)
+
+    @property
+    def real_time_factor(self) -> Optional[float]:
+        if self.done_audio <= 0:
+            return None
+        return self.done_processing / self.done_audio
+
+    def remaining_seconds(self) -> Optional[float]:
+        rtf = self.real_time_factor
+        if rtf is None:
+            return None
+        return self.remaining_audio * rtf / self.workers
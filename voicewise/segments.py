@@ -0,0 +1,255 @@
+"""
+Representación compacta de los segmentos de una transcripción.
+
+Los tiempos se guardan como segundos en arrays float64, los textos en un
+único buffer con una tabla de desplazamientos y las coincidencias de
+palabras clave en un bitset. Si la transcripción distingue hablantes (p. ej.
+un canal por interlocutor), cada segmento lleva además el código de su
+etiqueta; en el SRT la etiqueta va como prefijo '[Agente] texto'. Ordenar, filtrar por rango de tiempo o sumar
+duraciones no vuelve a interpretar marcas '00:01:02,500': el formato SRT
+solo se genera al mostrar un segmento o al exportar.
+"""
+import io
+import re
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+_TIME_LINE = re.compile(r'(\d{2}):(\d{2}):(\d{2}),(\d{3}) --> (\d{2}):(\d{2}):(\d{2}),(\d{3})')
+_SPEAKER_PREFIX = re.compile(r'\[([^\[\]\n]{1,40})\] (\S.*)', re.S)
+
+
+def timestamp_to_seconds(timestamp: str) -> float:
+    """Convertir una marca de tiempo SRT ('00:01:02,500') a segundos"""
+    clock, _, millis = timestamp.partition(',')
+    hours, minutes, seconds = clock.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(millis or 0) / 1000
+
+
+def format_srt_time(seconds: float) -> str:
+    """Convertir segundos a una marca de tiempo SRT ('00:01:02,500')"""
+    millis = int(round(seconds * 1000))
+    return f"{millis // 3600000:02d}:{millis // 60000 % 60:02d}:{millis // 1000 % 60:02d},{millis % 1000:03d}"
+
+
+class SRTSegment:
+    """Vista de un segmento; las marcas de tiempo SRT se formatean al pedirlas"""
+    __slots__ = ('index', 'start', 'end', 'text', 'speaker')
+
+    def __init__(self, index: int, start: float, end: float, text: str, speaker: Optional[str] = None):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.text = text
+        self.speaker = speaker
+
+    @property
+    def start_time(self) -> str:
+        return format_srt_time(self.start)
+
+    @property
+    def end_time(self) -> str:
+        return format_srt_time(self.end)
+
+    def __repr__(self) -> str:
+        return f"SRTSegment({self.index}, {self.start:.3f}, {self.end:.3f}, {self.text!r})"
+
+
+def speaker_text(segments: Sequence[Dict]) -> str:
+    """Texto con una línea por intervención, '[Hablante] texto'"""
+    return '\n'.join(f"[{segment['speaker']}] {segment['text'].strip()}" for segment in segments)
+
+
+def _split_speakers(texts: List[str]) -> Optional[List[str]]:
+    """
+    Etiquetas '[Hablante] ' al inicio de cada texto. Solo cuentan si todos los
+    segmentos la llevan: un '[Música]' suelto de Whisper no es un hablante.
+    """
+    matches = [_SPEAKER_PREFIX.fullmatch(text) for text in texts]
+    if not matches or not all(matches):
+        return None
+    texts[:] = [match.group(2) for match in matches]
+    return [match.group(1) for match in matches]
+
+
+def _keyword_mask(texts: Sequence[str], keywords: Sequence[str]) -> np.ndarray:
+    terms = [k.lower().strip() for k in keywords if k and k.strip()]
+    if not terms:
+        return np.zeros(len(texts), dtype=bool)
+    return np.fromiter((any(term in text.lower() for term in terms) for text in texts), dtype=bool, count=len(texts))
+
+
+class SegmentStore:
+    """Segmentos de una transcripción en arrays, con coincidencias para un conjunto de palabras clave"""
+    __slots__ = ('indices', 'starts', 'ends', 'offsets', 'buffer', 'hit_bits', 'keywords', 'speakers', 'labels')
+
+    def __init__(self, indices: np.ndarray, starts: np.ndarray, ends: np.ndarray, offsets: np.ndarray,
+                 buffer: str, hit_bits: np.ndarray, keywords: Sequence[str] = (),
+                 speakers: Optional[np.ndarray] = None, labels: Sequence[str] = ()):
+        self.indices = indices        # número de segmento (1..n en un SRT)
+        self.starts = starts          # segundos, float64
+        self.ends = ends
+        self.offsets = offsets        # n + 1 desplazamientos en `buffer`
+        self.buffer = buffer
+        self.hit_bits = hit_bits      # np.packbits de la máscara de coincidencias
+        self.keywords = tuple(keywords)
+        # Código de hablante por segmento (índice en `labels`; -1 sin etiqueta)
+        self.speakers = speakers if speakers is not None else np.full(len(starts), -1, dtype=np.int16)
+        self.labels = tuple(labels)
+
+    @classmethod
+    def from_columns(cls, indices: Sequence[int], starts: Sequence[float], ends: Sequence[float],
+                     texts: Sequence[str], keywords: Sequence[str] = (),
+                     speakers: Optional[Sequence[Optional[str]]] = None) -> 'SegmentStore':
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=offsets[1:])
+        labels: Dict[str, int] = {}
+        codes = None
+        if speakers is not None:
+            codes = np.fromiter(
+                (-1 if speaker is None else labels.setdefault(speaker, len(labels)) for speaker in speakers),
+                dtype=np.int16, count=len(texts)
+            )
+        return cls(
+            np.asarray(indices, dtype=np.int32),
+            np.asarray(starts, dtype=np.float64),
+            np.asarray(ends, dtype=np.float64),
+            offsets,
+            ''.join(texts),
+            np.packbits(_keyword_mask(texts, keywords)),
+            keywords,
+            codes,
+            list(labels)
+        )
+
+    @classmethod
+    def from_segments(cls, segments: Sequence[Dict], keywords: Sequence[str] = ()) -> 'SegmentStore':
+        """A partir de segmentos tipo Whisper (start, end y text en segundos; speaker opcional)"""
+        speakers = [segment.get('speaker') for segment in segments]
+        return cls.from_columns(
+            range(1, len(segments) + 1),
+            [float(segment['start']) for segment in segments],
+            [float(segment['end']) for segment in segments],
+            [segment['text'].strip() for segment in segments],
+            keywords,
+            speakers if any(speaker is not None for speaker in speakers) else None
+        )
+
+    @classmethod
+    def from_srt_text(cls, content: str, keywords: Sequence[str] = ()) -> 'SegmentStore':
+        indices, starts, ends, texts = [], [], [], []
+        for block in re.split(r'\n\s*\n', content.strip()):
+            lines = block.strip().split('\n')
+            if len(lines) < 3:
+                continue
+            match = _TIME_LINE.match(lines[1])
+            if not match or not lines[0].strip().isdigit():
+                continue
+            h1, m1, s1, ms1, h2, m2, s2, ms2 = map(int, match.groups())
+            indices.append(int(lines[0]))
+            starts.append(h1 * 3600 + m1 * 60 + s1 + ms1 / 1000)
+            ends.append(h2 * 3600 + m2 * 60 + s2 + ms2 / 1000)
+            texts.append('\n'.join(lines[2:]))
+        speakers = _split_speakers(texts)
+        return cls.from_columns(indices, starts, ends, texts, keywords, speakers)
+
+    @classmethod
+    def from_srt_file(cls, path: str, keywords: Sequence[str] = ()) -> 'SegmentStore':
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls.from_srt_text(f.read(), keywords)
+        except (OSError, UnicodeDecodeError):
+            return cls.from_columns([], [], [], [], keywords)
+
+    def with_keywords(self, keywords: Sequence[str]) -> 'SegmentStore':
+        """Mismos segmentos (arrays compartidos) con las coincidencias de otras palabras clave"""
+        texts = [self.text_at(i) for i in range(len(self))]
+        return SegmentStore(self.indices, self.starts, self.ends, self.offsets, self.buffer,
+                            np.packbits(_keyword_mask(texts, keywords)), keywords, self.speakers, self.labels)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def text_at(self, position: int) -> str:
+        return self.buffer[self.offsets[position]:self.offsets[position + 1]]
+
+    def speaker_at(self, position: int) -> Optional[str]:
+        code = int(self.speakers[position])
+        return self.labels[code] if code >= 0 else None
+
+    def __getitem__(self, position: int) -> SRTSegment:
+        return SRTSegment(int(self.indices[position]), float(self.starts[position]), float(self.ends[position]),
+                          self.text_at(position), self.speaker_at(position))
+
+    def __iter__(self) -> Iterator[SRTSegment]:
+        return (self[position] for position in range(len(self)))
+
+    @property
+    def hit_mask(self) -> np.ndarray:
+        return np.unpackbits(self.hit_bits, count=len(self)).astype(bool)
+
+    def is_hit(self, position: int) -> bool:
+        return bool(self.hit_bits[position >> 3] >> (7 - (position & 7)) & 1)
+
+    def hit_positions(self) -> np.ndarray:
+        return np.flatnonzero(self.hit_mask)
+
+    def miss_positions(self) -> np.ndarray:
+        return np.flatnonzero(~self.hit_mask)
+
+    def speaker_positions(self, labels: Sequence[str]) -> np.ndarray:
+        """Posiciones de los segmentos de los hablantes indicados"""
+        codes = [code for code, label in enumerate(self.labels) if label in labels]
+        return np.flatnonzero(np.isin(self.speakers, codes))
+
+    def speaker_seconds(self) -> Dict[str, float]:
+        """Tiempo de habla de cada hablante, en el orden de sus etiquetas"""
+        labeled = self.speakers >= 0
+        seconds = np.bincount(self.speakers[labeled], weights=(self.ends - self.starts)[labeled],
+                              minlength=len(self.labels))
+        return dict(zip(self.labels, seconds.tolist()))
+
+    def between(self, start: float, end: float) -> np.ndarray:
+        """Posiciones de los segmentos que se solapan con [start, end) segundos"""
+        if not len(self):
+            return np.zeros(0, dtype=np.int64)
+        # Los inicios están ordenados; el máximo acumulado de los fines también
+        first = int(np.searchsorted(np.maximum.accumulate(self.ends), start, side='right'))
+        last = int(np.searchsorted(self.starts, end, side='left'))
+        return np.arange(first, max(first, last))
+
+    @property
+    def speech_seconds(self) -> float:
+        return float(np.sum(self.ends - self.starts))
+
+    def to_srt(self, positions: Optional[Sequence[int]] = None) -> str:
+        """Texto SRT (de todos los segmentos o de las posiciones indicadas, renumerados)"""
+        positions = range(len(self)) if positions is None else positions
+        return '\n'.join(
+            f"{n}\n{format_srt_time(self.starts[p])} --> {format_srt_time(self.ends[p])}\n{self._labeled_text(p)}\n"
+            for n, p in enumerate(positions, 1)
+        )
+
+    def _labeled_text(self, position: int) -> str:
+        speaker = self.speaker_at(position)
+        return f"[{speaker}] {self.text_at(position)}" if speaker else self.text_at(position)
+
+    def to_bytes(self) -> bytes:
+        out = io.BytesIO()
+        np.savez(out, indices=self.indices, starts=self.starts, ends=self.ends, offsets=self.offsets,
+                 buffer=np.frombuffer(self.buffer.encode('utf-8'), dtype=np.uint8), hit_bits=self.hit_bits,
+                 keywords=np.array(self.keywords, dtype=str), speakers=self.speakers,
+                 labels=np.array(self.labels, dtype=str))
+        return out.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'SegmentStore':
+        with np.load(io.BytesIO(data)) as arrays:
+            return cls(arrays['indices'], arrays['starts'], arrays['ends'], arrays['offsets'],
+                       arrays['buffer'].tobytes().decode('utf-8'), arrays['hit_bits'],
+                       [str(keyword) for keyword in arrays['keywords']],
+                       arrays['speakers'] if 'speakers' in arrays else None,
+                       [str(label) for label in arrays['labels']] if 'labels' in arrays else ())
+
+    def __repr__(self) -> str:
+        return f"SegmentStore({len(self)} segmentos, {len(self.buffer)} caracteres)"
@@ -0,0 +1,104 @@
+"""
+Mapa de silencios y puntos de corte, vectorizados con NumPy.
+
+La energía del audio se calcula una sola vez por tramas de 10 ms. A partir
+de ese mapa, los silencios para cualquier duración mínima y umbral salen de
+sumas acumuladas, y los puntos de corte siguen la misma regla que el divisor
+de la página 3: cada fragmento se corta en el último silencio que empieza en
+sus 30 segundos finales.
+"""
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+FRAME_MS = 10
+SEARCH_WINDOW_MS = 30 * 1000
+_MIN_ENERGY = 1e-20
+
+
+@dataclass
+class SilenceMap:
+    frame_ms: int
+    energy: np.ndarray      # energía media (valor cuadrático medio) por trama, con muestras en [-1, 1]
+    dbfs: float             # sonoridad media del audio completo
+    duration_ms: int
+
+    @property
+    def envelope_db(self) -> np.ndarray:
+        """Envolvente de sonoridad en dBFS por trama"""
+        return 10 * np.log10(np.maximum(self.energy, _MIN_ENERGY))
+
+
+def build_silence_map(samples: np.ndarray, sample_rate: int, frame_ms: int = FRAME_MS) -> SilenceMap:
+    """Energía por trama de un audio mono con muestras en coma flotante en [-1, 1]"""
+    samples = np.asarray(samples, dtype=np.float32)
+    frame = max(1, sample_rate * frame_ms // 1000)
+    full = len(samples) // frame
+    squares = np.square(samples, dtype=np.float64)
+    energy = squares[:full * frame].reshape(full, frame).mean(axis=1)
+    if len(samples) > full * frame:
+        energy = np.append(energy, squares[full * frame:].mean())
+    total_energy = squares.mean() if len(samples) else 0.0
+    return SilenceMap(
+        frame_ms=frame_ms,
+        energy=energy,
+        dbfs=float(10 * np.log10(max(total_energy, _MIN_ENERGY))),
+        duration_ms=int(len(samples) * 1000 / sample_rate)
+    )
+
+
+def _silent_starts(smap: SilenceMap, min_silence_len: int, silence_thresh: float) -> np.ndarray:
+    """Para cada trama: ¿la ventana de min_silence_len que empieza en ella está bajo el umbral?"""
+    width = max(1, int(round(min_silence_len / smap.frame_ms)))
+    if len(smap.energy) < width:
+        return np.zeros(0, dtype=bool)
+    cumulative = np.concatenate(([0.0], np.cumsum(smap.energy)))
+    window_energy = (cumulative[width:] - cumulative[:-width]) / width
+    return window_energy <= 10 ** (silence_thresh / 10)
+
+
+def silent_ranges(smap: SilenceMap, min_silence_len: int = 1000, silence_thresh: float = -16) -> List[List[int]]:
+    """Rangos [inicio, fin] en ms de silencio de al menos min_silence_len (como pydub.silence.detect_silence)"""
+    starts = _silent_starts(smap, min_silence_len, silence_thresh)
+    if not starts.any():
+        return []
+    padded = np.concatenate(([False], starts, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    run_starts, run_ends = edges[0::2], edges[1::2] - 1
+    return [[int(s * smap.frame_ms), min(int(e * smap.frame_ms + min_silence_len), smap.duration_ms)]
+            for s, e in zip(run_starts, run_ends)]
+
+
+def cut_points(
+    smap: SilenceMap,
+    interval_ms: int,
+    silence_detection: bool = True,
+    min_silence_len: int = 1000,
+    silence_thresh_adjustment: int = 16
+) -> List[int]:
+    """
+    Límites de los fragmentos en ms, de 0 al final del audio.
+    Cada corte se adelanta al último silencio que empieza en los 30 s finales del fragmento.
+    """
+    total = smap.duration_ms
+    starts = _silent_starts(smap, min_silence_len, smap.dbfs - silence_thresh_adjustment) if silence_detection else None
+    width = max(1, int(round(min_silence_len / smap.frame_ms)))
+    boundaries = [0]
+    start = 0
+    while start < total:
+        end = min(start + interval_ms, total)
+        if starts is not None and end < total:
+            # Solo ventanas de silencio completas dentro del fragmento [start, end)
+            first, last = start // smap.frame_ms, end // smap.frame_ms - width
+            window = starts[first:last + 1] if last >= first else starts[:0]
+            if window.any():
+                run_starts = np.flatnonzero(window[1:] & ~window[:-1]) + 1
+                if window[0]:
+                    run_starts = np.concatenate(([0], run_starts))
+                candidate = start + int(run_starts[-1]) * smap.frame_ms
+                if candidate >= end - SEARCH_WINDOW_MS and candidate > start:
+                    end = candidate
+        boundaries.append(end)
+        start = end
+    return boundaries
@@ -0,0 +1,247 @@
+"""
+Lectura de SRT y visor paginado de segmentos.
+
+El visor solo construye el HTML de la página visible y lo envía en una única
+llamada a st.markdown, así el coste de cada rerun no depende de la longitud
+de la transcripción. El SRT se lee a un SegmentStore (tiempos en segundos y
+bitset de coincidencias) cacheado por archivo y palabras clave.
+"""
+import html
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+import numpy as np
+import streamlit as st
+
+from voicewise.metrics import JobMetrics, track
+from voicewise.segments import SegmentStore, SRTSegment, format_srt_time, timestamp_to_seconds
+
+PAGE_SIZES = [25, 50, 100]
+RANGE_FILTER_MIN_SECONDS = 120    # el filtro por rango de tiempo solo aparece en transcripciones más largas
+
+FILTER_HITS = "Solo segmentos con palabras clave"
+FILTER_ALL = "Todos los segmentos"
+FILTER_MISSES = "Solo segmentos sin palabras clave"
+FILTERS = [FILTER_HITS, FILTER_ALL, FILTER_MISSES]
+
+_MARK = '<mark style="background-color: #ffeb3b; color: #d32f2f; font-weight: bold;">{}</mark>'
+
+
+def parse_srt_text(content: str) -> List[SRTSegment]:
+    """Parse SRT content into structured segments"""
+    return list(SegmentStore.from_srt_text(content))
+
+
+def parse_srt_file(srt_file_path: str) -> List[SRTSegment]:
+    """Parse SRT file into structured segments"""
+    return list(SegmentStore.from_srt_file(srt_file_path))
+
+
+def segments_to_srt(segments: Sequence[Dict]) -> str:
+    """SRT a partir de segmentos tipo Whisper (start, end y text en segundos)"""
+    return SegmentStore.from_segments(segments).to_srt()
+
+
+def check_segment_for_keywords(segment: SRTSegment, keywords: List[str]) -> bool:
+    """Check if segment contains any keywords"""
+    if not segment or not segment.text or not keywords:
+        return False
+
+    text_lower = segment.text.lower()
+    return any(keyword.lower().strip() in text_lower for keyword in keywords if keyword and keyword.strip())
+
+
+@lru_cache(maxsize=64)
+def keyword_pattern(keywords: Tuple[str, ...]) -> Optional[Pattern]:
+    """Una sola expresión para todas las palabras clave (las más largas primero)"""
+    terms = sorted({html.escape(k.strip()) for k in keywords if k and k.strip()}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+
+
+def highlight_segment_text(text: str, keywords: Sequence[str]) -> str:
+    """Escapar el texto del segmento y resaltar las palabras clave"""
+    escaped = html.escape(text)
+    pattern = keyword_pattern(tuple(keywords))
+    if pattern is None:
+        return escaped
+    return pattern.sub(lambda m: _MARK.format(m.group()), escaped)
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _load_segment_index(path: str, mtime: float, keywords: Tuple[str, ...]):
+    # mtime forma parte de la clave: si el SRT se reescribe se vuelve a leer.
+    # Los segmentos se comparten entre reruns y no deben modificarse.
+    store = SegmentStore.from_srt_file(path, keywords)
+    return store, store.hit_positions(), store.miss_positions()
+
+
+def load_segment_index(srt_file_path: str, keywords: Sequence[str]) -> Tuple[SegmentStore, np.ndarray, np.ndarray]:
+    """Segmentos del SRT y posiciones (ordenadas) con y sin palabras clave (cacheado)"""
+    return _load_segment_index(srt_file_path, os.path.getmtime(srt_file_path), tuple(keywords))
+
+
+def format_segment_html(segment: SRTSegment, keywords: Sequence[str], is_hit: bool, is_target: bool = False) -> str:
+    """Format a single SRT segment as HTML"""
+    border = '#1e88e5' if is_target else ('#d32f2f' if is_hit else '#ccc')
+    background = '#fff3e0' if is_hit else '#f9f9f9'
+    time_style = "color: #d32f2f; font-weight: bold;" if is_hit else "color: #666;"
+    marker = "📍 " if is_target else ("🎯 " if is_hit else "")
+    speaker = f' | 🗣️ <strong>{html.escape(segment.speaker)}</strong>' if segment.speaker else ''
+    return (
+        f'<div style="margin: 10px 0; padding: 10px; border-left: {4 if is_target else 3}px solid {border}; '
+        f'background-color: {background}; border-radius: 4px;">'
+        f'<div style="font-size: 12px; {time_style} margin-bottom: 5px;">'
+        f'{marker}<strong>{segment.index}</strong> | {segment.start_time} → {segment.end_time}{speaker}</div>'
+        f'<div style="font-size: 14px; line-height: 1.4;">{highlight_segment_text(segment.text, keywords)}</div>'
+        f'</div>'
+    )
+
+
+def render_speaker_summary(segments: SegmentStore):
+    """Tiempo de habla por hablante, si la transcripción los distingue"""
+    if not segments.labels:
+        return
+    st.caption("🗣️ Tiempo de habla: " + " · ".join(
+        f"**{speaker}** {format_srt_time(seconds).split(',')[0]}"
+        for speaker, seconds in segments.speaker_seconds().items()
+    ))
+
+
+def render_segment_preview(
+    segments: SegmentStore,
+    hits: np.ndarray,
+    keywords: Sequence[str],
+    limit: int = PAGE_SIZES[0],
+    metrics: Optional[JobMetrics] = None
+):
+    """Primeros segmentos (con coincidencias si las hay), sin widgets: se puede redibujar varias veces por ejecución"""
+    positions = hits if len(hits) else np.arange(len(segments))
+    shown = positions[:limit]
+    with track(metrics, 'renderizado'):
+        st.markdown(''.join(
+            format_segment_html(segments[position], keywords, segments.is_hit(position))
+            for position in shown.tolist()
+        ), unsafe_allow_html=True)
+    if len(positions) > len(shown):
+        st.caption(f"Mostrando {len(shown)} de {len(positions)} segmentos · el visor completo aparece al terminar el lote")
+
+
+def render_segment_viewer(
+    segments: SegmentStore,
+    hits: np.ndarray,
+    misses: np.ndarray,
+    keywords: Sequence[str],
+    key: str,
+    metrics: Optional[JobMetrics] = None,
+    default_filter: str = FILTER_HITS
+):
+    """Visor paginado con filtro y salto a la n-ésima coincidencia"""
+    page_key, filter_key, size_key = f"{key}_page", f"{key}_filter", f"{key}_page_size"
+    target_key, jump_key, range_key = f"{key}_target", f"{key}_jump", f"{key}_range"
+    speaker_key = f"{key}_speakers"
+    total_minutes = float(segments.ends.max()) / 60 if len(segments) else 0.0
+    full_range = (0.0, float(np.ceil(total_minutes)))
+    if page_key not in st.session_state:
+        st.session_state[page_key] = 1
+    if filter_key not in st.session_state:
+        st.session_state[filter_key] = default_filter
+    if target_key not in st.session_state:
+        st.session_state[target_key] = None
+
+    def visible_positions() -> np.ndarray:
+        selected = st.session_state[filter_key]
+        if selected == FILTER_HITS:
+            positions = hits
+        elif selected == FILTER_MISSES:
+            positions = misses
+        else:
+            positions = np.arange(len(segments))
+        if range_key in st.session_state and tuple(st.session_state[range_key]) != full_range:
+            # Búsqueda binaria sobre los tiempos en segundos, sin interpretar marcas SRT
+            start, end = st.session_state[range_key]
+            positions = np.intersect1d(positions, segments.between(start * 60, end * 60), assume_unique=True)
+        if segments.labels and set(st.session_state.get(speaker_key, segments.labels)) != set(segments.labels):
+            positions = np.intersect1d(positions, segments.speaker_positions(st.session_state[speaker_key]),
+                                       assume_unique=True)
+        return positions
+
+    def reset_page():
+        st.session_state[page_key] = 1
+        st.session_state[target_key] = None
+
+    def jump_to_hit():
+        target = int(hits[st.session_state[jump_key] - 1])
+        if st.session_state[filter_key] == FILTER_MISSES:
+            st.session_state[filter_key] = FILTER_ALL
+        if range_key in st.session_state:
+            st.session_state[range_key] = full_range
+        if speaker_key in st.session_state:
+            st.session_state[speaker_key] = list(segments.labels)
+        visible = visible_positions()
+        # Las posiciones están ordenadas: búsqueda binaria
+        offset = int(np.searchsorted(visible, target))
+        st.session_state[page_key] = offset // st.session_state.get(size_key, PAGE_SIZES[0]) + 1
+        st.session_state[target_key] = target
+
+    col_filter, col_size = st.columns([3, 1])
+    with col_filter:
+        st.radio("Mostrar:", FILTERS, horizontal=True, key=filter_key, on_change=reset_page)
+    with col_size:
+        page_size = st.selectbox("Segmentos por página:", PAGE_SIZES, key=size_key, on_change=reset_page)
+
+    if total_minutes * 60 > RANGE_FILTER_MIN_SECONDS:
+        if range_key not in st.session_state:
+            st.session_state[range_key] = full_range
+        st.slider("⏱️ Rango de tiempo (minutos):", min_value=full_range[0], max_value=full_range[1],
+                  step=0.5, key=range_key, on_change=reset_page)
+
+    if segments.labels:
+        if speaker_key not in st.session_state:
+            st.session_state[speaker_key] = list(segments.labels)
+        st.multiselect("🗣️ Hablantes:", list(segments.labels), key=speaker_key, on_change=reset_page)
+
+    if len(hits):
+        col_jump, col_button = st.columns([3, 1])
+        with col_jump:
+            st.number_input(f"Ir a la coincidencia (1–{len(hits)}):", min_value=1, max_value=len(hits),
+                            value=1, step=1, key=jump_key)
+        with col_button:
+            st.write("")
+            st.button("🎯 Ir", key=f"{key}_jump_button", on_click=jump_to_hit, use_container_width=True)
+
+    visible = visible_positions()
+    if not len(visible):
+        st.info("No hay segmentos para mostrar con la selección actual.")
+        return
+
+    total_pages = (len(visible) - 1) // page_size + 1
+    st.session_state[page_key] = min(max(st.session_state[page_key], 1), total_pages)
+
+    def go(delta: int):
+        st.session_state[page_key] = min(max(st.session_state[page_key] + delta, 1), total_pages)
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button("⬅️ Anterior", key=f"{key}_prev", on_click=go, args=(-1,),
+                  disabled=st.session_state[page_key] <= 1, use_container_width=True)
+    with col_page:
+        st.number_input(f"Página (de {total_pages}):", min_value=1, max_value=total_pages, step=1, key=page_key)
+    with col_next:
+        st.button("Siguiente ➡️", key=f"{key}_next", on_click=go, args=(1,),
+                  disabled=st.session_state[page_key] >= total_pages, use_container_width=True)
+
+    start = (st.session_state[page_key] - 1) * page_size
+    page_positions = visible[start:start + page_size]
+    target = st.session_state[target_key]
+
+    with track(metrics, 'renderizado'):
+        page_html = ''.join(
+            format_segment_html(segments[position], keywords, segments.is_hit(position), position == target)
+            for position in page_positions.tolist()
+        )
+        st.markdown(page_html, unsafe_allow_html=True)
+    st.caption(f"Segmentos {start + 1}–{start + len(page_positions)} de {len(visible)}")
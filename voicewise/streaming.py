@@ -0,0 +1,171 @@
+"""
+Transcripción en vivo: segmentos a medida que Whisper decodifica.
+
+Los motores aceptan `on_segment`, que se llama con cada segmento en cuanto se
+decodifica (faster-whisper los entrega como generador; openai-whisper los
+imprime con verbose=True y se capturan en el hilo que transcribe). La
+transcripción corre en un hilo aparte y los segmentos pasan por una cola al
+hilo de la página, que actualiza el progreso real (segundos decodificados /
+duración) y avisa de las palabras clave sin esperar al final.
+"""
+import io
+import queue
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import Callable, Dict, List, Sequence
+
+import streamlit as st
+
+from voicewise.timeline import build_hit_index, format_clock
+
+_POLL_SECONDS = 0.2
+_TAIL_SEGMENTS = 4
+
+# Línea que imprime whisper.transcribe con verbose=True: "[00:01.000 --> 00:04.500]  texto"
+_VERBOSE_LINE = re.compile(r'^\[((?:\d+:)?\d+:\d+\.\d+) --> ((?:\d+:)?\d+:\d+\.\d+)\]\s?(.*)$')
+
+
+def _clock_to_seconds(value: str) -> float:
+    seconds = 0.0
+    for part in value.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+class _ThreadRoutedStdout(io.TextIOBase):
+    """sys.stdout que desvía la salida de hilos concretos; el resto sigue igual"""
+
+    def __init__(self, original):
+        self._original = original
+        self._sinks: Dict[int, Callable[[str], None]] = {}
+
+    def write(self, text: str) -> int:
+        sink = self._sinks.get(threading.get_ident())
+        if sink is None:
+            return self._original.write(text)
+        sink(text)
+        return len(text)
+
+    def flush(self):
+        self._original.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._original, name)
+
+
+_install_lock = threading.Lock()
+
+
+def _routed_stdout() -> _ThreadRoutedStdout:
+    with _install_lock:
+        if not isinstance(sys.stdout, _ThreadRoutedStdout):
+            sys.stdout = _ThreadRoutedStdout(sys.stdout)
+        return sys.stdout
+
+
+@contextmanager
+def capture_verbose_segments(on_segment: Callable[[Dict], None]):
+    """Convertir en segmentos las líneas que imprime openai-whisper en este hilo"""
+    stdout = _routed_stdout()
+    ident = threading.get_ident()
+    buffer = []
+    count = [0]
+
+    def sink(text: str):
+        buffer.append(text)
+        if '\n' not in text:
+            return
+        lines = ''.join(buffer).split('\n')
+        buffer[:] = [lines.pop()]
+        for line in lines:
+            match = _VERBOSE_LINE.match(line.strip())
+            if match:
+                on_segment({
+                    'id': count[0],
+                    'start': _clock_to_seconds(match.group(1)),
+                    'end': _clock_to_seconds(match.group(2)),
+                    'text': ' ' + match.group(3).strip(),
+                })
+                count[0] += 1
+
+    stdout._sinks[ident] = sink
+    try:
+        yield
+    finally:
+        stdout._sinks.pop(ident, None)
+
+
+def stream_transcription(
+    transcribe: Callable[[Callable[[Dict], None]], Dict],
+    on_segments: Callable[[List[Dict]], None]
+) -> Dict:
+    """
+    Ejecutar transcribe(on_segment) en un hilo aparte y entregar los segmentos,
+    por tandas y en orden, en el hilo que llama (el de la página).
+    """
+    segments: queue.Queue = queue.Queue()
+    with ThreadPoolExecutor(1, thread_name_prefix='voicewise-stream') as executor:
+        # El hilo de la transcripción no toca Streamlit: solo llena la cola
+        future = executor.submit(transcribe, segments.put)
+
+        def drain(batch: List[Dict]):
+            while True:
+                try:
+                    batch.append(segments.get_nowait())
+                except queue.Empty:
+                    break
+            if batch:
+                on_segments(batch)
+
+        while not future.done():
+            try:
+                drain([segments.get(timeout=_POLL_SECONDS)])
+            except queue.Empty:
+                continue
+        drain([])
+        return future.result()
+
+
+class LiveTranscript:
+    """Progreso, últimos segmentos y avisos de palabras clave mientras se transcribe"""
+
+    def __init__(self, duration: float, keywords: Sequence[str]):
+        self.duration = duration
+        self.keywords = list(keywords)
+        self.segments: List[Dict] = []
+        self.hits = []
+        self.decoded = 0.0
+        self._progress = st.progress(0.0, text="🎧 Esperando los primeros segmentos...")
+        self._alerts = st.empty()
+        self._tail = st.empty()
+
+    def add(self, segments: Sequence[Dict]):
+        """Registrar segmentos nuevos (en orden) y refrescar la vista"""
+        position = len(self.segments)
+        self.segments.extend(segments)
+        self.decoded = max([self.decoded] + [float(segment['end']) for segment in segments])
+        for hit in build_hit_index(segments, self.keywords):
+            hit = replace(hit, segment=hit.segment + position)
+            self.hits.append(hit)
+            st.toast(f"🎯 **{hit.keyword}** en {format_clock(hit.start)}")
+
+        fraction = min(self.decoded / self.duration, 1.0) if self.duration else 0.0
+        self._progress.progress(
+            fraction,
+            text=f"📝 {format_clock(self.decoded)} de {format_clock(self.duration)} decodificados ({fraction:.0%})"
+        )
+        if self.hits:
+            found = sorted({hit.keyword for hit in self.hits})
+            self._alerts.warning(f"🎯 Palabras clave detectadas: **{', '.join(found)}** ({len(self.hits)} coincidencias)")
+        self._tail.caption('  \n'.join(
+            f"[{format_clock(float(segment['start']))}] "
+            + (f"**{segment['speaker']}:** " if segment.get('speaker') else "") + segment['text'].strip()
+            for segment in self.segments[-_TAIL_SEGMENTS:]
+        ))
+
+    def complete(self):
+        self._progress.progress(1.0, text=f"✅ {format_clock(self.duration)} decodificados")
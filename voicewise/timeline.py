@@ -0,0 +1,212 @@
+"""
+Línea de tiempo de palabras clave con reproductor.
+
+Al terminar cada transcripción se precalcula un índice de coincidencias
+(palabra, inicio, fin) a partir de los segmentos de Whisper y se guarda una
+vista previa del audio (mono, 8 kHz, MP3 de 32 kbps) en la caché en disco.
+La vista de revisión dibuja todas las coincidencias en una barra y el
+reproductor arranca un segundo antes de la coincidencia seleccionada.
+"""
+import html
+import os
+import re
+import wave
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import streamlit as st
+
+from voicewise.cache import cache_dir
+
+PREVIEW_SAMPLE_RATE = 8000
+PREVIEW_BITRATE = '32k'
+PRE_ROLL_SECONDS = 1
+
+_PALETTE = ['#d32f2f', '#1e88e5', '#43a047', '#fb8c00', '#8e24aa', '#00897b', '#6d4c41', '#3949ab']
+
+
+@dataclass(frozen=True)
+class KeywordHit:
+    keyword: str
+    start: float
+    end: float
+    segment: int      # posición del segmento en la transcripción
+    speaker: Optional[str] = None
+
+
+def build_hit_index(segments: Sequence[Dict], keywords: Sequence[str]) -> List[KeywordHit]:
+    """Coincidencias (palabra, inicio, fin) a partir de los segmentos de Whisper, en orden temporal"""
+    patterns = [
+        (keyword.strip(), re.compile(re.escape(keyword.strip()), re.IGNORECASE))
+        for keyword in keywords if keyword and keyword.strip()
+    ]
+    hits = []
+    for position, segment in enumerate(segments):
+        text = segment.get('text', '')
+        for keyword, pattern in patterns:
+            if pattern.search(text):
+                hits.append(KeywordHit(keyword, float(segment['start']), float(segment['end']), position,
+                                       segment.get('speaker')))
+    hits.sort(key=lambda hit: (hit.start, hit.segment))
+    return hits
+
+
+def find_preview(name: str) -> Optional[str]:
+    """Vista previa ya guardada para `name`, sin decodificar el audio"""
+    directory = cache_dir('preview')
+    for ext in ('.mp3', '.wav'):
+        existing = os.path.join(directory, name + ext)
+        if os.path.exists(existing):
+            return existing
+    return None
+
+
+def write_preview(audio: np.ndarray, name: str, sample_rate: int = 16000) -> Optional[str]:
+    """
+    Guardar una vista previa ligera del audio decodificado en la caché.
+    `name` debe identificar el contenido (p. ej. el hash del archivo); si ya existe se reutiliza.
+    """
+    existing = find_preview(name)
+    if existing:
+        return existing
+
+    directory = cache_dir('preview')
+    step = max(1, sample_rate // PREVIEW_SAMPLE_RATE)
+    usable = len(audio) // step * step
+    if usable == 0:
+        return None
+    # Promediar bloques hace de filtro paso bajo antes de diezmar
+    mono = audio[:usable].reshape(-1, step).mean(axis=1)
+    pcm = (np.clip(mono, -1.0, 1.0) * 32767).astype(np.int16)
+
+    path = os.path.join(directory, name + '.mp3')
+    tmp_path = path + '.tmp'
+    try:
+        from pydub import AudioSegment
+        segment = AudioSegment(pcm.tobytes(), frame_rate=PREVIEW_SAMPLE_RATE, sample_width=2, channels=1)
+        segment.export(tmp_path, format='mp3', bitrate=PREVIEW_BITRATE)
+    except Exception:
+        # Sin codificador MP3 disponible: WAV de 8 kHz
+        path = os.path.join(directory, name + '.wav')
+        with wave.open(tmp_path, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(PREVIEW_SAMPLE_RATE)
+            wav.writeframes(pcm.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def format_clock(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def keyword_colors(hits: Sequence[KeywordHit]) -> Dict[str, str]:
+    colors = {}
+    for hit in hits:
+        if hit.keyword not in colors:
+            colors[hit.keyword] = _PALETTE[len(colors) % len(_PALETTE)]
+    return colors
+
+
+def timeline_svg(hits: Sequence[KeywordHit], duration: float, current: Optional[int] = None) -> str:
+    """Barra SVG con una marca por coincidencia; la seleccionada va resaltada (textos escapados: se pinta como HTML)"""
+    duration = max(duration, max((hit.end for hit in hits), default=0.0), 1.0)
+    colors = keyword_colors(hits)
+    marks = []
+    for hit in hits:
+        x = hit.start / duration * 1000
+        width = max((hit.end - hit.start) / duration * 1000, 2)
+        label = html.escape(hit.keyword) + (f" · {html.escape(hit.speaker)}" if hit.speaker else "")
+        marks.append(f'<rect x="{x:.1f}" y="6" width="{width:.1f}" height="18" fill="{colors[hit.keyword]}" '
+                     f'opacity="0.75"><title>{format_clock(hit.start)} · {label}</title></rect>')
+    if current is not None and 0 <= current < len(hits):
+        x = hits[current].start / duration * 1000
+        marks.append(f'<rect x="{x - 2:.1f}" y="1" width="4" height="28" fill="#000"/>')
+    legend = ' '.join(
+        f'<span style="color: {color}; font-weight: bold;">■</span> {html.escape(keyword)}' for keyword, color in colors.items()
+    )
+    return (
+        '<svg viewBox="0 0 1000 30" preserveAspectRatio="none" style="width: 100%; height: 36px;">'
+        '<rect x="0" y="6" width="1000" height="18" fill="#eceff1"/>'
+        + ''.join(marks) +
+        '</svg>'
+        f'<div style="display: flex; justify-content: space-between; font-size: 11px; color: #666;">'
+        f'<span>00:00:00</span><span>{legend}</span><span>{format_clock(duration)}</span></div>'
+    )
+
+
+def _preview_format(path: str) -> str:
+    return 'audio/mpeg' if path.endswith('.mp3') else 'audio/wav'
+
+
+def render_hit_timeline(
+    hits: Sequence[KeywordHit],
+    duration: float,
+    preview_path: Optional[str],
+    key: str
+):
+    """Línea de tiempo con navegación entre coincidencias y reproductor posicionado"""
+    index_key, autoplay_key = f"{key}_hit", f"{key}_autoplay"
+    if autoplay_key not in st.session_state:
+        st.session_state[autoplay_key] = False
+
+    if not hits:
+        st.info("No hay coincidencias de palabras clave en este audio.")
+        if preview_path and os.path.exists(preview_path):
+            st.audio(preview_path, format=_preview_format(preview_path))
+        return
+
+    speakers = sorted({hit.speaker for hit in hits if hit.speaker})
+    if len(speakers) > 1:
+        chosen = st.multiselect("🗣️ Coincidencias de:", speakers, default=speakers, key=f"{key}_speakers")
+        hits = [hit for hit in hits if hit.speaker in chosen]
+        if not hits:
+            st.info("Ningún hablante seleccionado tiene coincidencias.")
+            return
+
+    if st.session_state.get(index_key, 0) >= len(hits):
+        st.session_state[index_key] = 0
+
+    def step(delta: int):
+        st.session_state[index_key] = (st.session_state.get(index_key, 0) + delta) % len(hits)
+        st.session_state[autoplay_key] = True
+
+    def selected():
+        st.session_state[autoplay_key] = True
+
+    col_prev, col_select, col_next = st.columns([1, 4, 1])
+    with col_prev:
+        st.button("⏮️", key=f"{key}_prev", on_click=step, args=(-1,), use_container_width=True,
+                  help="Coincidencia anterior")
+    with col_select:
+        current = st.selectbox(
+            f"Coincidencia ({len(hits)} en total):",
+            range(len(hits)),
+            format_func=lambda i: f"{i + 1}. {format_clock(hits[i].start)} · {hits[i].keyword}"
+                                  + (f" · {hits[i].speaker}" if hits[i].speaker else ""),
+            key=index_key,
+            on_change=selected,
+            label_visibility="collapsed"
+        )
+    with col_next:
+        st.button("⏭️", key=f"{key}_next", on_click=step, args=(1,), use_container_width=True,
+                  help="Coincidencia siguiente")
+
+    st.markdown(timeline_svg(hits, duration, current), unsafe_allow_html=True)
+
+    hit = hits[current]
+    if preview_path and os.path.exists(preview_path):
+        st.audio(
+            preview_path,
+            format=_preview_format(preview_path),
+            start_time=max(0, int(hit.start) - PRE_ROLL_SECONDS),
+            autoplay=st.session_state[autoplay_key]
+        )
+    else:
+        st.caption("Vista previa de audio no disponible")
+    st.caption(f"⏱️ {format_clock(hit.start)} → {format_clock(hit.end)} · 🎯 {hit.keyword}"
+               + (f" · 🗣️ {hit.speaker}" if hit.speaker else ""))
+
@@ -0,0 +1,73 @@
+"""
+Triaje por palabras clave con parada anticipada.
+
+Para decidir si una grabación contiene alguno de los términos buscados no
+hace falta decodificarla entera: los segmentos se comprueban a medida que el
+motor los produce (on_segment) y la decodificación se corta en cuanto se
+cumple la regla (N coincidencias o al menos una por palabra clave). El
+resultado parcial queda marcado para transcribirlo completo más adelante y
+nunca se guarda como punto de control.
+"""
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence
+
+from voicewise.timeline import KeywordHit, build_hit_index
+
+
+@dataclass(frozen=True)
+class TriageRule:
+    max_hits: Optional[int] = None      # detener tras N coincidencias
+    all_keywords: bool = False          # detener cuando cada palabra clave apareció al menos una vez
+
+    @property
+    def active(self) -> bool:
+        return self.max_hits is not None or self.all_keywords
+
+
+class TriageStop(Exception):
+    """Se lanza desde on_segment para cortar la decodificación"""
+
+
+class KeywordTriage:
+    """Coincidencias acumuladas de una grabación a medida que llegan los segmentos"""
+
+    def __init__(self, keywords: Sequence[str], rule: TriageRule):
+        self.keywords = [k.strip() for k in keywords if k and k.strip()]
+        self.rule = rule
+        self.segments: List[Dict] = []
+        self.hits: List[KeywordHit] = []
+
+    @property
+    def decoded(self) -> float:
+        return float(self.segments[-1]['end']) if self.segments else 0.0
+
+    @property
+    def satisfied(self) -> bool:
+        if self.rule.max_hits is not None and len(self.hits) >= self.rule.max_hits:
+            return True
+        if self.rule.all_keywords and self.keywords:
+            return {hit.keyword for hit in self.hits} >= set(self.keywords)
+        return False
+
+    def feed(self, segment: Dict):
+        position = len(self.segments)
+        self.segments.append(segment)
+        self.hits.extend(replace(hit, segment=position) for hit in build_hit_index([segment], self.keywords))
+        if self.rule.active and self.satisfied:
+            raise TriageStop()
+
+
+def transcribe_with_triage(engine, audio, language: Optional[str], keywords: Sequence[str], rule: TriageRule) -> Dict:
+    """
+    Transcribir hasta que se cumpla la regla. Si se corta antes del final, el
+    resultado lleva `triage_stopped_at` (segundos decodificados).
+    """
+    triage = KeywordTriage(keywords, rule)
+    try:
+        return engine.transcribe(audio=audio, language=language, verbose=False, on_segment=triage.feed)
+    except TriageStop:
+        return {
+            'text': ''.join(segment['text'] for segment in triage.segments),
+            'segments': triage.segments,
+            'triage_stopped_at': triage.decoded,
+        }
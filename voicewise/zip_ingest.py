@@ -0,0 +1,138 @@
+"""
+Lectura de ZIPs de audio directamente desde el buffer subido.
+
+Solo se consulta el directorio central para listar los audios; cada miembro
+se extrae de forma perezosa justo antes de transcribirlo, con límites contra
+zip bombs y rutas maliciosas.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from typing import IO, List, Tuple
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.wave', '.m4a', '.flac', '.aac')
+
+MAX_MEMBERS = 5000
+MAX_MEMBER_BYTES = 2 * 1024 ** 3        # 2 GB descomprimidos por audio
+MAX_TOTAL_BYTES = 20 * 1024 ** 3        # 20 GB descomprimidos por ZIP
+MAX_COMPRESSION_RATIO = 100             # el audio apenas se comprime; ratios mayores son sospechosos
+RATIO_CHECK_MIN_BYTES = 50 * 1024 ** 2  # los audios pequeños (p. ej. silencio puro) pueden comprimir mucho
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class ZipSecurityError(Exception):
+    """El ZIP supera los límites de seguridad configurados"""
+
+
+@dataclass
+class ZipAudioMember:
+    name: str            # ruta dentro del ZIP
+    filename: str        # nombre base mostrado al usuario
+    file_size: int       # bytes descomprimidos declarados
+    compress_size: int
+
+
+def is_safe_member_name(name: str) -> bool:
+    """Rechazar rutas absolutas, unidades de Windows y componentes '..'"""
+    normalized = name.replace('\\', '/')
+    if normalized.startswith('/') or (len(normalized) > 1 and normalized[1] == ':'):
+        return False
+    return '..' not in normalized.split('/') and posixpath.normpath(normalized) != '.'
+
+
+class ZipAudioArchive:
+    """Vista de solo lectura de los audios contenidos en un ZIP"""
+
+    def __init__(
+        self,
+        fileobj: IO[bytes],
+        max_members: int = MAX_MEMBERS,
+        max_member_bytes: int = MAX_MEMBER_BYTES,
+        max_total_bytes: int = MAX_TOTAL_BYTES,
+        max_ratio: float = MAX_COMPRESSION_RATIO
+    ):
+        self._zf = zipfile.ZipFile(fileobj, 'r')
+        self.max_member_bytes = max_member_bytes
+        self.rejected: List[Tuple[str, str]] = []
+        self.members = self._scan(max_members, max_total_bytes, max_ratio)
+
+    def _scan(self, max_members: int, max_total_bytes: int, max_ratio: float) -> List[ZipAudioMember]:
+        infos = self._zf.infolist()
+        if len(infos) > max_members:
+            raise ZipSecurityError(f"El ZIP contiene {len(infos)} entradas (máximo {max_members})")
+
+        members = []
+        total = 0
+        for info in infos:
+            if info.is_dir():
+                continue
+            filename = posixpath.basename(info.filename.replace('\\', '/'))
+            # Ignorar metadatos de macOS y archivos que no son audio
+            if filename.startswith('._') or info.filename.startswith('__MACOSX/'):
+                continue
+            if not filename.lower().endswith(AUDIO_EXTENSIONS):
+                continue
+            if not is_safe_member_name(info.filename):
+                self.rejected.append((info.filename, "ruta no permitida"))
+                continue
+            if info.file_size > self.max_member_bytes:
+                self.rejected.append((info.filename, "tamaño descomprimido excesivo"))
+                continue
+            if (info.file_size > RATIO_CHECK_MIN_BYTES and info.compress_size
+                    and info.file_size / info.compress_size > max_ratio):
+                self.rejected.append((info.filename, "ratio de compresión sospechoso"))
+                continue
+            total += info.file_size
+            if total > max_total_bytes:
+                raise ZipSecurityError(
+                    f"El contenido de audio descomprimido supera {max_total_bytes / 1024 ** 3:.0f} GB"
+                )
+            members.append(ZipAudioMember(info.filename, filename, info.file_size, info.compress_size))
+        return members
+
+    def open(self, member: ZipAudioMember) -> IO[bytes]:
+        """Abrir el miembro como stream sin escribirlo a disco"""
+        return self._zf.open(member.name, 'r')
+
+    def extract(self, member: ZipAudioMember, dest_dir: str) -> str:
+        """
+        Extraer un único miembro a un archivo temporal dentro de dest_dir.
+        El nombre en disco no deriva de la ruta del ZIP, así que no hay path traversal posible.
+        """
+        suffix = os.path.splitext(member.filename)[1].lower()
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=dest_dir)
+        written = 0
+        try:
+            with os.fdopen(fd, 'wb') as out, self.open(member) as src:
+                while True:
+                    chunk = src.read(_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if written > self.max_member_bytes:
+                        raise ZipSecurityError(f"{member.filename} supera el tamaño máximo permitido")
+                    out.write(chunk)
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return path
+
+    def member_sha256(self, member: ZipAudioMember) -> str:
+        """
+        Hash SHA-256 del contenido descomprimido, leído en streaming sin extraerlo.
+        Coincide con file_sha256 del archivo extraído.
+        """
+        digest = hashlib.sha256()
+        with self.open(member) as src:
+            for chunk in iter(lambda: src.read(_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def close(self):
+        self._zf.close()
+